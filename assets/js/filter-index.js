@@ -0,0 +1,151 @@
+// Client side of the filter index written by `generate_readme.py --filter-index`.
+//
+// The index holds, for every score feature, a byte per project (its score,
+// 255 when it has none) and bitsets of the projects that are ✅ (yes),
+// 🚧 (wip), ❌ (no) or missing. Project i is bit i % 8 of byte i / 8, in
+// table column order, so filtering never reads table cells:
+//
+//   loadFilterIndex("/filter-index.json").then(function (index) {
+//     var mask = index.filter([["android_app", ">=", 7], ["search", "!=", "no"]]);
+//     showProjectColumns(document.querySelector("table"), mask);
+//   });
+
+(function () {
+  "use strict";
+
+  var NO_SCORE = 255;
+
+  function decode(text) {
+    var binary = atob(text);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+      bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes;
+  }
+
+  function FilterIndex(payload) {
+    this.count = payload.count;
+    this.projects = payload.projects;
+    this.features = {};
+    for (var i = 0; i < payload.features.length; i++) {
+      var feature = payload.features[i];
+      this.features[feature.key] = {
+        name: feature.name,
+        scores: decode(feature.scores),
+        yes: decode(feature.yes),
+        wip: decode(feature.wip),
+        no: decode(feature.no),
+        missing: decode(feature.missing),
+      };
+    }
+  }
+
+  // Bitset with every project set
+  FilterIndex.prototype.all = function () {
+    var bits = new Uint8Array((this.count + 7) >> 3).fill(255);
+    if (this.count & 7) {
+      bits[bits.length - 1] = (1 << (this.count & 7)) - 1;
+    }
+    return bits;
+  };
+
+  FilterIndex.prototype.feature = function (key) {
+    var feature = this.features[key];
+    if (!feature) {
+      throw new Error("Unknown feature key '" + key + "'");
+    }
+    return feature;
+  };
+
+  // Bitset of the projects matching one condition: [key, "=" or "!=", state]
+  // with state one of "yes", "wip", "no", "missing", or [key, op, score]
+  // with op one of = != > >= < <= (compares plain scores only)
+  FilterIndex.prototype.match = function (key, op, value) {
+    var feature = this.feature(key);
+    var bits;
+    if (typeof value === "string") {
+      bits = feature[value];
+      if (!bits || value === "name" || value === "scores") {
+        throw new Error("Unknown state '" + value + "'");
+      }
+      if (op === "=") {
+        return bits.slice();
+      }
+      var all = this.all();
+      return all.map(function (byte, i) {
+        return byte & ~bits[i];
+      });
+    }
+
+    var compare = {
+      "=": function (score) { return score === value; },
+      "!=": function (score) { return score !== value; },
+      ">": function (score) { return score > value; },
+      ">=": function (score) { return score >= value; },
+      "<": function (score) { return score < value; },
+      "<=": function (score) { return score <= value; },
+    }[op];
+    bits = new Uint8Array((this.count + 7) >> 3);
+    for (var i = 0; i < this.count; i++) {
+      var score = feature.scores[i];
+      if (score !== NO_SCORE && compare(score)) {
+        bits[i >> 3] |= 1 << (i & 7);
+      }
+    }
+    return bits;
+  };
+
+  // Bitset of the projects matching every [key, op, value] condition
+  FilterIndex.prototype.filter = function (conditions) {
+    var bits = this.all();
+    for (var i = 0; i < conditions.length; i++) {
+      var matched = this.match.apply(this, conditions[i]);
+      for (var j = 0; j < bits.length; j++) {
+        bits[j] &= matched[j];
+      }
+    }
+    return bits;
+  };
+
+  FilterIndex.prototype.has = function (bits, project) {
+    return (bits[project >> 3] >> (project & 7)) & 1;
+  };
+
+  // Show only the table columns of the projects set in `bits`
+  // (column 0 holds the feature names)
+  function showProjectColumns(table, bits) {
+    var rows = table.rows;
+    for (var r = 0; r < rows.length; r++) {
+      var cells = rows[r].cells;
+      for (var c = 1; c < cells.length; c++) {
+        var project = c - 1;
+        var shown = (bits[project >> 3] >> (project & 7)) & 1;
+        cells[c].style.display = shown ? "" : "none";
+      }
+    }
+  }
+
+  function loadFilterIndex(url) {
+    return fetch(url)
+      .then(function (response) {
+        return response.json();
+      })
+      .then(function (payload) {
+        return new FilterIndex(payload);
+      });
+  }
+
+  var exports = {
+    FilterIndex: FilterIndex,
+    loadFilterIndex: loadFilterIndex,
+    showProjectColumns: showProjectColumns,
+  };
+  if (typeof module !== "undefined" && module.exports) {
+    module.exports = exports;
+  } else {
+    window.FilterIndex = FilterIndex;
+    window.loadFilterIndex = loadFilterIndex;
+    window.showProjectColumns = showProjectColumns;
+  }
+})();
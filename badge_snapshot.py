@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Resolve shields.io badges to static text at generation time.
+
+The badge rows ("Github Stars", "Contributors", "Last Commit", "Source
+Language") and the license row embed live shields.io images, so every
+page view makes several image requests per project. This module fetches
+each badge value once through the shields.io JSON endpoint and stores it
+on the feature, so the generator writes plain text into the cells.
+"""
+
+import asyncio
+import http.client
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from generate_readme import (
+    _MARKDOWN_IMAGE,
+    AtomicWriter,
+    _table_parts,
+    feature_row_cells,
+)
+
+# Upstream badge service
+DEFAULT_ENDPOINT = "https://img.shields.io"
+
+# Processors whose cells are badge images
+BADGE_PROCESSORS = ("generate_badge_row", "generate_license_row")
+
+DEFAULT_CACHE_FILE = ".badge_cache.json"
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 10
+
+
+def badge_request_url(image_url, endpoint=DEFAULT_ENDPOINT):
+    """
+    Return the JSON endpoint URL for a shields.io badge image URL.
+
+    Returns None for images that are not served by shields.io.
+    """
+    parts = urlsplit(image_url)
+    if parts.netloc != "img.shields.io":
+        return None
+    url = f"{endpoint.rstrip('/')}{parts.path}.json"
+    if parts.query:
+        url += f"?{parts.query}"
+    return url
+
+
+def static_badge_value(image_url):
+    """Return the message of a static shields.io badge, or None."""
+    parts = urlsplit(image_url)
+    if parts.netloc != "img.shields.io" or not parts.path.startswith("/static/"):
+        return None
+    return parse_qs(parts.query).get("message", [None])[0]
+
+
+def collect_badge_urls(data):
+    """
+    Return {feature index: [badge image URLs]} for the badge rows of data.
+
+    Works with the dict from load_json, a Catalog or a SpooledCatalog.
+    """
+    projects, features, keys = _table_parts(data)
+    urls = {}
+    for index, (feature, key) in enumerate(zip(features, keys)):
+        if feature.get("processor") not in BADGE_PROCESSORS:
+            continue
+        # Render without any previous snapshot to get the live badges
+        live = {name: value for name, value in feature.items() if name != "snapshot"}
+        _, cells = feature_row_cells(data, projects, live, key)
+        urls[index] = [
+            match[2] for match in map(_MARKDOWN_IMAGE.fullmatch, cells) if match
+        ]
+    return urls
+
+
+class _ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP connections per host."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, netloc):
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def get(self, url, headers):
+        """
+        Send a GET request, reusing an idle connection to the host if any.
+
+        Returns:
+            (status, response headers, body bytes)
+        """
+        parts = urlsplit(url)
+        host = (parts.scheme, parts.netloc)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        with self._lock:
+            idle = self._idle.get(host)
+            connection = idle.pop() if idle else None
+        if connection is None:
+            connection = self._connect(*host)
+
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                self._idle.setdefault(host, []).append(connection)
+        return response.status, response.headers, body
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+class BadgeFetcher:
+    """
+    Fetch badge values with bounded concurrency and an ETag/TTL cache.
+
+    Cached values younger than `ttl` seconds are used without a request.
+    Older entries are revalidated with If-None-Match; a 304 keeps the value.
+    When a request fails the stale value is kept, if there is one.
+
+    Args:
+        endpoint: Base URL of the shields.io compatible service
+        cache_file: JSON file holding {request url: {etag, value, fetched}}
+        ttl: Seconds a cached value is used without revalidation
+        concurrency: Maximum number of requests in flight
+        timeout: Socket timeout of each request, in seconds
+    """
+
+    def __init__(
+        self,
+        endpoint=DEFAULT_ENDPOINT,
+        cache_file=DEFAULT_CACHE_FILE,
+        ttl=DEFAULT_TTL,
+        concurrency=DEFAULT_CONCURRENCY,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.endpoint = endpoint
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = self._load_cache()
+        self.requests = 0
+
+    def _load_cache(self):
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        """Write the cache file (atomically, so readers never see half a file)."""
+        if not self.cache_file:
+            return
+        with AtomicWriter(self.cache_file) as f:
+            json.dump(self.cache, f, indent=1, sort_keys=True)
+
+    def _fetch_one(self, pool, url, now):
+        """Return the value for one request URL (blocking, runs in a thread)."""
+        entry = self.cache.get(url)
+        if entry and now - entry.get("fetched", 0) < self.ttl:
+            return entry.get("value")
+
+        headers = {"Accept": "application/json", "User-Agent": "generate_readme.py"}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        self.requests += 1
+        try:
+            status, response_headers, body = pool.get(url, headers)
+        except (OSError, http.client.HTTPException):
+            return entry.get("value") if entry else None
+
+        if status == 304 and entry:
+            entry["fetched"] = now
+            return entry.get("value")
+        if status != 200:
+            return entry.get("value") if entry else None
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return entry.get("value") if entry else None
+        value = payload.get("value", payload.get("message"))
+        if value is None:
+            return entry.get("value") if entry else None
+
+        self.cache[url] = {
+            "etag": response_headers.get("ETag"),
+            "value": str(value),
+            "fetched": now,
+        }
+        return str(value)
+
+    async def fetch_all(self, urls):
+        """Fetch the values of request URLs; returns {url: value or None}."""
+        pool = _ConnectionPool(self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        now = time.time()
+
+        async def fetch(url):
+            async with semaphore:
+                return url, await asyncio.to_thread(self._fetch_one, pool, url, now)
+
+        try:
+            return dict(await asyncio.gather(*(fetch(url) for url in set(urls))))
+        finally:
+            pool.close()
+
+    def resolve(self, image_urls):
+        """
+        Resolve badge image URLs to text.
+
+        Returns:
+            {image url: text} for every badge that could be resolved
+        """
+        values = {}
+        requests = {}
+        for image_url in image_urls:
+            static = static_badge_value(image_url)
+            if static is not None:
+                values[image_url] = static
+                continue
+            request_url = badge_request_url(image_url, self.endpoint)
+            if request_url is not None:
+                requests[image_url] = request_url
+
+        if requests:
+            fetched = asyncio.run(self.fetch_all(requests.values()))
+            for image_url, request_url in requests.items():
+                if fetched.get(request_url) is not None:
+                    values[image_url] = fetched[request_url]
+            self.save_cache()
+
+        # Keep the values from breaking the markdown table
+        return {url: value.replace("|", "\\|") for url, value in values.items()}
+
+
+def snapshot_badges(data, fetcher=None, **options):
+    """
+    Resolve the badge rows of data and store the values on the features.
+
+    Each badge feature gets a "snapshot" dict mapping badge image URL →
+    text, which generate_readme renders instead of the live image. Badges
+    that cannot be resolved keep their image.
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+        fetcher: BadgeFetcher to use; created from `options` when omitted
+        **options: Keyword arguments for BadgeFetcher
+
+    Returns:
+        The BadgeFetcher used
+    """
+    fetcher = fetcher or BadgeFetcher(**options)
+    _, features, _ = _table_parts(data)
+    urls = collect_badge_urls(data)
+    values = fetcher.resolve(url for row in urls.values() for url in row)
+
+    for index, row in urls.items():
+        features[index]["snapshot"] = {url: values[url] for url in row if url in values}
+    return fetcher
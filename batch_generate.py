@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Render many comparison catalogs in one run.
+
+Sister comparison repositories use the same layout as this one (readme.tpl
+and projects.json rendered to readme.md), so they can all be regenerated
+at once:
+
+    python3 batch_generate.py ../foss_photo_libraries ../foss_note_apps
+    python3 batch_generate.py --glob "../foss_*"
+    python3 batch_generate.py --catalog docs/a.tpl data/a.json docs/a.md
+    python3 batch_generate.py --glob "../foss_*" --summary batch.json
+
+Catalogs are validated and rendered in a process pool. Every worker imports
+the generator and registers its processors once, and compiles each template
+and feature spec it sees once (see compile_template and compile_features),
+instead of once per catalog as with one generate_readme.py run per
+directory. A summary lists the status, stage timings and error of every
+catalog; the exit status is 1 when any catalog failed.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+from io import StringIO
+
+from generate_readme import AtomicWriter, StageProfiler, _file_sha256, generate_readme
+
+# File names of a catalog directory
+TEMPLATE_NAME = "readme.tpl"
+JSON_NAME = "projects.json"
+OUTPUT_NAME = "readme.md"
+
+# Stages reported in the summary table, see StageProfiler
+SUMMARY_STAGES = ("load_json", "validate", "write_readme")
+
+
+def directory_catalog(directory):
+    """Return the (template, json, output) files of a catalog directory."""
+    return (
+        os.path.join(directory, TEMPLATE_NAME),
+        os.path.join(directory, JSON_NAME),
+        os.path.join(directory, OUTPUT_NAME),
+    )
+
+
+def find_catalogs(patterns):
+    """
+    Return the catalogs of the directories matching glob patterns.
+
+    Only directories holding a projects.json are catalogs; they are
+    returned sorted and without duplicates.
+    """
+    directories = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            if os.path.isfile(os.path.join(path, JSON_NAME)):
+                directories.add(os.path.normpath(path))
+    return [directory_catalog(directory) for directory in sorted(directories)]
+
+
+def catalog_name(catalog):
+    """Return a short name of a catalog: the directory of its JSON file."""
+    return os.path.dirname(os.path.normpath(catalog[1])) or "."
+
+
+def render_catalog(catalog, options=None):
+    """
+    Validate and render one catalog, never raising.
+
+    Args:
+        catalog: (template file, json file, output file)
+        options: Keyword arguments for generate_readme
+
+    Returns:
+        Dict with "name", "template", "json", "output", "status" ("ok",
+        "invalid" for validation errors or "failed"), "changed" (whether
+        the output was rewritten), "seconds", "stages" (stage name →
+        seconds), "error" (message or None) and "log" (printed output)
+    """
+    template_file, json_file, output_file = catalog
+    before = _file_sha256(output_file) if os.path.exists(output_file) else None
+    log = StringIO()
+    status, error = "ok", None
+    start = time.perf_counter()
+    with StageProfiler(trace_memory=False) as profiler, contextlib.redirect_stdout(log):
+        try:
+            generate_readme(template_file, output_file, json_file, **(options or {}))
+        except ValueError as exception:
+            status, error = "invalid", str(exception)
+        except Exception as exception:
+            status, error = "failed", f"{type(exception).__name__}: {exception}"
+    seconds = time.perf_counter() - start
+
+    after = _file_sha256(output_file) if os.path.exists(output_file) else None
+    return {
+        "name": catalog_name(catalog),
+        "template": template_file,
+        "json": json_file,
+        "output": output_file,
+        "status": status,
+        "changed": status == "ok" and after != before,
+        "seconds": seconds,
+        "stages": {key: stats["seconds"] for key, stats in profiler.stats.items()},
+        "error": error,
+        "log": log.getvalue(),
+    }
+
+
+def run_batch(catalogs, jobs=None, options=None):
+    """
+    Render catalogs, in a process pool unless jobs is 1 or there is one.
+
+    Args:
+        catalogs: (template file, json file, output file) triples
+        jobs: Worker processes (default: the CPU count)
+        options: Keyword arguments for generate_readme, for every catalog
+
+    Returns:
+        render_catalog results, in the order of `catalogs`
+    """
+    catalogs = list(catalogs)
+    if jobs == 1 or len(catalogs) < 2:
+        return [render_catalog(catalog, options) for catalog in catalogs]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(render_catalog, catalogs, [options] * len(catalogs)))
+
+
+def format_summary(results, seconds=None):
+    """Return the results as a text table followed by the errors."""
+    width = max([len("catalog"), *(len(result["name"]) for result in results)])
+    header = f"{'catalog':<{width}} {'status':<8} {'changed':<7}"
+    header += "".join(f" {name:>12}" for name in SUMMARY_STAGES) + f" {'total':>8}"
+    lines = [header]
+    for result in results:
+        line = f"{result['name']:<{width}} {result['status']:<8} "
+        line += f"{'yes' if result['changed'] else 'no':<7}"
+        for name in SUMMARY_STAGES:
+            stage_seconds = result["stages"].get(name)
+            line += " " + (
+                f"{stage_seconds:>12.3f}" if stage_seconds is not None else f"{'-':>12}"
+            )
+        lines.append(line + f" {result['seconds']:>8.3f}")
+
+    failures = [result for result in results if result["status"] != "ok"]
+    for result in failures:
+        lines.append("")
+        lines.append(f"{result['name']}: {result['error']}")
+        lines.extend(f"  {line}" for line in result["log"].splitlines())
+
+    ok = len(results) - len(failures)
+    total = f"{len(results)} catalog(s): {ok} ok, {len(failures)} failed"
+    if seconds is not None:
+        total += f" in {seconds:.2f}s"
+    lines.append("")
+    lines.append(total)
+    return "\n".join(lines)
+
+
+def write_summary(results, path, seconds=None):
+    """Write the results as JSON (see render_catalog)."""
+    with AtomicWriter(path) as f:
+        json.dump({"seconds": seconds, "catalogs": results}, f, indent=2)
+        f.write("\n")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        help=f"Catalog directories ({TEMPLATE_NAME} and {JSON_NAME} → {OUTPUT_NAME})",
+    )
+    parser.add_argument(
+        "--glob",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Also render every catalog directory matching PATTERN; repeatable",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="append",
+        nargs=3,
+        default=[],
+        metavar=("TEMPLATE", "JSON", "OUTPUT"),
+        help="Also render TEMPLATE with JSON to OUTPUT; repeatable",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes (default: the CPU count)",
+    )
+    parser.add_argument(
+        "--summary",
+        default=None,
+        metavar="PATH",
+        help="Also write the summary as JSON to PATH",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Render every catalog and print the summary."""
+    args = parse_args(argv)
+    catalogs = [directory_catalog(directory) for directory in args.directories]
+    catalogs.extend(find_catalogs(args.glob))
+    catalogs.extend(tuple(catalog) for catalog in args.catalog)
+    catalogs = list(dict.fromkeys(catalogs))
+    if not catalogs:
+        print("No catalogs to render", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    results = run_batch(catalogs, args.jobs)
+    seconds = time.perf_counter() - start
+
+    print(format_summary(results, seconds))
+    if args.summary:
+        write_summary(results, args.summary, seconds)
+    return 1 if any(result["status"] != "ok" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
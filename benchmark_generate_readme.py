@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the generate_readme.py pipeline.
+
+The real projects.json is too small to show how the generator scales, so
+the benchmarks run on seeded synthetic catalogs of N projects × M features
+with the same value mix as the real data. Each stage reports its best wall
+time and its peak traced memory. Results can be saved as a JSON baseline
+and later runs compared against it:
+
+    python3 benchmark_generate_readme.py --save .benchmark.json
+    python3 benchmark_generate_readme.py --baseline .benchmark.json
+
+The second command exits with status 1 when a stage got slower or bigger
+than the baseline by more than --threshold.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generate_readme import (
+    feature_key,
+    generate_comparison_table,
+    generate_default_row,
+    generate_readme,
+    heading_anchor,
+    score_to_emoji,
+    validate_projects_json,
+)
+
+# Catalog sizes as (projects, features); "real" matches projects.json
+SIZES = {
+    "real": (17, 32),
+    "medium": (200, 60),
+    "large": (2000, 120),
+}
+
+DEFAULT_SIZES = ("real", "medium")
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+
+# Stages faster than this are compared as if they took this long, so
+# timer noise on tiny stages is not reported as a regression
+MIN_SECONDS = 0.005
+
+# Processors of the fixed rows at the top of the real table
+_FIXED_FEATURES = [
+    {"name": "Logo", "link": None, "processor": "generate_logo_row"},
+    {
+        "name": "Github Stars",
+        "link": "features.md#github-stars",
+        "processor": "generate_badge_row",
+        "badge_template": "![?](https://img.shields.io/github/stars/{repo}?label=%20)",
+    },
+    {
+        "name": "Last Commit",
+        "link": "features.md#last-commit",
+        "processor": "generate_badge_row",
+        "badge_template": (
+            "![?](https://img.shields.io/github/last-commit/{repo}/{branch}?label=%20)"
+        ),
+        "use_lowercase": True,
+        "use_branch": True,
+    },
+    {
+        "name": "License",
+        "link": "features.md#license",
+        "processor": "generate_license_row",
+    },
+]
+
+
+def _synthetic_value(rng):
+    """Return a feature value with the distribution seen in projects.json."""
+    roll = rng.random()
+    if roll < 0.30:
+        return "x"
+    if roll < 0.35:
+        return f"wip-{rng.randint(1, 9)}"
+    if roll < 0.38:
+        return rng.randint(0, 10)
+    return str(rng.choice((3, 4, 5, 6, 6, 7, 7, 8, 8, 8, 9, 9, 10)))
+
+
+def synthetic_catalog(projects=17, features=32, seed=0):
+    """
+    Build a projects.json-like dict of synthetic projects.
+
+    The table starts with the logo, badge and license rows of the real
+    data, followed by default score features. Around 10% of the scores are
+    missing and 8% have a matching "*_url" key; every tenth project has a
+    license_custom.
+
+    Args:
+        projects: Number of projects
+        features: Number of features, including the fixed rows
+        seed: Seed of the random generator (the same seed gives the same data)
+
+    Returns:
+        Dict with "projects" and "features", as returned by load_json
+    """
+    rng = random.Random(seed)
+    feature_list = [dict(feature) for feature in _FIXED_FEATURES[:features]]
+    for number in range(len(feature_list), features):
+        name = f"Feature {number}"
+        feature_list.append(
+            {"name": name, "link": f"features.md#{heading_anchor(name)}"}
+        )
+    keys = [
+        feature_key(feature["name"])
+        for feature in feature_list
+        if "processor" not in feature
+    ]
+
+    project_list = []
+    for number in range(projects):
+        project = {
+            "name": f"Project {number}",
+            "repo": f"owner{number}/project-{number}",
+            "branch": rng.choice(("main", "master", "develop")),
+            "logo_url": f"https://example.com/logos/{number}.png",
+            "logo_alt": f"Project {number} Logo",
+        }
+        if number % 10 == 9:
+            project["license_custom"] = rng.choice(("Custom", "GPL-3.0 + CLA"))
+        for key in keys:
+            if rng.random() < 0.10:
+                continue
+            project[key] = _synthetic_value(rng)
+            if rng.random() < 0.08:
+                project[f"{key}_url"] = f"https://example.com/{number}/{key}"
+        project_list.append(project)
+
+    return {"projects": project_list, "features": feature_list}
+
+
+def _features_markdown(data):
+    """Return a features.md with a heading for every feature."""
+    return "".join(f"## {feature['name']}\n\n" for feature in data["features"])
+
+
+def _bench_score_to_emoji(data, directory):
+    values = [value for project in data["projects"] for value in project.values()]
+    return lambda: [score_to_emoji(value) for value in values]
+
+
+def _bench_generate_default_row(data, directory):
+    features = [feature for feature in data["features"] if "processor" not in feature]
+    projects = data["projects"]
+    return lambda: [generate_default_row(feature, projects) for feature in features]
+
+
+def _bench_generate_comparison_table(data, directory):
+    return lambda: generate_comparison_table(data)
+
+
+def _bench_validate_projects_json(data, directory):
+    anchors = {heading_anchor(feature["name"]) for feature in data["features"]}
+    return lambda: validate_projects_json(data, anchors=anchors)
+
+
+def _bench_generate_readme(data, directory):
+    json_file = os.path.join(directory, "projects.json")
+    template_file = os.path.join(directory, "readme.tpl")
+    output_file = os.path.join(directory, "readme.md")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    with open(template_file, "w", encoding="utf-8") as f:
+        f.write("# Comparison\n\n{{COMPARISON_TABLE}}\n")
+    with open(os.path.join(directory, "features.md"), "w", encoding="utf-8") as f:
+        f.write(_features_markdown(data))
+
+    return lambda: generate_readme(template_file, output_file, json_file)
+
+
+# Stage name → setup(data, directory) returning the function to measure
+STAGES = {
+    "score_to_emoji": _bench_score_to_emoji,
+    "generate_default_row": _bench_generate_default_row,
+    "generate_comparison_table": _bench_generate_comparison_table,
+    "validate_projects_json": _bench_validate_projects_json,
+    "generate_readme": _bench_generate_readme,
+}
+
+
+def measure(function, repeat=DEFAULT_REPEAT):
+    """
+    Measure a function's best wall time and its peak traced memory.
+
+    Timing runs are done without tracemalloc, which slows allocation down;
+    memory is measured in one extra run.
+
+    Returns:
+        Dict with "seconds" (best of `repeat` runs) and "peak_bytes"
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages=None, repeat=DEFAULT_REPEAT, seed=0):
+    """
+    Run the benchmark stages on synthetic catalogs.
+
+    Args:
+        sizes: Names of SIZES to run
+        stages: Names of STAGES to run (default: all)
+        repeat: Timing runs per stage
+        seed: Seed of the synthetic catalogs
+
+    Returns:
+        Dict with "meta" (environment and parameters) and "results"
+        mapping "size/stage" → measure() result
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            projects, features = SIZES[size]
+            data = synthetic_catalog(projects, features, seed)
+            for stage in stages or STAGES:
+                function = STAGES[stage](data, directory)
+                results[f"{size}/{stage}"] = measure(function, repeat)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        current: Results of run_benchmarks
+        baseline: Earlier results of run_benchmarks
+        threshold: Allowed relative increase (0.25 = 25% slower or bigger)
+
+    Returns:
+        List of regression messages, empty when nothing regressed
+    """
+    regressions = []
+    previous = baseline.get("results", {})
+    for name, result in current["results"].items():
+        if name not in previous:
+            continue
+        old = previous[name]
+        old_seconds = max(old["seconds"], MIN_SECONDS)
+        new_seconds = max(result["seconds"], MIN_SECONDS)
+        if new_seconds > old_seconds * (1 + threshold):
+            regressions.append(
+                f"{name}: {result['seconds']:.4f}s vs {old['seconds']:.4f}s "
+                f"(+{new_seconds / old_seconds - 1:.0%})"
+            )
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak {result['peak_bytes']:,} B vs {old['peak_bytes']:,} B "
+                f"(+{result['peak_bytes'] / max(old['peak_bytes'], 1) - 1:.0%})"
+            )
+    return regressions
+
+
+def format_results(current, baseline=None):
+    """Return the results as an aligned text table."""
+    previous = (baseline or {}).get("results", {})
+    lines = [f"{'stage':<40} {'seconds':>10} {'peak KiB':>10} {'vs base':>8}"]
+    for name, result in current["results"].items():
+        change = ""
+        if name in previous and previous[name]["seconds"]:
+            change = f"{result['seconds'] / previous[name]['seconds'] - 1:+.0%}"
+        lines.append(
+            f"{name:<40} {result['seconds']:>10.4f} "
+            f"{result['peak_bytes'] / 1024:>10.1f} {change:>8}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--size",
+        action="append",
+        choices=sorted(SIZES),
+        help=f"Catalog size to run; repeatable (default: {', '.join(DEFAULT_SIZES)})",
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=list(STAGES),
+        help="Stage to run; repeatable (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="PATH", help="Compare against saved results"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative regression against the baseline (default: 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the benchmarks; returns 1 when a regression was found."""
+    args = parse_args(argv)
+    current = run_benchmarks(
+        args.size or DEFAULT_SIZES, args.stage, args.repeat, args.seed
+    )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(format_results(current, baseline))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
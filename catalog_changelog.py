@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Report how the catalog changed between revisions of projects.json.
+
+Lists added, removed and renamed projects, changed scores (5 → 8,
+wip-3 → 7) and added, changed or removed *_url links:
+
+    python3 catalog_changelog.py v1.0 v2.0
+    python3 catalog_changelog.py v1.0 --per-commit
+    python3 catalog_changelog.py HEAD~20 HEAD --format json
+
+Every revision is read through a single `git cat-file --batch` process
+instead of a checkout per revision, parsed once (in a process pool for
+long ranges) into an index keyed by project repo and feature key, and
+revisions are diffed through those indexes. With --per-commit every commit
+that changed the file is diffed against its first parent, so commits on
+merged branches report their own changes.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import subprocess
+import sys
+
+from catalog_query import classify_value
+from generate_readme import MISSING_VALUE, STANDARD_KEYS, feature_key
+
+# Ranges with at least this many revisions are parsed in a process pool
+PARALLEL_REVISIONS = 16
+
+# Change types, in the order they are reported for a project
+CHANGE_TYPES = (
+    "project_added",
+    "project_removed",
+    "project_renamed",
+    "score_changed",
+    "url_added",
+    "url_changed",
+    "url_removed",
+)
+
+
+class GitObjectReader:
+    """
+    Read file contents at any revision through one `git cat-file --batch`.
+
+    The git process is started once and kept running, so reading a blob
+    costs a pipe round trip instead of a process start.
+
+    Args:
+        repo_dir: Directory inside the git repository
+    """
+
+    def __init__(self, repo_dir="."):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=repo_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop the git process."""
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        self.process.stdout.close()
+
+    def read(self, revision, path):
+        """
+        Return the bytes of `path` at `revision`, or None if it does not exist.
+
+        `path` is relative to the repository root.
+        """
+        self.process.stdin.write(f"{revision}:{path}\n".encode("utf-8"))
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().decode("utf-8").rstrip("\n")
+        # "<object> missing" or "<object> ambiguous", where <object> holds
+        # the path and may contain spaces
+        if header.rsplit(" ", 1)[-1] in ("missing", "ambiguous"):
+            return None
+        _, kind, size = header.rsplit(" ", 2)
+        content = self.process.stdout.read(int(size))
+        self.process.stdout.read(1)  # newline after the content
+        return content if kind == "blob" else None
+
+
+def _git(repo_dir, *args):
+    """Run a git command and return its standard output as text."""
+    return subprocess.run(
+        ["git", *args], cwd=repo_dir, check=True, capture_output=True, text=True
+    ).stdout
+
+
+# sha, commit date and subject of a commit, NUL separated
+_COMMIT_FORMAT = "--format=%H%x00%cs%x00%s"
+
+
+def commit_info(revision, repo_dir="."):
+    """Return the (sha, date, subject) of a revision."""
+    output = _git(repo_dir, "log", "-1", _COMMIT_FORMAT, revision, "--")
+    return tuple(output.rstrip("\n").split("\0", 2))
+
+
+def first_parents(revisions, repo_dir="."):
+    """Return the sha of the first parent of every revision (None for roots)."""
+    if not revisions:
+        return []
+    output = _git(repo_dir, "rev-list", "--no-walk", "--parents", *revisions, "--")
+    parents = {}
+    for line in output.splitlines():
+        sha, *commit_parents = line.split()
+        parents[sha] = commit_parents[0] if commit_parents else None
+    return [parents[revision] for revision in revisions]
+
+
+def list_revisions(start, end="HEAD", path="projects.json", repo_dir="."):
+    """
+    Return the commits from `start` to `end` that changed `path`.
+
+    Returns:
+        List of (sha, date, subject), oldest first, starting with `start`
+        itself
+    """
+    log = _git(
+        repo_dir, "log", "--reverse", _COMMIT_FORMAT, f"{start}..{end}", "--", path
+    )
+    revisions = [commit_info(start, repo_dir)]
+    revisions.extend(tuple(line.split("\0", 2)) for line in log.splitlines())
+    return revisions
+
+
+def parse_catalog(content):
+    """
+    Index one revision of projects.json.
+
+    Args:
+        content: Bytes of projects.json, or None when it did not exist
+
+    Returns:
+        Dict with "features" (feature key → name, in table order) and
+        "projects" (repo → {"name", "values": {key: value}, "urls":
+        {key: url}}), in file order
+
+    Raises:
+        ValueError: The content is not a JSON catalog
+    """
+    if content is None:
+        return {"features": {}, "projects": {}}
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object with projects and features")
+    features = {
+        feature_key(feature["name"]): feature["name"]
+        for feature in data.get("features", [])
+        if not feature.get("processor")
+    }
+    # Features may end in "_url" too (e.g. "Homepage URL"), see Catalog
+    keys = {feature_key(feature["name"]) for feature in data.get("features", [])}
+    projects = {}
+    for project in data.get("projects", []):
+        values = {}
+        urls = {}
+        for key, value in project.items():
+            if key in STANDARD_KEYS:
+                continue
+            if key.endswith("_url") and key not in keys:
+                urls[key[: -len("_url")]] = value
+            else:
+                values[key] = value
+        projects[project.get("repo") or project.get("name")] = {
+            "name": project.get("name"),
+            "values": values,
+            "urls": urls,
+        }
+    return {"features": features, "projects": projects}
+
+
+def _score_kind(old, new):
+    """Describe a value change: "improved", "regressed", "done", "new" ..."""
+    old_state, old_number = classify_value(old)
+    new_state, new_number = classify_value(new)
+    if old_state == "missing":
+        return "new"
+    if new_state == "missing":
+        return "dropped"
+    if old_state == "wip" and new_state == "score":
+        return "done"
+    if old_state == new_state and None not in (old_number, new_number):
+        if new_number > old_number:
+            return "improved"
+        if new_number < old_number:
+            return "regressed"
+    return "changed"
+
+
+def diff_catalogs(old, new):
+    """
+    Return the changes between two parsed revisions (see parse_catalog).
+
+    Returns:
+        List of change dicts with "type" (one of CHANGE_TYPES), "repo",
+        "project" and, depending on the type, "feature" (the feature key),
+        "old", "new" and "kind" (see _score_kind)
+    """
+    changes = []
+    names = {**old["features"], **new["features"]}
+    for repo, project in new["projects"].items():
+        before = old["projects"].get(repo)
+        base = {"repo": repo, "project": project["name"]}
+        if before is None:
+            changes.append({"type": "project_added", **base})
+            continue
+        if before["name"] != project["name"]:
+            changes.append(
+                {
+                    "type": "project_renamed",
+                    **base,
+                    "old": before["name"],
+                    "new": project["name"],
+                }
+            )
+
+        old_values, new_values = before["values"], project["values"]
+        for key in names:
+            old_value = old_values.get(key)
+            new_value = new_values.get(key)
+            if old_value != new_value:
+                changes.append(
+                    {
+                        "type": "score_changed",
+                        **base,
+                        "feature": key,
+                        "old": old_value,
+                        "new": new_value,
+                        "kind": _score_kind(
+                            MISSING_VALUE if old_value is None else old_value,
+                            MISSING_VALUE if new_value is None else new_value,
+                        ),
+                    }
+                )
+
+        old_urls, new_urls = before["urls"], project["urls"]
+        for key in dict.fromkeys([*old_urls, *new_urls]):
+            old_url, new_url = old_urls.get(key), new_urls.get(key)
+            if old_url == new_url:
+                continue
+            if old_url is None:
+                change = "url_added"
+            elif new_url is None:
+                change = "url_removed"
+            else:
+                change = "url_changed"
+            changes.append(
+                {"type": change, **base, "feature": key, "old": old_url, "new": new_url}
+            )
+
+    for repo, project in old["projects"].items():
+        if repo not in new["projects"]:
+            changes.append(
+                {"type": "project_removed", "repo": repo, "project": project["name"]}
+            )
+    return changes
+
+
+def read_revisions(revisions, path="projects.json", repo_dir=".", jobs=None):
+    """
+    Read and parse projects.json at every revision.
+
+    All blobs are read through one GitObjectReader. With `jobs` workers
+    (default: the CPU count) and at least PARALLEL_REVISIONS revisions the
+    blobs are parsed in a process pool.
+
+    Returns:
+        List of parse_catalog results, aligned with `revisions`
+
+    Raises:
+        ValueError: The file is not a valid catalog at one of the revisions
+    """
+    with GitObjectReader(repo_dir) as reader:
+        blobs = [reader.read(revision, path) for revision in revisions]
+
+    if len(blobs) < PARALLEL_REVISIONS or jobs == 1:
+        return _collect_catalogs(revisions, path, map(parse_catalog, blobs))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(parse_catalog, blobs, chunksize=4)
+        return _collect_catalogs(revisions, path, results)
+
+
+def _collect_catalogs(revisions, path, results):
+    """Return the parsed catalogs, naming the revision that failed to parse."""
+    catalogs = []
+    for revision in revisions:
+        try:
+            catalogs.append(next(results))
+        except ValueError as error:
+            raise ValueError(f"Cannot parse {path} at {revision}: {error}") from None
+    return catalogs
+
+
+def changelog(
+    start, end="HEAD", path="projects.json", repo_dir=".", per_commit=False, jobs=None
+):
+    """
+    Return the changes of projects.json from `start` to `end`.
+
+    Args:
+        start: Revision to compare from
+        end: Revision to compare to
+        path: Path of projects.json relative to the repository root
+        repo_dir: Directory inside the git repository
+        per_commit: Report every commit that changed the file separately,
+            each diffed against its first parent, instead of one overall
+            diff
+        jobs: Worker processes for parsing long ranges
+
+    Returns:
+        List of entries with "from", "to" (revision shas), "date",
+        "subject" (of the "to" commit) and "changes" (see diff_catalogs);
+        entries without changes are left out. "from" is None for a root
+        commit.
+
+    Raises:
+        ValueError: The file is not a valid catalog at one of the revisions
+    """
+    if per_commit:
+        commits = list_revisions(start, end, path, repo_dir)[1:]
+        parents = first_parents([sha for sha, _, _ in commits], repo_dir)
+    else:
+        commits = [commit_info(end, repo_dir)]
+        parents = [commit_info(start, repo_dir)[0]]
+
+    # Each revision is read and parsed once, also when it is both the
+    # parent of one commit and one of the commits
+    shas = [sha for sha, _, _ in commits]
+    revisions = list(dict.fromkeys([*filter(None, parents), *shas]))
+    catalogs = {None: parse_catalog(None)}
+    catalogs.update(zip(revisions, read_revisions(revisions, path, repo_dir, jobs)))
+    entries = []
+    for old_sha, (sha, date, subject) in zip(parents, commits):
+        changes = diff_catalogs(catalogs[old_sha], catalogs[sha])
+        if changes:
+            entries.append(
+                {
+                    "from": old_sha,
+                    "to": sha,
+                    "date": date,
+                    "subject": subject,
+                    "changes": changes,
+                }
+            )
+    return entries
+
+
+def _format_value(value):
+    return "—" if value is None else f"`{value}`"
+
+
+def format_change(change):
+    """Return one change as a markdown list item."""
+    project = f"**{change['project']}**"
+    match change["type"]:
+        case "project_added":
+            return f"- Added {project} ({change['repo']})"
+        case "project_removed":
+            return f"- Removed {project} ({change['repo']})"
+        case "project_renamed":
+            return f"- Renamed **{change['old']}** to {project}"
+        case "score_changed":
+            return (
+                f"- {project} · {change['feature']}: {_format_value(change['old'])} → "
+                f"{_format_value(change['new'])} ({change['kind']})"
+            )
+        case "url_added":
+            return f"- {project} · {change['feature']}: link added <{change['new']}>"
+        case "url_changed":
+            return (
+                f"- {project} · {change['feature']}: link changed to <{change['new']}>"
+            )
+        case _:
+            return f"- {project} · {change['feature']}: link removed"
+
+
+def format_markdown(entries):
+    """Render changelog entries as markdown, one section per entry."""
+    lines = []
+    for entry in entries:
+        lines.append(f"## {entry['to'][:7]} {entry['subject']} ({entry['date']})")
+        lines.append("")
+        order = {change: index for index, change in enumerate(CHANGE_TYPES)}
+        changes = sorted(entry["changes"], key=lambda change: order[change["type"]])
+        lines.extend(format_change(change) for change in changes)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("start", help="Revision to compare from")
+    parser.add_argument(
+        "end", nargs="?", default="HEAD", help="Revision to compare to (default: HEAD)"
+    )
+    parser.add_argument(
+        "--path",
+        default="projects.json",
+        help="Path of projects.json relative to the repository root",
+    )
+    parser.add_argument(
+        "--per-commit",
+        action="store_true",
+        help="Report every commit that changed the file separately",
+    )
+    parser.add_argument("--format", choices=("markdown", "json"), default="markdown")
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="Worker processes for long ranges"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Print the changelog; returns 1 when a revision cannot be resolved or parsed."""
+    args = parse_args(argv)
+    try:
+        entries = changelog(
+            args.start, args.end, args.path, per_commit=args.per_commit, jobs=args.jobs
+        )
+    except subprocess.CalledProcessError as error:
+        print(error.stderr.strip() or error, file=sys.stderr)
+        return 1
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    if args.format == "json":
+        print(json.dumps(entries, indent=2, ensure_ascii=False))
+    elif entries:
+        print(format_markdown(entries), end="")
+    else:
+        print("No changes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
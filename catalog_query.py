@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Query the projects catalog through per-feature indexes.
+
+Answers questions like "which projects have android_app >= 7 and
+object_face_recognition not x" or "top 5 by search" without scanning
+the projects:
+
+    python3 catalog_query.py "android_app>=7" "object_face_recognition!=x"
+    python3 catalog_query.py --top search --limit 5
+    python3 catalog_query.py "web_app>=8" --table
+
+Every feature column of a Catalog is indexed once: a bitset per score
+level and per state (x, wip, missing); top-N queries walk the score
+levels from the highest down. Bitsets are Python ints with one bit per
+project, so conditions combine with & and ~.
+"""
+
+import argparse
+import base64
+import json
+import re
+import sys
+
+from generate_readme import (
+    Catalog,
+    MISSING_VALUE,
+    ScoreColumn,
+    generate_comparison_table,
+    load_json,
+)
+
+# key, operator and value of a condition such as "android_app>=7"
+_CONDITION = re.compile(r"^\s*(\w+)\s*(?:(>=|<=|!=|=|>|<)\s*(\S+))?\s*$")
+
+# Condition values matching a state instead of a score
+STATES = ("x", "wip", "missing", "score", "any")
+
+
+def classify_value(value):
+    """
+    Return the (state, number) of a raw feature value.
+
+    The state is "score" for plain numbers, "wip" for "wip-N", "x" for
+    "x", "missing" for MISSING_VALUE and "other" for anything else; number
+    is the score (or wip level) as an int, or None.
+    """
+    if value is MISSING_VALUE:
+        return "missing", None
+    text = str(value).strip().lower()
+    if text == "x":
+        return "x", None
+    if text.startswith("wip-"):
+        number = text[len("wip-") :]
+        return "wip", int(number) if number.isdigit() else None
+    if text.isdigit():
+        return "score", int(text)
+    return "other", None
+
+
+def _bitset(indexes, count):
+    """Return the int with the bits at `indexes` set, built in one pass."""
+    flags = bytearray((count + 7) // 8)
+    for index in indexes:
+        flags[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(flags, "little")
+
+
+def iter_bits(bits):
+    """Yield the indexes of the set bits of an int, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class FeatureIndex:
+    """
+    Index of one feature column.
+
+    Attributes:
+        states: State (see classify_value) → bitset of projects in it
+        levels: Score → bitset of projects with that score
+    """
+
+    __slots__ = ("states", "levels")
+
+    def __init__(self, column):
+        # Classify each distinct value of the column once
+        classes = [classify_value(value) for value in column.values]
+        classes[0] = ("missing", None)
+
+        # Group the projects by code, then build each bitset once
+        positions = [[] for _ in classes]
+        for index, code in enumerate(column.codes):
+            positions[code].append(index)
+
+        state_positions = {}
+        level_positions = {}
+        for (state, number), indexes in zip(classes, positions):
+            if not indexes:
+                continue
+            state_positions.setdefault(state, []).extend(indexes)
+            if state == "score":
+                level_positions.setdefault(number, []).extend(indexes)
+
+        count = len(column.codes)
+        self.states = {
+            state: _bitset(indexes, count) for state, indexes in state_positions.items()
+        }
+        self.levels = {
+            level: _bitset(indexes, count) for level, indexes in level_positions.items()
+        }
+
+    def state(self, name):
+        """Return the bitset of projects in a state."""
+        return self.states.get(name, 0)
+
+    def compare(self, operator, number):
+        """Return the bitset of projects whose score satisfies `operator number`."""
+        match operator:
+            case "=":
+                return self.levels.get(number, 0)
+            case "!=":
+                return self.state("score") & ~self.levels.get(number, 0)
+            case ">=":
+                wanted = (level for level in self.levels if level >= number)
+            case ">":
+                wanted = (level for level in self.levels if level > number)
+            case "<=":
+                wanted = (level for level in self.levels if level <= number)
+            case "<":
+                wanted = (level for level in self.levels if level < number)
+            case _:
+                raise ValueError(f"Unknown operator '{operator}'")
+        bits = 0
+        for level in wanted:
+            bits |= self.levels[level]
+        return bits
+
+    def iter_ranked(self, bits):
+        """
+        Yield the scored projects of a bitset, highest score first.
+
+        Ties keep the project order. Each score level is
+        intersected with `bits` in one mask operation, so only matching
+        projects are visited.
+        """
+        for level in sorted(self.levels, reverse=True):
+            yield from iter_bits(bits & self.levels[level])
+
+
+class CatalogIndex:
+    """
+    Indexes over every feature column of a catalog, built once.
+
+    Args:
+        data: Dict from load_json or a Catalog
+    """
+
+    def __init__(self, data):
+        catalog = data if isinstance(data, Catalog) else Catalog.from_data(data)
+        self.catalog = catalog
+        self.all = (1 << len(catalog)) - 1
+        self.features = {
+            key: FeatureIndex(column) for key, column in catalog.columns.items()
+        }
+
+    def feature(self, key):
+        """Return the FeatureIndex of a key."""
+        index = self.features.get(key)
+        if index is None:
+            if key not in self.catalog.feature_keys:
+                raise ValueError(f"Unknown feature key '{key}'")
+            # A feature no project has a value for yet
+            column = ScoreColumn()
+            column.pad(len(self.catalog))
+            index = self.features[key] = FeatureIndex(column)
+        return index
+
+    def match(self, condition):
+        """
+        Return the bitset of projects matching one condition.
+
+        Conditions are "key" (has a score), "key OP number" with OP one of
+        = != > >= < <= (compares plain scores only), or "key=STATE" /
+        "key!=STATE" with STATE one of x, wip, missing, score or any
+        (any value at all).
+        """
+        parsed = _CONDITION.match(condition)
+        if parsed is None:
+            raise ValueError(f"Invalid condition '{condition}'")
+        key, operator, value = parsed.groups()
+        index = self.feature(key)
+
+        if operator is None:
+            return index.state("score")
+
+        value = value.lower()
+        if value in STATES:
+            if operator not in ("=", "!="):
+                raise ValueError(f"'{condition}': use = or != with '{value}'")
+            if value == "any":
+                bits = self.all & ~index.state("missing")
+            else:
+                bits = index.state(value)
+            return bits if operator == "=" else self.all & ~bits
+
+        if not value.isdigit():
+            raise ValueError(f"'{condition}': expected a score or one of {STATES}")
+        return index.compare(operator, int(value))
+
+    def query(self, conditions=(), top=None, limit=None):
+        """
+        Return the indexes of the projects matching every condition.
+
+        Args:
+            conditions: Condition strings, combined with AND (see match)
+            top: Feature key to order by, highest score first; projects
+                without a score for it are left out
+            limit: Maximum number of results
+
+        Returns:
+            List of project indexes, in project order unless `top` is given
+        """
+        bits = self.all
+        for condition in conditions:
+            bits &= self.match(condition)
+            if not bits:
+                return []
+
+        if top is None:
+            indexes = iter_bits(bits)
+        else:
+            indexes = self.feature(top).iter_ranked(bits)
+
+        results = []
+        for index in indexes:
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(index)
+        return results
+
+    def value(self, index, key):
+        """Return the raw value of a project for a feature key."""
+        column = self.catalog.columns.get(key)
+        return column.value(index) if column else MISSING_VALUE
+
+    def table(self, indexes):
+        """Render the comparison table restricted to the given projects."""
+        return generate_comparison_table(self.catalog.select(indexes))
+
+
+# Version of the filter index format written by filter_index_payload
+FILTER_INDEX_VERSION = 1
+
+# Score byte of projects without a plain score in the filter index
+_NO_SCORE = 255
+
+
+def _bitset_bytes(bits, count):
+    """Encode a bitset as little-endian bytes: project i is bit i % 8 of byte i // 8."""
+    return bits.to_bytes((count + 7) // 8, "little")
+
+
+def filter_index_payload(index):
+    """
+    Return the compact filter index of a CatalogIndex as a JSON-ready dict.
+
+    Every default (score) feature, in table order, gets a score vector
+    (one byte per project, 255 when the project has no plain score) and a
+    bitset per state: "yes" (✅, a plain score), "wip" (🚧), "no" (❌, "x")
+    and "missing". Vectors and bitsets are base64 encoded and keyed by
+    project order, i.e. by table column.
+    """
+    catalog = index.catalog
+    count = len(catalog)
+    features = []
+    for feature, key in zip(catalog.features, catalog.feature_keys):
+        if feature.get("processor"):
+            continue
+        feature_index = index.feature(key)
+        scores = bytearray([_NO_SCORE]) * count
+        for level, bits in feature_index.levels.items():
+            for project in iter_bits(bits):
+                scores[project] = min(level, _NO_SCORE - 1)
+        entry = {"key": key, "name": feature["name"]}
+        entry["scores"] = base64.b64encode(scores).decode("ascii")
+        for name, state in (
+            ("yes", "score"),
+            ("wip", "wip"),
+            ("no", "x"),
+            ("missing", "missing"),
+        ):
+            bits = _bitset_bytes(feature_index.state(state), count)
+            entry[name] = base64.b64encode(bits).decode("ascii")
+        features.append(entry)
+
+    return {
+        "version": FILTER_INDEX_VERSION,
+        "count": count,
+        "projects": [project["name"] for project in catalog.projects],
+        "features": features,
+    }
+
+
+def write_filter_index(data, output_file):
+    """Write the filter index of a dict or Catalog to output_file as JSON."""
+    payload = filter_index_payload(CatalogIndex(data))
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+
+
+def _condition_keys(conditions, top):
+    keys = []
+    for condition in conditions:
+        parsed = _CONDITION.match(condition)
+        if parsed and parsed[1] not in keys:
+            keys.append(parsed[1])
+    if top and top not in keys:
+        keys.append(top)
+    return keys
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "conditions",
+        nargs="*",
+        metavar="CONDITION",
+        help='Conditions such as "android_app>=7" or "search!=x", combined with AND',
+    )
+    parser.add_argument("--json", default="projects.json", help="Projects JSON file")
+    parser.add_argument("--top", metavar="KEY", help="Order by this feature's score")
+    parser.add_argument("--limit", type=int, help="Maximum number of projects")
+    parser.add_argument(
+        "--table",
+        action="store_true",
+        help="Print the comparison table of the matching projects",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a query; returns 1 when the query is invalid."""
+    args = parse_args(argv)
+    index = CatalogIndex(load_json(args.json, columnar=True))
+    try:
+        results = index.query(args.conditions, args.top, args.limit)
+    except ValueError as error:
+        print(f"Invalid query: {error}")
+        return 1
+
+    if args.table:
+        print(index.table(results), end="")
+        return 0
+
+    keys = _condition_keys(args.conditions, args.top)
+    for result in results:
+        name = index.catalog.projects[result]["name"]
+        values = ", ".join(f"{key}={index.value(result, key)}" for key in keys)
+        print(f"{name}: {values}" if values else name)
+    print(f"{len(results)} project(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Weighted ranking and score statistics of the catalog.
+
+Builds a features × projects matrix of the score features and maps every
+value to a number: plain scores as they are, "wip-N" to N times the wip
+factor and "x" to the x value, while missing values are left out. From it:
+
+- a weighted total per project, weighted by the "weight" of each feature
+  in projects.json (default 1) or by --weight on the command line
+- per-feature statistics: ✅/🚧/❌/missing counts and the mean value
+
+    python3 catalog_ranking.py
+    python3 catalog_ranking.py --weight web_app=2 --wip-factor 0.25 --top 10
+    python3 catalog_ranking.py --format json
+
+NumPy is used when installed (`pip install numpy`); without it the same
+results are computed in plain Python. generate_readme.py orders the table
+columns by rank with --rank and renders {{PROJECT_RANKING}} and
+{{SCORE_STATISTICS}} template placeholders from this module.
+"""
+
+import argparse
+import json
+import sys
+
+from catalog_query import classify_value
+from generate_readme import (
+    MISSING_VALUE,
+    Catalog,
+    ScoreColumn,
+    _table_parts,
+    feature_key,
+    feature_label,
+    iter_project_values,
+    load_json,
+    project_link,
+)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+# Number a "x" value counts as
+DEFAULT_X_VALUE = 0.0
+
+# "wip-N" counts as N times this
+DEFAULT_WIP_FACTOR = 0.5
+
+# State of a matrix cell
+MISSING, DONE, WIP, CROSSED = range(4)
+
+_STATES = {"score": DONE, "wip": WIP, "x": CROSSED}
+
+
+def _score_column(data, key, count):
+    """Return the ScoreColumn of a feature key for any kind of data."""
+    if isinstance(data, Catalog):
+        column = data.columns.get(key)
+        if column is not None:
+            return column
+        values = ()
+    else:
+        values = iter_project_values(data, key, MISSING_VALUE)
+    column = ScoreColumn()
+    for index, value in enumerate(values):
+        if value is not MISSING_VALUE:
+            column.set(index, value)
+    column.pad(count)
+    return column
+
+
+class ScoreMatrix:
+    """
+    Score states and numbers of every score feature and project.
+
+    Each distinct value of a column is classified once and the cells are
+    looked up through the column codes (as NumPy arrays when available).
+
+    Attributes:
+        keys: Feature key of each matrix row, in table order
+        names: Feature name of each row
+        links: Feature link of each row, or None
+        weights: Default weight of each row ("weight" of the feature, or 1)
+        project_count: Number of matrix columns
+        states: Per row, the state (MISSING, DONE, WIP or CROSSED) of every
+            project
+        numbers: Per row, the score or wip level of every project (0 when
+            there is none)
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+    """
+
+    def __init__(self, data):
+        projects, features, _ = _table_parts(data)
+        self.project_count = len(projects) if isinstance(data, dict) else len(data)
+        self.keys = []
+        self.names = []
+        self.links = []
+        self.weights = []
+        for feature in features:
+            if feature.get("processor"):
+                continue
+            self.keys.append(feature_key(feature["name"]))
+            self.names.append(feature["name"])
+            self.links.append(feature.get("link"))
+            self.weights.append(float(feature.get("weight", 1)))
+
+        states = []
+        numbers = []
+        for key in self.keys:
+            column = _score_column(data, key, self.project_count)
+            state_table = []
+            number_table = []
+            for value in column.values:
+                state, number = classify_value(value)
+                state_table.append(_STATES.get(state, MISSING))
+                number_table.append(number or 0)
+            if numpy is not None:
+                codes = numpy.frombuffer(column.codes, dtype=column.codes.typecode)
+                states.append(numpy.array(state_table, dtype=numpy.int8)[codes])
+                numbers.append(numpy.array(number_table, dtype=numpy.float64)[codes])
+            else:
+                states.append([state_table[code] for code in column.codes])
+                numbers.append([number_table[code] for code in column.codes])
+
+        if numpy is not None:
+            shape = (len(self.keys), self.project_count)
+            self.states = numpy.array(states, dtype=numpy.int8).reshape(shape)
+            self.numbers = numpy.array(numbers, dtype=numpy.float64).reshape(shape)
+        else:
+            self.states = states
+            self.numbers = numbers
+
+    def feature_weights(self, weights=None):
+        """
+        Return the weight of every row.
+
+        Args:
+            weights: Feature key → weight overriding the defaults
+
+        Raises:
+            ValueError: If `weights` names a key that is not a score feature
+        """
+        weights = weights or {}
+        unknown = set(weights) - set(self.keys)
+        if unknown:
+            raise ValueError(f"Unknown feature key(s): {', '.join(sorted(unknown))}")
+        return [
+            float(weights.get(key, default))
+            for key, default in zip(self.keys, self.weights)
+        ]
+
+    def values(self, x_value=DEFAULT_X_VALUE, wip_factor=DEFAULT_WIP_FACTOR):
+        """
+        Return the number of every cell.
+
+        Returns:
+            Per row, the value of every project: NaN (NumPy) or None (plain
+            Python) where the value is missing
+        """
+        if numpy is not None:
+            states = self.states
+            return numpy.select(
+                [states == DONE, states == WIP, states == CROSSED],
+                [self.numbers, self.numbers * wip_factor, x_value],
+                numpy.nan,
+            )
+        values = []
+        for state_row, number_row in zip(self.states, self.numbers):
+            row = []
+            for state, number in zip(state_row, number_row):
+                if state == DONE:
+                    row.append(float(number))
+                elif state == WIP:
+                    row.append(number * wip_factor)
+                elif state == CROSSED:
+                    row.append(x_value)
+                else:
+                    row.append(None)
+            values.append(row)
+        return values
+
+    def totals(
+        self, weights=None, x_value=DEFAULT_X_VALUE, wip_factor=DEFAULT_WIP_FACTOR
+    ):
+        """Return the weighted total of every project (missing values count 0)."""
+        row_weights = self.feature_weights(weights)
+        values = self.values(x_value, wip_factor)
+        if numpy is not None:
+            totals = numpy.array(row_weights) @ numpy.nan_to_num(values, nan=0.0)
+            return totals.tolist()
+        totals = [0.0] * self.project_count
+        for weight, row in zip(row_weights, values):
+            for index, value in enumerate(row):
+                if value is not None:
+                    totals[index] += weight * value
+        return totals
+
+    def statistics(self, x_value=DEFAULT_X_VALUE, wip_factor=DEFAULT_WIP_FACTOR):
+        """
+        Return the coverage of every score feature.
+
+        Returns:
+            List of dicts with "key", "name", "done", "wip", "x", "missing"
+            (project counts; values that are no score, wip or x count as
+            missing) and "mean" (mean value of the projects that have one,
+            or None)
+        """
+        values = self.values(x_value, wip_factor)
+        if numpy is not None:
+            states = self.states
+            present = states != MISSING
+            counts = [
+                (states == state).sum(axis=1).tolist() for state in _STATES.values()
+            ]
+            sums = numpy.where(present, values, 0.0).sum(axis=1).tolist()
+            present_counts = present.sum(axis=1).tolist()
+        else:
+            counts = [
+                [row.count(state) for row in self.states] for state in _STATES.values()
+            ]
+            sums = [sum(value for value in row if value is not None) for row in values]
+            present_counts = [
+                self.project_count - row.count(MISSING) for row in self.states
+            ]
+
+        statistics = []
+        for row, key in enumerate(self.keys):
+            done, wip, crossed = (count[row] for count in counts)
+            present = present_counts[row]
+            statistics.append(
+                {
+                    "key": key,
+                    "name": self.names[row],
+                    "done": done,
+                    "wip": wip,
+                    "x": crossed,
+                    "missing": self.project_count - present,
+                    "mean": sums[row] / present if present else None,
+                }
+            )
+        return statistics
+
+
+def rank_order(
+    data, weights=None, x_value=DEFAULT_X_VALUE, wip_factor=DEFAULT_WIP_FACTOR
+):
+    """
+    Return the project indexes from the highest weighted total to the lowest.
+
+    Projects with equal totals keep their order in projects.json.
+    """
+    return _descending(ScoreMatrix(data).totals(weights, x_value, wip_factor))
+
+
+def _descending(totals):
+    """Return the indexes of totals from the highest to the lowest, stably."""
+    if numpy is not None:
+        return numpy.argsort(-numpy.array(totals), kind="stable").tolist()
+    return sorted(range(len(totals)), key=lambda index: -totals[index])
+
+
+def order_by_rank(data, **options):
+    """
+    Return data with its projects ordered by rank (see rank_order).
+
+    Args:
+        data: Dict from load_json or a Catalog
+        options: weights, x_value and wip_factor for rank_order
+    """
+    order = rank_order(data, **options)
+    if isinstance(data, Catalog):
+        return data.select(order)
+    projects = data["projects"]
+    return {**data, "projects": [projects[index] for index in order]}
+
+
+def ranking(data, top=None, **options):
+    """
+    Return the ranked projects.
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+        top: Only return the first `top` projects
+        options: weights, x_value and wip_factor for ScoreMatrix.totals
+
+    Returns:
+        List of (rank, project dict, total); equal totals share a rank
+    """
+    projects = _table_parts(data)[0]
+    totals = ScoreMatrix(data).totals(**options)
+    order = _descending(totals)
+    ranked = []
+    rank = 0
+    for position, index in enumerate(order[:top]):
+        if position == 0 or totals[index] != totals[order[position - 1]]:
+            rank = position + 1
+        ranked.append((rank, projects[index], totals[index]))
+    return ranked
+
+
+def _format_number(number):
+    return "-" if number is None else f"{round(number, 2):g}"
+
+
+def iter_ranking_table(ranked):
+    """Yield the lines of a markdown table of ranked projects (see ranking)."""
+    yield "| Rank | Project | Score |\n| ---: | :------ | ----: |\n"
+    for rank, project, total in ranked:
+        yield f"| {rank} | {project_link(project)} | {_format_number(total)} |\n"
+
+
+def iter_statistics_table(data, **options):
+    """Yield the lines of a markdown table of ScoreMatrix.statistics."""
+    matrix = ScoreMatrix(data)
+    yield (
+        "| Feature | ✅ | 🚧 | ❌ | Missing | Mean |\n"
+        "| :------ | -: | -: | -: | ------: | ---: |\n"
+    )
+    for link, row in zip(matrix.links, matrix.statistics(**options)):
+        yield (
+            f"| {feature_label(row['name'], link)} | {row['done']} | {row['wip']} "
+            f"| {row['x']} | {row['missing']} | {_format_number(row['mean'])} |\n"
+        )
+
+
+def parse_weight(text):
+    """Parse a KEY=WEIGHT command line argument."""
+    key, separator, weight = text.partition("=")
+    try:
+        if not separator:
+            raise ValueError
+        return key.strip(), float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected KEY=WEIGHT, got '{text}'")
+
+
+def add_scale_arguments(parser):
+    """Add the --weight, --x-value and --wip-factor options to a parser."""
+    parser.add_argument(
+        "--weight",
+        action="append",
+        type=parse_weight,
+        default=[],
+        metavar="KEY=WEIGHT",
+        help='Weight of a feature in the ranking (default: its "weight" in '
+        "projects.json, or 1); repeatable",
+    )
+    parser.add_argument(
+        "--x-value",
+        type=float,
+        default=DEFAULT_X_VALUE,
+        help=f'Number an "x" counts as (default: {DEFAULT_X_VALUE:g})',
+    )
+    parser.add_argument(
+        "--wip-factor",
+        type=float,
+        default=DEFAULT_WIP_FACTOR,
+        help=f'"wip-N" counts as N times this (default: {DEFAULT_WIP_FACTOR:g})',
+    )
+
+
+def scale_options(args):
+    """Return the ranking options of arguments added by add_scale_arguments."""
+    return {
+        "weights": dict(args.weight),
+        "x_value": args.x_value,
+        "wip_factor": args.wip_factor,
+    }
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", default="projects.json", help="Projects JSON file")
+    parser.add_argument(
+        "--top", type=int, default=None, help="Only list the N best ranked projects"
+    )
+    parser.add_argument("--format", choices=("markdown", "json"), default="markdown")
+    add_scale_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Print the ranking and statistics report; returns 2 for unknown weights."""
+    args = parse_args(argv)
+    data = load_json(args.json, columnar=True)
+    options = scale_options(args)
+    try:
+        ranked = ranking(data, args.top, **options)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    options.pop("weights")
+
+    if args.format == "json":
+        report = {
+            "ranking": [
+                {"rank": rank, "name": project["name"], "total": total}
+                for rank, project, total in ranked
+            ],
+            "features": ScoreMatrix(data).statistics(**options),
+        }
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    sys.stdout.writelines(iter_ranking_table(ranked))
+    print()
+    sys.stdout.writelines(iter_statistics_table(data, **options))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
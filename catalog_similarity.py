@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Closest alternatives of every project and clusters of similar projects.
+
+Every project is a vector of its score feature values (see
+catalog_ranking.ScoreMatrix: scores as they are, "wip-N" and "x" mapped
+to numbers). Two projects are compared on the features both have a value
+for, with one of two metrics:
+
+- "cosine": weighted cosine similarity of the shared values
+- "distance": 1 / (1 + d), where d is the weighted root mean square
+  difference of the shared values
+
+    python3 catalog_similarity.py
+    python3 catalog_similarity.py --project Immich -k 5
+    python3 catalog_similarity.py --clusters --threshold 0.95
+    python3 catalog_similarity.py --metric distance --format json
+
+Indexes are cached by catalog hash, so the vectors are only built once
+per catalog. The whole similarity matrix is only computed on request and
+for at most FULL_MATRIX_LIMIT projects; the closest alternatives are
+computed a block of rows at a time, keeping the k best matches of each
+row, so the N×N matrix is never held. NumPy is used when installed.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import sys
+
+from catalog_ranking import (
+    DEFAULT_WIP_FACTOR,
+    DEFAULT_X_VALUE,
+    ScoreMatrix,
+    _score_column,
+    add_scale_arguments,
+    scale_options,
+)
+from generate_readme import (
+    SpooledCatalog,
+    _digest,
+    _table_parts,
+    feature_key,
+    load_json,
+    project_link,
+)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+METRICS = ("cosine", "distance")
+
+# Largest catalog SimilarityIndex.matrix computes
+FULL_MATRIX_LIMIT = 2000
+
+# Similarities computed at once by SimilarityIndex.nearest (rows × projects)
+BLOCK_CELLS = 1 << 20
+
+# Similarity indexes by catalog hash, see similarity_index
+_indexes = {}
+_INDEXES_MAX = 8
+
+
+class SimilarityIndex:
+    """
+    Feature vectors of a catalog, prepared for pairwise similarity.
+
+    Missing values are masked: a pair of projects is only compared on the
+    features both have a value for, and pairs without any shared feature
+    have similarity 0.
+
+    Args:
+        matrix: ScoreMatrix of the catalog
+        metric: One of METRICS
+        weights: Feature key → weight (see ScoreMatrix.feature_weights)
+        x_value: Number an "x" counts as
+        wip_factor: "wip-N" counts as N times this
+    """
+
+    def __init__(
+        self,
+        matrix,
+        metric="cosine",
+        weights=None,
+        x_value=DEFAULT_X_VALUE,
+        wip_factor=DEFAULT_WIP_FACTOR,
+    ):
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}"
+            )
+        self.metric = metric
+        self.size = matrix.project_count
+        feature_weights = matrix.feature_weights(weights)
+        values = matrix.values(x_value, wip_factor)
+        if numpy is not None:
+            present = ~numpy.isnan(values)
+            self._weights = numpy.array(feature_weights, dtype=numpy.float64)
+            # projects × features, 0 where the value is missing
+            self._values = numpy.nan_to_num(values, nan=0.0).T.copy()
+            self._mask = present.T.astype(numpy.float64)
+            # Right-hand operands of the block products, features × projects
+            self._mask_columns = present.astype(numpy.float64)
+            self._weighted_columns = (self._values * self._weights).T.copy()
+            self._square_columns = self._values.T * self._weighted_columns
+        else:
+            self._weights = feature_weights
+            # Per project, feature index → value of the features it has
+            self._vectors = [{} for _ in range(self.size)]
+            for feature, row in enumerate(values):
+                for project, value in enumerate(row):
+                    if value is not None:
+                        self._vectors[project][feature] = value
+        self._matrix = None
+        self._nearest = {}
+
+    def _pair(self, first, second):
+        """Return the similarity of two projects (plain Python)."""
+        a = self._vectors[first]
+        b = self._vectors[second]
+        shared = [feature for feature in a if feature in b]
+        weights = self._weights
+        if self.metric == "cosine":
+            dot = sum(weights[f] * a[f] * b[f] for f in shared)
+            norms = sum(weights[f] * a[f] * a[f] for f in shared) * sum(
+                weights[f] * b[f] * b[f] for f in shared
+            )
+            return dot / math.sqrt(norms) if norms > 0 else 0.0
+        total = sum(weights[f] for f in shared)
+        if total <= 0:
+            return 0.0
+        squares = sum(weights[f] * (a[f] - b[f]) ** 2 for f in shared)
+        return 1 / (1 + math.sqrt(squares / total))
+
+    def block(self, start, stop):
+        """
+        Return the similarities of the projects in [start, stop) to every project.
+
+        Returns:
+            (stop - start) × size NumPy array, or list of lists without NumPy
+        """
+        if numpy is None:
+            return [
+                [self._pair(row, column) for column in range(self.size)]
+                for row in range(start, stop)
+            ]
+
+        # Operations are done in place: blocks are large and short-lived
+        values = self._values[start:stop]
+        mask = self._mask[start:stop]
+        dot = values @ self._weighted_columns
+        # Σ w·a² over the features the other project has, and vice versa
+        own = (values * values * self._weights) @ self._mask_columns
+        other = mask @ self._square_columns
+        if self.metric == "cosine":
+            norms = numpy.multiply(own, other, out=own)
+            numpy.sqrt(norms, out=norms)
+            # Pairs without shared (non-zero) values get 0
+            norms[norms == 0] = numpy.inf
+            return numpy.divide(dot, norms, out=dot)
+
+        shared = (mask * self._weights) @ self._mask_columns
+        squares = numpy.add(own, other, out=own)
+        squares -= 2 * dot
+        numpy.maximum(squares, 0.0, out=squares)
+        unshared = shared == 0
+        shared[unshared] = 1.0
+        squares /= shared
+        numpy.sqrt(squares, out=squares)
+        squares += 1.0
+        similarities = numpy.reciprocal(squares, out=squares)
+        similarities[unshared] = 0.0
+        return similarities
+
+    def matrix(self):
+        """
+        Return the full similarity matrix, computed once.
+
+        Raises:
+            ValueError: If the catalog has more than FULL_MATRIX_LIMIT projects
+        """
+        if self.size > FULL_MATRIX_LIMIT:
+            raise ValueError(
+                f"{self.size} projects is over the full matrix limit of "
+                f"{FULL_MATRIX_LIMIT}; use nearest()"
+            )
+        if self._matrix is None:
+            self._matrix = self.block(0, self.size)
+        return self._matrix
+
+    def _iter_blocks(self):
+        """Yield (start, similarities) of consecutive blocks of rows."""
+        if self._matrix is not None:
+            # _top_k masks the diagonal of NumPy blocks in place
+            yield 0, self._matrix if numpy is None else self._matrix.copy()
+            return
+        rows = max(1, BLOCK_CELLS // max(self.size, 1))
+        for start in range(0, self.size, rows):
+            yield start, self.block(start, min(start + rows, self.size))
+
+    def nearest(self, k=3):
+        """
+        Return the k most similar other projects of every project.
+
+        Returns:
+            List, per project, of (project index, similarity) pairs from
+            the most similar down; equal similarities in catalog order
+        """
+        k = min(k, self.size - 1)
+        if k in self._nearest:
+            return self._nearest[k]
+        nearest = []
+        if k > 0:
+            for start, similarities in self._iter_blocks():
+                nearest.extend(_top_k(similarities, start, k))
+        else:
+            nearest = [[] for _ in range(self.size)]
+        self._nearest[k] = nearest
+        return nearest
+
+
+def _top_k(similarities, start, k):
+    """
+    Return the k best (index, similarity) of every row of a block.
+
+    Row r of the block holds the similarities of project start + r, which
+    is skipped (NumPy blocks are modified). Equal similarities resolve to
+    catalog order.
+    """
+    if numpy is None:
+        nearest = []
+        for own, row in enumerate(similarities, start):
+            candidates = (
+                (similarity, -index)
+                for index, similarity in enumerate(row)
+                if index != own
+            )
+            nearest.append(
+                [
+                    (-index, similarity)
+                    for similarity, index in heapq.nlargest(k, candidates)
+                ]
+            )
+        return nearest
+
+    block = similarities
+    rows = numpy.arange(len(block))
+    block[rows, start + rows] = -numpy.inf
+    kth = block.shape[1] - k
+    best = numpy.argpartition(block, kth, axis=1)[:, kth:]
+    values = numpy.take_along_axis(block, best, axis=1)
+    order = numpy.lexsort((best, -values), axis=-1)
+    best = numpy.take_along_axis(best, order, axis=1)
+    values = numpy.take_along_axis(values, order, axis=1)
+    nearest = [list(zip(*pair)) for pair in zip(best.tolist(), values.tolist())]
+
+    # Rows with ties at the k-th best may have kept a later project
+    cutoff = values[:, -1:]
+    for row in numpy.flatnonzero((block >= cutoff).sum(axis=1) > k).tolist():
+        candidates = numpy.flatnonzero(block[row] >= cutoff[row])
+        candidates = candidates[numpy.lexsort((candidates, -block[row, candidates]))]
+        nearest[row] = [
+            (index, float(block[row, index])) for index in candidates[:k].tolist()
+        ]
+    return nearest
+
+
+def _catalog_digest(data):
+    """
+    Return a hash of the score features and values of a catalog.
+
+    Only the raw columns are hashed, so a cache hit skips classifying the
+    values into a ScoreMatrix. A dict and the Catalog built from it hash
+    the same; a SpooledCatalog hashes its spooled column files.
+    """
+    projects, features, _ = _table_parts(data)
+    count = len(projects) if isinstance(data, dict) else len(data)
+    columns = []
+    for feature in features:
+        if feature.get("processor"):
+            continue
+        key = feature_key(feature["name"])
+        if isinstance(data, SpooledCatalog):
+            columns.append(data.column_digest(key))
+        else:
+            column = _score_column(data, key, count)
+            # values[0] is the MISSING_VALUE sentinel
+            codes = column.codes
+            columns.append(_digest(column.values[1:], codes.typecode, codes.tobytes()))
+    return _digest(features, count, columns)
+
+
+def similarity_index(data, metric="cosine", **options):
+    """
+    Return the SimilarityIndex of data, cached by a hash of the catalog.
+
+    The ScoreMatrix is only built when the index is not cached yet.
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+        metric: One of METRICS
+        options: weights, x_value and wip_factor for SimilarityIndex
+    """
+    digest = _digest(metric, options, _catalog_digest(data))
+    index = _indexes.get(digest)
+    if index is None:
+        if len(_indexes) >= _INDEXES_MAX:
+            _indexes.clear()
+        matrix = ScoreMatrix(data)
+        index = _indexes[digest] = SimilarityIndex(matrix, metric, **options)
+    return index
+
+
+def closest_alternatives(data, k=3, metric="cosine", **options):
+    """Return SimilarityIndex.nearest of data (see similarity_index)."""
+    return similarity_index(data, metric, **options).nearest(k)
+
+
+def cluster_projects(data, threshold=0.9, k=5, metric="cosine", **options):
+    """
+    Group projects whose capability profiles are alike.
+
+    Projects are linked to those of their k closest alternatives at least
+    `threshold` similar, and every connected group is a cluster (single
+    linkage), so no more than k similarities per project are kept.
+
+    Returns:
+        Lists of project indexes, largest cluster first; projects without
+        a similar enough alternative form clusters of one
+    """
+    nearest = closest_alternatives(data, k, metric, **options)
+    parents = list(range(len(nearest)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for index, alternatives in enumerate(nearest):
+        for other, similarity in alternatives:
+            if similarity >= threshold:
+                first, second = find(index), find(other)
+                if first != second:
+                    parents[max(first, second)] = min(first, second)
+
+    clusters = {}
+    for index in range(len(nearest)):
+        clusters.setdefault(find(index), []).append(index)
+    return sorted(clusters.values(), key=lambda cluster: (-len(cluster), cluster[0]))
+
+
+def iter_alternatives_table(projects, nearest, selected=None):
+    """
+    Yield the lines of a markdown table of closest alternatives.
+
+    Args:
+        projects: Project dicts of the catalog
+        nearest: Result of closest_alternatives
+        selected: Indexes of the projects to list (default: all)
+    """
+    yield "| Project | Closest alternatives |\n| :------ | :------------------- |\n"
+    for index in range(len(projects)) if selected is None else selected:
+        cells = ", ".join(
+            f"{project_link(projects[other])} ({similarity:.2f})"
+            for other, similarity in nearest[index]
+        )
+        yield f"| {project_link(projects[index])} | {cells or '-'} |\n"
+
+
+def _find_project(projects, name):
+    """Return the index of the project with this name or repo, or None."""
+    for index, project in enumerate(projects):
+        if name in (project.get("name"), project.get("repo")):
+            return index
+    return None
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", default="projects.json", help="Projects JSON file")
+    parser.add_argument(
+        "-k", type=int, default=3, help="Alternatives listed per project (default: 3)"
+    )
+    parser.add_argument("--metric", choices=METRICS, default="cosine")
+    parser.add_argument(
+        "--project", metavar="NAME", help="Only list the alternatives of this project"
+    )
+    parser.add_argument(
+        "--clusters",
+        action="store_true",
+        help="List clusters of similar projects instead of alternatives",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.9,
+        help="Similarity linking projects into a cluster (default: 0.9)",
+    )
+    parser.add_argument("--format", choices=("markdown", "json"), default="markdown")
+    add_scale_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Print alternatives or clusters; returns 2 for unknown projects or weights."""
+    args = parse_args(argv)
+    data = load_json(args.json, columnar=True)
+    projects = _table_parts(data)[0]
+    options = {"metric": args.metric, **scale_options(args)}
+
+    try:
+        if args.clusters:
+            clusters = cluster_projects(data, args.threshold, args.k, **options)
+        else:
+            nearest = closest_alternatives(data, args.k, **options)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    if args.clusters:
+        if args.format == "json":
+            names = [[projects[i]["name"] for i in cluster] for cluster in clusters]
+            print(json.dumps(names, indent=2, ensure_ascii=False))
+            return 0
+        alone = 0
+        for number, cluster in enumerate(clusters, 1):
+            if len(cluster) == 1:
+                alone += 1
+                continue
+            links = ", ".join(project_link(projects[index]) for index in cluster)
+            print(f"{number}. {links}")
+        print(f"\n{alone} project(s) without a similar project")
+        return 0
+
+    selected = None
+    if args.project:
+        index = _find_project(projects, args.project)
+        if index is None:
+            print(f"Unknown project '{args.project}'", file=sys.stderr)
+            return 2
+        selected = [index]
+
+    if args.format == "json":
+        report = {
+            projects[index]["name"]: [
+                {"name": projects[other]["name"], "similarity": similarity}
+                for other, similarity in nearest[index]
+            ]
+            for index in (range(len(projects)) if selected is None else selected)
+        }
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    sys.stdout.writelines(iter_alternatives_table(projects, nearest, selected))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Compile projects.json into a binary catalog snapshot.
+
+Loading projects.json means parsing all of it and validating it again on
+every run, even when it has not changed. A snapshot stores the columns of
+a validated Catalog in a flat file that is memory-mapped instead:
+
+    python3 catalog_snapshot.py --snapshot .catalog.snapshot
+    python3 generate_readme.py --snapshot .catalog.snapshot
+
+Every project key is a column of fixed-width codes (1, 2 or 4 bytes per
+project, 0 when the project lacks the key) into a list of interned values;
+values are stored once in a shared string table as JSON text. An offset
+table locates every column, so readers get the codes of a column as a
+memoryview without parsing anything. Snapshots are keyed by the SHA-256 of
+projects.json, of the features.md anchors it was validated against and of
+the code that loaded and validated it: when any of them changed, or the
+snapshot cannot be read, the JSON is loaded, validated and the snapshot
+rewritten.
+
+The score matrix can also be exported as a NumPy .npy file with --npy.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from catalog_query import classify_value
+from generate_readme import (
+    STANDARD_KEYS,
+    AtomicWriter,
+    Catalog,
+    ScoreColumn,
+    _digest,
+    _feature_anchors_for,
+    _renderer_digest,
+    load_json,
+    validate_projects_json,
+)
+
+MAGIC = b"CATSNAP\0"
+
+# Bump when the layout changes; snapshots of other versions are rebuilt
+VERSION = 2
+
+# magic, version, project count, column count, string count,
+# source digest, anchors digest, validator digest, string offsets,
+# string data, column directory, features JSON offset and length
+_HEADER = struct.Struct("<8sIIII32s32s32sQQQQQ")
+
+# name string, code width, value count, value ids offset, codes offset
+_COLUMN = struct.Struct("<IB3xIQQ")
+
+# Array typecodes of 1, 2 and 4 byte codes
+_CODE_TYPECODES = {1: "B", 2: "H", 4: "I"}
+
+# Score of projects without a plain score in the .npy score matrix
+NO_SCORE = -1
+
+
+def source_digest(json_file):
+    """Return the SHA-256 digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(json_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def anchors_digest(anchors):
+    """Return the digest of the features.md anchors data was validated against."""
+    return bytes.fromhex(_digest(sorted(anchors) if anchors is not None else None))
+
+
+def validator_digest():
+    """
+    Return the digest of the code that loads and validates projects.json.
+
+    Loading and validation live in generate_readme, so this is the digest
+    of that module's code (see generate_readme._renderer_digest).
+    """
+    return bytes.fromhex(_renderer_digest())
+
+
+def _snapshot_columns(catalog):
+    """Yield (key, ScoreColumn) for every project key of a Catalog."""
+    standard = {}
+    for index, project in enumerate(catalog.projects):
+        for key, value in project.items():
+            column = standard.get(key)
+            if column is None:
+                column = standard[key] = ScoreColumn()
+            column.set(index, value)
+    for key in sorted(standard):
+        yield key, standard[key]
+
+    yield from catalog.columns.items()
+
+    for key, urls in catalog.urls.items():
+        column = ScoreColumn()
+        for index in sorted(urls):
+            column.set(index, urls[index])
+        yield key, column
+
+
+def _align(f, alignment=8):
+    """Pad the file with zeros to a multiple of `alignment`."""
+    padding = -f.tell() % alignment
+    f.write(bytes(padding))
+
+
+def write_snapshot(data, output_file, source, anchors=b""):
+    """
+    Write a snapshot of data to output_file.
+
+    Args:
+        data: Dict from load_json or a Catalog
+        output_file: Path of the snapshot
+        source: Digest of the JSON file data was loaded from (source_digest)
+        anchors: Digest of the anchors data was validated against
+    """
+    catalog = data if isinstance(data, Catalog) else Catalog.from_data(data)
+    count = len(catalog)
+
+    strings = {}
+
+    def intern(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    columns = []
+    for key, column in _snapshot_columns(catalog):
+        column.pad(count)
+        value_ids = [
+            intern(json.dumps(value, ensure_ascii=False)) for value in column.values[1:]
+        ]
+        columns.append((intern(key), column, value_ids))
+
+    blobs = [text.encode("utf-8") for text in strings]
+    features = json.dumps(catalog.features, ensure_ascii=False).encode("utf-8")
+
+    with AtomicWriter(output_file, binary=True) as f:
+        f.write(bytes(_HEADER.size))
+
+        _align(f)
+        offsets_at = f.tell()
+        position = 0
+        offsets = [0]
+        for blob in blobs:
+            position += len(blob)
+            offsets.append(position)
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        data_at = f.tell()
+        f.writelines(blobs)
+
+        entries = []
+        for name, column, value_ids in columns:
+            _align(f)
+            values_at = f.tell()
+            f.write(struct.pack(f"<{len(value_ids)}I", *value_ids))
+            _align(f)
+            codes_at = f.tell()
+            f.write(column.codes.tobytes())
+            entries.append(
+                _COLUMN.pack(
+                    name, column.codes.itemsize, len(value_ids), values_at, codes_at
+                )
+            )
+
+        _align(f)
+        directory_at = f.tell()
+        f.writelines(entries)
+        features_at = f.tell()
+        f.write(features)
+
+        f.seek(0)
+        f.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                count,
+                len(columns),
+                len(strings),
+                source,
+                anchors,
+                validator_digest(),
+                offsets_at,
+                data_at,
+                directory_at,
+                features_at,
+                len(features),
+            )
+        )
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped reader of a snapshot written by write_snapshot.
+
+    Nothing is parsed up front: column codes are read as memoryviews over
+    the mapped file and values are decoded from the string table when
+    first asked for.
+
+    Attributes:
+        project_count: Number of projects
+        source: Digest of the JSON file the snapshot was compiled from
+        anchors: Digest of the features.md anchors it was validated against
+        validator: Digest of the code that validated it (validator_digest)
+        keys: Project key → column index, in snapshot order
+
+    Raises:
+        ValueError: The file is not a snapshot of this VERSION
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        try:
+            header = _HEADER.unpack_from(self._view)
+        except struct.error:
+            self.close()
+            raise ValueError(f"'{path}' is not a catalog snapshot") from None
+        (
+            magic,
+            version,
+            self.project_count,
+            column_count,
+            string_count,
+            self.source,
+            self.anchors,
+            self.validator,
+            offsets_at,
+            self._data_at,
+            directory_at,
+            self._features_at,
+            self._features_size,
+        ) = header
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} catalog snapshot")
+
+        self._offsets = self._view[
+            offsets_at : offsets_at + 8 * (string_count + 1)
+        ].cast("Q")
+        self._columns = [
+            _COLUMN.unpack_from(self._view, directory_at + index * _COLUMN.size)
+            for index in range(column_count)
+        ]
+        self.keys = {
+            self.string(column[0]): index for index, column in enumerate(self._columns)
+        }
+        self._values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release the memory map; views returned earlier become invalid."""
+        for name in ("_offsets", "_view"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._map.close()
+
+    def string(self, index):
+        """Return an interned string of the string table."""
+        start = self._data_at + self._offsets[index]
+        stop = self._data_at + self._offsets[index + 1]
+        return str(self._view[start:stop], "utf-8")
+
+    @property
+    def features(self):
+        """Feature definitions, as in projects.json."""
+        start = self._features_at
+        return json.loads(str(self._view[start : start + self._features_size], "utf-8"))
+
+    def codes(self, key):
+        """
+        Return the codes of a column as a memoryview, without copying.
+
+        Code 0 means the project has no value for the key; code N is
+        values(key)[N].
+        """
+        _, width, _, _, codes_at = self._columns[self.keys[key]]
+        size = width * self.project_count
+        return self._view[codes_at : codes_at + size].cast(_CODE_TYPECODES[width])
+
+    def values(self, key, missing=None):
+        """Return the distinct values of a column; index 0 is `missing`."""
+        values = self._values.get(key)
+        if values is None:
+            _, _, count, values_at, _ = self._columns[self.keys[key]]
+            ids = self._view[values_at : values_at + 4 * count].cast("I")
+            values = [json.loads(self.string(index)) for index in ids]
+            ids.release()
+            self._values[key] = values
+        return [missing, *values]
+
+    def to_catalog(self):
+        """Build a Catalog from the snapshot (codes are copied, not parsed)."""
+        catalog = Catalog(self.features)
+        catalog.projects = [{} for _ in range(self.project_count)]
+        for key in self.keys:
+            codes = self.codes(key)
+            if key in STANDARD_KEYS:
+                values = self.values(key)
+                for project, code in zip(catalog.projects, codes):
+                    if code:
+                        project[key] = values[code]
+            elif catalog.is_link_key(key):
+                values = self.values(key)
+                catalog.urls[key] = {
+                    index: values[code] for index, code in enumerate(codes) if code
+                }
+            else:
+                column = ScoreColumn()
+                column.values = self.values(key, column.values[0])
+                column.codes = array(codes.format, codes.tobytes())
+                for code, value in enumerate(column.values[1:], 1):
+                    try:
+                        column._codes_by_value[(type(value), value)] = code
+                    except TypeError:
+                        pass
+                catalog.columns[key] = column
+            codes.release()
+        return catalog
+
+
+def load_catalog(json_file="projects.json", snapshot_file=None, anchors=None):
+    """
+    Return a validated Catalog of json_file, through a snapshot when fresh.
+
+    When snapshot_file matches the digests of json_file, of `anchors` and
+    of the validating code, the catalog is read from it without parsing or
+    validating the JSON. Otherwise, or when the snapshot is unreadable
+    (e.g. truncated), the JSON is loaded and validated, and the snapshot
+    rewritten.
+
+    Args:
+        json_file: Path to projects.json
+        snapshot_file: Path of the snapshot (default: none is used)
+        anchors: Anchors of features.md (default: read next to json_file)
+
+    Returns:
+        (catalog, from_snapshot)
+
+    Raises:
+        ValueError: The JSON data is invalid
+    """
+    if anchors is None:
+        anchors = _feature_anchors_for(json_file)
+    source = source_digest(json_file)
+    validated = anchors_digest(anchors)
+
+    if snapshot_file and os.path.exists(snapshot_file):
+        try:
+            with CatalogSnapshot(snapshot_file) as snapshot:
+                if (
+                    snapshot.source == source
+                    and snapshot.anchors == validated
+                    and snapshot.validator == validator_digest()
+                ):
+                    return snapshot.to_catalog(), True
+        except (ValueError, TypeError, IndexError, struct.error):
+            # Another version, or a truncated or corrupt file: rebuilt below
+            pass
+
+    catalog = load_json(json_file, columnar=True)
+    validate_projects_json(catalog, anchors=anchors)
+    if snapshot_file:
+        write_snapshot(catalog, snapshot_file, source, validated)
+    return catalog, False
+
+
+def score_matrix(data):
+    """
+    Return the plain scores of data as a projects × score features matrix.
+
+    Returns:
+        (keys, rows): the feature keys of the columns, in table order, and
+        one list of scores per project (NO_SCORE for x, wip and missing
+        values)
+    """
+    catalog = data if isinstance(data, Catalog) else Catalog.from_data(data)
+    keys = [
+        key
+        for feature, key in zip(catalog.features, catalog.feature_keys)
+        if not feature.get("processor")
+    ]
+    rows = [[NO_SCORE] * len(keys) for _ in range(len(catalog))]
+    for column_index, key in enumerate(keys):
+        column = catalog.columns.get(key)
+        if column is None:
+            continue
+        scores = []
+        for value in column.values:
+            state, number = classify_value(value)
+            scores.append(number if state == "score" and number < 128 else NO_SCORE)
+        scores[0] = NO_SCORE
+        for row, code in zip(rows, column.codes):
+            row[column_index] = scores[code]
+    return keys, rows
+
+
+def write_npy(rows, columns, output_file):
+    """
+    Write an int8 matrix as a NumPy .npy file (format 1.0), without NumPy.
+
+    Args:
+        rows: Lists of ints in [-128, 127], one per matrix row
+        columns: Number of columns (needed when there are no rows)
+        output_file: Path of the .npy file
+    """
+    header = f"{{'descr': '|i1', 'fortran_order': False, 'shape': ({len(rows)}, {columns}), }}"
+    # The header is padded so the data starts on a 64 byte boundary
+    size = len(b"\x93NUMPY") + 4 + len(header) + 1
+    header += " " * (-size % 64) + "\n"
+    with AtomicWriter(output_file, binary=True) as f:
+        f.write(b"\x93NUMPY\x01\x00")
+        f.write(struct.pack("<H", len(header)))
+        f.write(header.encode("latin-1"))
+        for row in rows:
+            f.write(struct.pack(f"<{columns}b", *row))
+
+
+def write_score_matrix(data, output_file):
+    """
+    Export the plain scores of data to a .npy file, plus its labels.
+
+    The matrix has one int8 row per project (in projects.json order) and
+    one column per score feature (in table order); x, wip and missing
+    values are NO_SCORE. The project names and feature keys are written to
+    output_file + ".json".
+    """
+    catalog = data if isinstance(data, Catalog) else Catalog.from_data(data)
+    keys, rows = score_matrix(catalog)
+    write_npy(rows, len(keys), output_file)
+    labels = {
+        "projects": [project["name"] for project in catalog.projects],
+        "features": keys,
+    }
+    with AtomicWriter(output_file + ".json") as f:
+        json.dump(labels, f, indent=1, ensure_ascii=False)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", default="projects.json", help="Projects JSON file")
+    parser.add_argument(
+        "--snapshot",
+        default=".catalog.snapshot",
+        help="Snapshot file to compile (default: .catalog.snapshot)",
+    )
+    parser.add_argument(
+        "--npy", metavar="PATH", help="Also export the score matrix as a .npy file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Compile the snapshot; returns 1 when the JSON data is invalid."""
+    args = parse_args(argv)
+    try:
+        catalog, fresh = load_catalog(args.json, args.snapshot)
+    except ValueError:
+        return 1
+    state = "is up to date" if fresh else "written"
+    print(f"{args.snapshot} {state} ({len(catalog)} projects)")
+    if args.npy:
+        write_score_matrix(catalog, args.npy)
+        print(f"Wrote score matrix to {args.npy}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,197 @@ Generate README.md from template and JSON data.
 This script reads projects.json and readme.tpl to create the comparison table.
 """
 
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import difflib
+import gzip
+import hashlib
+import html
+import itertools
 import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from io import StringIO
+
+# Project keys that describe the project itself rather than a feature score
+STANDARD_KEYS = frozenset(
+    {"name", "repo", "branch", "logo_url", "logo_alt", "license_custom"}
+)
+
+# Cell value used when a project has no value for a feature
+MISSING_VALUE = "❌"
+
+# Array typecodes used for column codes, from narrowest to widest
+_CODE_TYPECODES = ("B", "H", "I")
+
+# Inline markdown images and links as used in table cells
+_MARKDOWN_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]*)\)")
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\(([^)\s]*)\)")
+
+# (before, after) callback pairs registered with add_stage_hook
+_stage_hooks = []
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def add_stage_hook(before=None, after=None):
+    """
+    Register callbacks run around every instrumented stage.
+
+    before(name, args) is called when a stage starts and after(name, args)
+    when it ends, also when the stage raises. Stages are "load_json",
+    "validate", "render_header", "render_row" (args: feature, processor),
+    "write_readme", "write_html" and a few optional ones; rows rendered in
+    worker processes (jobs > 1) are not reported.
+
+    Returns:
+        A handle to pass to remove_stage_hook
+    """
+    hook = (before, after)
+    _stage_hooks.append(hook)
+    return hook
+
+
+def remove_stage_hook(hook):
+    """Unregister a hook returned by add_stage_hook."""
+    _stage_hooks.remove(hook)
+
+
+class _Stage:
+    """Context manager calling the stage hooks registered when it was made."""
+
+    __slots__ = ("name", "args", "hooks")
+
+    def __init__(self, name, args, hooks):
+        self.name = name
+        self.args = args
+        self.hooks = hooks
+
+    def __enter__(self):
+        for before, _ in self.hooks:
+            if before is not None:
+                before(self.name, self.args)
+
+    def __exit__(self, *exc_info):
+        for _, after in reversed(self.hooks):
+            if after is not None:
+                after(self.name, self.args)
+
+
+def stage(name, **args):
+    """
+    Mark an instrumented stage: `with stage("validate"): ...`.
+
+    Without registered hooks this returns a shared no-op context manager,
+    so instrumentation costs one list check per stage.
+    """
+    if not _stage_hooks:
+        return _NO_STAGE
+    return _Stage(name, args, tuple(_stage_hooks))
+
+
+class StageProfiler:
+    """
+    Record wall time, call counts and memory peaks of instrumented stages.
+
+    Use as a context manager around the code to profile; it registers
+    itself with add_stage_hook on entry and unregisters on exit. Stats are
+    keyed by stage name, with the processor appended for rows (e.g.
+    "render_row:generate_badge_row").
+
+    Args:
+        trace_memory: Also record tracemalloc peaks (slows allocation down)
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stats = {}
+        self.events = []
+        self._stack = []
+        self._hook = None
+        self._started_tracing = False
+        self._origin = 0.0
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._origin = time.perf_counter()
+        self._hook = add_stage_hook(self._before, self._after)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_stage_hook(self._hook)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _before(self, name, args):
+        memory = 0
+        if self.trace_memory:
+            memory, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the parent's peak so far before resetting it
+                parent = self._stack[-1]
+                parent[3] = max(parent[3], peak - parent[2])
+            tracemalloc.reset_peak()
+        self._stack.append([name, time.perf_counter(), memory, 0])
+
+    def _after(self, name, args):
+        end = time.perf_counter()
+        _, start, memory, peak = self._stack.pop()
+        if self.trace_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - memory)
+            if self._stack:
+                parent = self._stack[-1]
+                parent[3] = max(parent[3], peak + memory - parent[2])
+
+        key = f"{name}:{args['processor']}" if "processor" in args else name
+        stats = self.stats.setdefault(
+            key, {"calls": 0, "seconds": 0.0, "peak_bytes": 0}
+        )
+        stats["calls"] += 1
+        stats["seconds"] += end - start
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak)
+
+        self.events.append(
+            {
+                "name": args.get("feature", name),
+                "cat": key,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {**args, "peak_bytes": peak},
+            }
+        )
+
+    def write_chrome_trace(self, path):
+        """Write the recorded stages as Chrome trace-event JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self):
+        """Return the stats as a text table, slowest stage first."""
+        lines = [f"{'stage':<40} {'calls':>6} {'seconds':>10} {'peak KiB':>10}"]
+        for key, stats in sorted(
+            self.stats.items(), key=lambda item: item[1]["seconds"], reverse=True
+        ):
+            lines.append(
+                f"{key:<40} {stats['calls']:>6} {stats['seconds']:>10.4f} "
+                f"{stats['peak_bytes'] / 1024:>10.1f}"
+            )
+        return "\n".join(lines)
 
 
 def score_to_emoji(score):
@@ -60,42 +250,618 @@ def score_to_emoji(score):
     return score_str
 
 
-def load_json(filepath="projects.json"):
-    """Load project data from JSON file."""
+def feature_key(feature_name):
+    """Convert a feature name to its project key (e.g., "Web App" → "web_app")."""
+    return feature_name.lower().replace(" ", "_").replace("/", "_")
+
+
+class ScoreColumn:
+    """
+    Array-backed column holding one project key for every project.
+
+    Values are interned per column: each distinct value (e.g. "x", "wip-3",
+    "8") is stored once in `values` and every project holds a small integer
+    code into that list. Code 0 is reserved for projects without the key.
+    """
+
+    __slots__ = ("codes", "values", "_codes_by_value")
+
+    def __init__(self):
+        self.codes = array(_CODE_TYPECODES[0])
+        self.values = [MISSING_VALUE]
+        self._codes_by_value = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def intern(self, value):
+        """Return the code for a value, adding it to the column if new."""
+        try:
+            lookup_key = (type(value), value)
+            code = self._codes_by_value.get(lookup_key)
+        except TypeError:
+            # Unhashable values (lists, dicts) are stored without sharing
+            lookup_key = None
+            code = None
+
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            if lookup_key is not None:
+                self._codes_by_value[lookup_key] = code
+            self._widen(code)
+        return code
+
+    def _widen(self, code):
+        """Switch to a wider array typecode when a code no longer fits."""
+        typecode = self.codes.typecode
+        if code < 1 << (8 * self.codes.itemsize):
+            return
+        wider = _CODE_TYPECODES[_CODE_TYPECODES.index(typecode) + 1]
+        self.codes = array(wider, self.codes)
+
+    def set(self, index, value):
+        """Store a value for the project at `index`, padding skipped projects."""
+        self.pad(index)
+        code = self.intern(value)
+        self.codes.append(code)
+
+    def pad(self, length):
+        """Mark projects up to `length` as missing the key."""
+        missing = length - len(self.codes)
+        if missing > 0:
+            self.codes.extend(
+                bytes(missing) if self.codes.itemsize == 1 else [0] * missing
+            )
+
+    def has(self, index):
+        """Return whether the project at `index` has a value for this key."""
+        return self.codes[index] != 0
+
+    def value(self, index):
+        """Return the value for the project at `index` (MISSING_VALUE if absent)."""
+        return self.values[self.codes[index]]
+
+
+class Catalog:
+    """
+    Compact columnar view of projects.json.
+
+    Attributes:
+        projects: Per-project dicts holding only the STANDARD_KEYS
+        features: Feature definitions, as in projects.json
+        feature_keys: Project key of each feature, aligned with `features`
+        columns: Project key → ScoreColumn for every non-standard key
+        urls: "<feature key>_url" key → {project index: url}, only for
+            projects that set it
+    """
+
+    __slots__ = (
+        "projects",
+        "features",
+        "feature_keys",
+        "columns",
+        "urls",
+        "_link_keys",
+    )
+
+    def __init__(self, features=None):
+        self.projects = []
+        self.features = list(features or [])
+        self.feature_keys = [feature_key(feature["name"]) for feature in self.features]
+        self.columns = {}
+        self.urls = {}
+        # Features may themselves end in "_url" (e.g. "Homepage URL")
+        self._link_keys = {key + "_url" for key in self.feature_keys}.difference(
+            self.feature_keys
+        )
+
+    def __len__(self):
+        return len(self.projects)
+
+    @classmethod
+    def from_data(cls, data):
+        """Build a catalog from data shaped like projects.json."""
+        catalog = cls(data.get("features", []))
+        for project in data["projects"]:
+            catalog.append(project)
+        catalog.finish()
+        return catalog
+
+    def append(self, project):
+        """Add one project dict to the catalog."""
+        index = len(self.projects)
+        standard = {}
+
+        for key, value in project.items():
+            if key in STANDARD_KEYS:
+                standard[key] = value
+            elif self.is_link_key(key):
+                self.urls.setdefault(key, {})[index] = value
+            else:
+                column = self.columns.get(key)
+                if column is None:
+                    column = self.columns[key] = ScoreColumn()
+                column.set(index, value)
+
+        self.projects.append(standard)
+
+    def is_link_key(self, key):
+        """Return whether a project key holds the link of a feature's cells."""
+        return key in self._link_keys
+
+    def finish(self):
+        """Pad every column to the number of projects."""
+        for column in self.columns.values():
+            column.pad(len(self.projects))
+
+    def extra_keys(self):
+        """Return every non-standard project key present in the catalog."""
+        return [*self.columns, *self.urls]
+
+    def key_positions(self, key):
+        """Return the indexes of the projects that set a non-standard key."""
+        if key in self.urls:
+            return sorted(self.urls[key])
+        return [index for index, code in enumerate(self.columns[key].codes) if code]
+
+    def column_digest(self, key):
+        """Return a content hash of a feature column and its urls."""
+        column = self.columns.get(key)
+        urls = self.urls.get(key + "_url", {})
+        return _digest(
+            len(self),
+            sorted(urls.items()),
+            column.values if column else None,
+            column.codes.tobytes() if column else b"",
+        )
+
+    def iter_cells(self, key):
+        """
+        Yield the score cell of every project for a feature key.
+
+        Each distinct value is converted with score_to_emoji once per column
+        instead of once per cell.
+        """
+        column = self.columns.get(key)
+        urls = self.urls.get(key + "_url", {})
+
+        if column is None:
+            cells = (MISSING_VALUE for _ in range(len(self)))
+        else:
+            rendered = [_score_cell(value) for value in column.values]
+            cells = (rendered[code] for code in column.codes)
+
+        if not urls:
+            yield from cells
+            return
+
+        for index, cell in enumerate(cells):
+            url = urls.get(index)
+            yield cell if url is None else f"[{cell}]({url})"
+
+    def iter_values(self, key, default=None):
+        """Yield the raw value of a non-standard key for every project."""
+        if key in self.urls:
+            urls = self.urls[key]
+            return (urls.get(index, default) for index in range(len(self)))
+        column = self.columns.get(key)
+        if column is None:
+            return itertools.repeat(default, len(self))
+        values = [default, *column.values[1:]]
+        return (values[code] for code in column.codes)
+
+    def select(self, indexes):
+        """Return a new Catalog holding only the projects at `indexes`, in order."""
+        indexes = list(indexes)
+        positions = {index: position for position, index in enumerate(indexes)}
+        selected = Catalog(self.features)
+        selected.projects = [self.projects[index] for index in indexes]
+        for key, column in self.columns.items():
+            subset = ScoreColumn()
+            subset.values = column.values
+            subset._codes_by_value = column._codes_by_value
+            subset.codes = array(
+                column.codes.typecode, [column.codes[i] for i in indexes]
+            )
+            selected.columns[key] = subset
+        for key, urls in self.urls.items():
+            subset = {positions[i]: url for i, url in urls.items() if i in positions}
+            if subset:
+                selected.urls[key] = subset
+        return selected
+
+    def project_keys(self, index):
+        """Return the keys the project at `index` had in projects.json."""
+        keys = list(self.projects[index])
+        keys.extend(key for key, column in self.columns.items() if column.has(index))
+        keys.extend(key for key, urls in self.urls.items() if index in urls)
+        return keys
+
+    def to_data(self):
+        """Rebuild data shaped like projects.json (key order is not preserved)."""
+        projects = []
+        for index, standard in enumerate(self.projects):
+            project = dict(standard)
+            for key, column in self.columns.items():
+                if column.has(index):
+                    project[key] = column.value(index)
+            for key, urls in self.urls.items():
+                if index in urls:
+                    project[key] = urls[index]
+            projects.append(project)
+        return {"projects": projects, "features": self.features}
+
+
+def load_json(filepath="projects.json", columnar=False):
+    """
+    Load project data from JSON file.
+
+    Args:
+        filepath: Path to projects.json
+        columnar: Return a Catalog instead of the raw dict
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if columnar:
+        return Catalog.from_data(data)
+    return data
+
+
+# Characters skipped between JSON tokens
+_JSON_WHITESPACE = " \t\n\r"
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Read JSON tokens from a text file one chunk at a time."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self, size):
+        """Append up to `size` characters to the buffer, dropping consumed text."""
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ("" at end of file)."""
+        while True:
+            buffer = self.buffer
+            while (
+                self.position < len(buffer)
+                and buffer[self.position] in _JSON_WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(buffer):
+                return buffer[self.position]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, allowed):
+        """Consume and return the next character, which must be in `allowed`."""
+        char = self.peek()
+        if not char or char not in allowed:
+            found = repr(char) if char else "end of file"
+            raise ValueError(f"Expected one of {allowed!r} in JSON, found {found}")
+        self.position += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # Incomplete value: read more, doubling for very large values
+                if not self._fill(max(self.chunk_size, len(self.buffer))):
+                    raise
+                continue
+            # A number or literal may continue in the next chunk
+            if end == len(self.buffer) and self._fill(self.chunk_size):
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_array(filepath, key="projects", other=None, chunk_size=1 << 16):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element and one read chunk are held in memory, so
+    arbitrarily large files can be processed.
+
+    Args:
+        filepath: JSON file whose top level is an object
+        key: Name of the array to stream
+        other: Optional dict that receives every other top-level value
+        chunk_size: Number of characters read at a time
+    """
     with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+        reader = _JsonReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.expect(",]") == "]":
+                            break
+            else:
+                value = reader.value()
+                if other is not None:
+                    other[name] = value
+
+            if reader.expect(",}") == "}":
+                break
+
+
+class _JsonLines:
+    """Re-iterable view of a file holding one JSON value per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class _ColumnSpool:
+    """Write one project key to a column file, one line per project."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.length = 0
+
+    def set(self, index, value):
+        """Store the value of the project at `index`, padding skipped projects."""
+        self.pad(index)
+        self.file.write(json.dumps(value, ensure_ascii=False) + "\n")
+        self.length += 1
+
+    def pad(self, length):
+        """Write empty lines (missing key) up to `length` projects."""
+        if length > self.length:
+            self.file.write("\n" * (length - self.length))
+            self.length = length
+
+
+class SpooledCatalog:
+    """
+    Catalog whose columns live in files instead of memory.
+
+    Built by spool_json. Every non-standard project key is written to its
+    own column file with one line per project (an empty line when the
+    project does not set the key), so rendering a row only needs that row
+    in memory. Use as a context manager, or call close(), to remove the
+    files of a temporary spool directory.
+
+    Attributes:
+        projects: Re-iterable of per-project dicts holding the STANDARD_KEYS
+        features: Feature definitions, as in projects.json
+        feature_keys: Project key of each feature, aligned with `features`
+    """
 
+    def __init__(self, directory, features, count, paths, cleanup=False):
+        self.directory = directory
+        self.features = list(features)
+        self.feature_keys = [feature_key(feature["name"]) for feature in self.features]
+        self.projects = _JsonLines(os.path.join(directory, "projects.jsonl"))
+        self._count = count
+        self._paths = paths
+        self._cleanup = cleanup
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Remove the spool directory if it was created by spool_json."""
+        if self._cleanup:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._cleanup = False
+
+    def _iter_column(self, key):
+        """Yield the raw line of every project for a key (None when missing)."""
+        path = self._paths.get(key)
+        if path is None:
+            yield from itertools.repeat(None, self._count)
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n") or None
+
+    def extra_keys(self):
+        """Return every non-standard project key present in the catalog."""
+        return list(self._paths)
+
+    def key_positions(self, key):
+        """Return the indexes of the projects that set a non-standard key."""
+        return [index for index, line in enumerate(self._iter_column(key)) if line]
+
+    def column_digest(self, key):
+        """Return a content hash of a feature column and its urls."""
+        digest = hashlib.sha256(str(self._count).encode("utf-8"))
+        for column_key in (key, key + "_url"):
+            path = self._paths.get(column_key)
+            digest.update(_file_sha256(path).encode("utf-8") if path else b"-")
+        return digest.hexdigest()
+
+    def iter_values(self, key, default=None):
+        """Yield the raw value of a non-standard key for every project."""
+        for line in self._iter_column(key):
+            yield default if line is None else json.loads(line)
+
+    def iter_cells(self, key):
+        """Yield the score cell of every project for a feature key."""
+        # Cache converted cells per distinct raw value, like Catalog does
+        rendered = {}
+        values = self._iter_column(key)
+        urls = self._iter_column(key + "_url")
+        for line, url_line in zip(values, urls):
+            cell = rendered.get(line)
+            if cell is None:
+                cell = _score_cell(MISSING_VALUE if line is None else json.loads(line))
+                if isinstance(cell, str) and len(rendered) < 1024:
+                    rendered[line] = cell
+            if url_line is not None:
+                cell = f"[{cell}]({json.loads(url_line)})"
+            yield cell
+
+
+def spool_json(filepath="projects.json", directory=None, chunk_size=1 << 16):
+    """
+    Stream projects.json into a SpooledCatalog with bounded memory.
 
-def generate_table_header(projects):
-    """Generate the table header with project names."""
-    header = "| Feature "
-    separator = "| :------- "
+    Projects are read one at a time with iter_json_array and each
+    non-standard key is appended to its column file.
+
+    Args:
+        filepath: Path to projects.json
+        directory: Where to write the column files (default: a temporary
+            directory removed when the catalog is closed)
+        chunk_size: Number of characters read at a time
+    """
+    cleanup = directory is None
+    if cleanup:
+        directory = tempfile.mkdtemp(prefix="projects-spool-")
+    else:
+        os.makedirs(directory, exist_ok=True)
+
+    other = {}
+    spools = {}
+    count = 0
+    try:
+        meta_path = os.path.join(directory, "projects.jsonl")
+        with open(meta_path, "w", encoding="utf-8") as meta:
+            for project in iter_json_array(filepath, "projects", other, chunk_size):
+                standard = {}
+                for key, value in project.items():
+                    if key in STANDARD_KEYS:
+                        standard[key] = value
+                        continue
+                    spool = spools.get(key)
+                    if spool is None:
+                        path = os.path.join(directory, f"column-{len(spools)}.jsonl")
+                        spool = spools[key] = _ColumnSpool(path)
+                    spool.set(count, value)
+                meta.write(json.dumps(standard, ensure_ascii=False) + "\n")
+                count += 1
+    except BaseException:
+        for spool in spools.values():
+            spool.file.close()
+        if cleanup:
+            shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    for spool in spools.values():
+        spool.pad(count)
+        spool.file.close()
+
+    paths = {key: spool.path for key, spool in spools.items()}
+    return SpooledCatalog(directory, other.get("features", []), count, paths, cleanup)
+
+
+def _format_cells(cells):
+    """Format the project cells of a row, without label and row end."""
+    return "".join([f"| {cell} " for cell in cells])
+
+
+def format_row(label, cells):
+    """
+    Format a single markdown table row.
+
+    Args:
+        label: Content of the first (feature) column
+        cells: Iterable of cell strings, one per project
+
+    Returns:
+        The row as a string, terminated by a newline
+    """
+    return f"| {label} " + _format_cells(cells) + "|\n"
+
+
+def project_link(project):
+    """Return the markdown link of a project to its GitHub repository."""
+    return f"[{project['name']}](https://github.com/{project['repo']})"
+
+
+def iter_table_header(projects):
+    """Yield the header row and the separator row."""
+    names = []
+    separators = []
 
     for project in projects:
-        name = project["name"]
-        repo = project["repo"]
-        url = f"https://github.com/{repo}"
-        header += f"| [{name}]({url}) "
-        separator += "| " + "-" * (len(url) + len(name) + 4) + " "
+        link = project_link(project)
+        names.append(link)
+        separators.append("-" * len(link))
 
-    header += "|\n"
-    separator += "|\n"
+    yield format_row("Feature", names)
+    yield format_row(":-------", separators)
 
-    return header + separator
 
+def generate_table_header(projects):
+    """Generate the table header with project names."""
+    return "".join(iter_table_header(projects))
 
-def generate_logo_row(projects):
-    """Generate the logo row."""
-    row = "| Logo "
 
+def iter_logo_cells(projects):
+    """Yield the logo cell for each project."""
     for project in projects:
         logo_url = project["logo_url"]
         logo_alt = project["logo_alt"]
-        cell = f'<img src="{logo_url}" style="width: 50px"  alt="{logo_alt}"/>'
-        row += f"| {cell} "
+        yield f'<img src="{logo_url}" style="width: 50px"  alt="{logo_alt}"/>'
+
+
+def generate_logo_row(projects):
+    """Generate the logo row."""
+    return format_row("Logo", iter_logo_cells(projects))
+
+
+def feature_label(feature_name, feature_link):
+    """Return the first-column label for a feature, linked when possible."""
+    if feature_link:
+        return f"[{feature_name}]({feature_link})"
+    return feature_name
+
+
+def iter_badge_cells(projects, badge_template, use_lowercase=False, use_branch=False):
+    """Yield the badge cell for each project (see generate_badge_row)."""
+    for project in projects:
+        repo = project["repo"].lower() if use_lowercase else project["repo"]
 
-    row += "|\n"
-    return row
+        if use_branch:
+            branch = project.get("branch", "master")
+            yield badge_template.format(repo=repo, branch=branch)
+        else:
+            yield badge_template.format(repo=repo)
 
 
 def generate_badge_row(
@@ -117,59 +883,37 @@ def generate_badge_row(
         use_lowercase: Whether to lowercase the repo name
         use_branch: Whether to include branch in the badge URL
     """
-    row = f"| [{feature_name}]({feature_link}) "
-
-    for project in projects:
-        repo = project["repo"].lower() if use_lowercase else project["repo"]
-
-        if use_branch:
-            branch = project.get("branch", "master")
-            badge = badge_template.format(repo=repo, branch=branch)
-        else:
-            badge = badge_template.format(repo=repo)
-
-        row += f"| {badge} "
-
-    row += "|\n"
-    return row
+    cells = iter_badge_cells(projects, badge_template, use_lowercase, use_branch)
+    return format_row(f"[{feature_name}]({feature_link})", cells)
 
 
-def generate_license_row(projects):
-    """Generate license row."""
-    row = "| [License](features.md#license) "
-
+def iter_license_cells(projects):
+    """Yield the license badge cell for each project."""
     for project in projects:
         if "license_custom" in project:
             # Custom license display
             custom = project["license_custom"]
-            badge = f"![?](https://img.shields.io/static/v1?label=%20&message={custom}&color=orange)"
+            yield f"![?](https://img.shields.io/static/v1?label=%20&message={custom}&color=orange)"
         else:
             repo = project["repo"]
-            badge = f"![?](https://img.shields.io/github/license/{repo}?label=%20)"
-        row += f"| {badge} "
+            yield f"![?](https://img.shields.io/github/license/{repo}?label=%20)"
+
 
-    row += "|\n"
-    return row
+def generate_license_row(projects):
+    """Generate license row."""
+    return format_row("[License](features.md#license)", iter_license_cells(projects))
 
 
-def generate_default_row(feature, projects):
+def iter_default_cells(feature_key, projects):
     """
-    Generate a default row for features without a custom processor.
-    Uses score_to_emoji to convert values.
-    Also checks for feature_key + '_url' to create links.
+    Yield the score cell for each project (see generate_default_row).
+
+    Args:
+        feature_key: Project key holding the score (e.g., "web_app")
+        projects: List of projects
     """
-    feature_name = feature["name"]
-    feature_link = feature.get("link")
-    feature_key = feature_name.lower().replace(" ", "_").replace("/", "_")
     feature_url_key = feature_key + "_url"
 
-    # Build row header
-    if feature_link:
-        row = f"| [{feature_name}]({feature_link}) "
-    else:
-        row = f"| {feature_name} "
-
-    # Add cells for each project
     for project in projects:
         # Try to find the feature value in the project
         value = project.get(feature_key, "❌")
@@ -185,140 +929,2470 @@ def generate_default_row(feature, projects):
             url = project[feature_url_key]
             cell = f"[{cell}]({url})"
 
-        row += f"| {cell} "
+        yield cell
 
-    row += "|\n"
-    return row
 
+def _score_cell(value):
+    """Convert a raw feature value to its cell text."""
+    if isinstance(value, (str, int)):
+        return score_to_emoji(value)
+    return value
 
-def generate_comparison_table(data):
-    """Generate the complete comparison table dynamically based on features."""
-    projects = data["projects"]
+
+def iter_column_cells(catalog, feature_key):
+    """Yield the score cell for each project from a Catalog or SpooledCatalog."""
+    return catalog.iter_cells(feature_key)
+
+
+def generate_default_row(feature, projects):
+    """
+    Generate a default row for features without a custom processor.
+    Uses score_to_emoji to convert values.
+    Also checks for feature_key + '_url' to create links.
+    """
+    feature_name = feature["name"]
+    label = feature_label(feature_name, feature.get("link"))
+    return format_row(label, iter_default_cells(feature_key(feature_name), projects))
+
+
+def _table_parts(data):
+    """
+    Return (projects, features, keys) for a dict or Catalog.
+
+    `keys` holds the catalog column key of each feature, or None for dict
+    data where the default row reads the project dicts directly.
+    """
+    if isinstance(data, (Catalog, SpooledCatalog)):
+        return data.projects, data.features, data.feature_keys
     features = data.get("features", [])
+    return data["projects"], features, [None] * len(features)
 
-    # Generate header
-    table = generate_table_header(projects)
 
-    # Loop over features and generate each row
-    for feature in features:
-        processor_name = feature.get("processor")
-
-        # Match processor name and call appropriate function
-        match processor_name:
-            case "generate_logo_row":
-                table += generate_logo_row(projects)
-
-            case "generate_badge_row":
-                # Read badge configuration from feature
-                feature_name = feature["name"]
-                feature_link = feature.get("link")
-                badge_template = feature.get("badge_template", "")
-                use_lowercase = feature.get("use_lowercase", False)
-                use_branch = feature.get("use_branch", False)
-
-                table += generate_badge_row(
-                    feature_name,
-                    feature_link,
-                    projects,
-                    badge_template,
-                    use_lowercase=use_lowercase,
-                    use_branch=use_branch,
-                )
+def apply_badge_snapshot(cells, snapshot):
+    """
+    Replace badge images by static text from a snapshot.
 
-            case "generate_license_row":
-                table += generate_license_row(projects)
+    Args:
+        cells: Iterable of badge cells (markdown images)
+        snapshot: Dict mapping badge image URL → text, as stored under the
+            "snapshot" key of a feature by badge_snapshot.snapshot_badges;
+            badges without a snapshot value are kept
+    """
+    if not snapshot:
+        return cells
+    return (_snapshot_cell(cell, snapshot) for cell in cells)
 
-            case _:
-                # Use default conversion for unknown or null processors
-                table += generate_default_row(feature, projects)
 
-    return table
+def _snapshot_cell(cell, snapshot):
+    """Return the snapshot text for a badge cell, or the cell unchanged."""
+    match = _MARKDOWN_IMAGE.fullmatch(cell)
+    if match is None:
+        return cell
+    return snapshot.get(match[2], cell)
 
 
-def validate_projects_json(data):
-    """Validate the projects.json structure."""
-    projects = data["projects"]
-    features = data.get("features", [])
+# Processor name → factory compiling a feature spec, see register_processor
+PROCESSORS = {}
 
-    # Collect all validation errors
-    errors = []
+# Processors whose rows only read the STANDARD_KEYS of the projects
+_STANDARD_PROCESSORS = set()
 
-    # Check for missing required fields
-    required_fields = {"name", "repo", "logo_url", "logo_alt"}
 
-    for project in projects:
-        missing_fields = required_fields - project.keys()
-        if missing_fields:
-            errors.append(
-                f"Project '{project.get('name', 'Unknown')}' is missing fields: {missing_fields}"
+def register_processor(name, standard_keys_only=False):
+    """
+    Decorator registering a row processor under `name`.
+
+    The decorated factory is called once per feature as factory(feature,
+    key), where key is the catalog column of the feature (None for dict
+    data). It does the per-feature setup and returns a renderer
+    render(data, projects) → (label, cells), which may be called many
+    times. Features select a processor with their "processor" field;
+    features without one, or with an unknown one, use the default row.
+
+    Args:
+        name: Processor name used in projects.json
+        standard_keys_only: The rows only read the STANDARD_KEYS of the
+            projects, which lets incremental mode hash less
+
+    Example:
+        @register_processor("generate_stars_row")
+        def compile_stars_row(feature, key):
+            label = feature_label(feature["name"], feature.get("link"))
+            return lambda data, projects: (
+                label,
+                iter_project_values(data, "stars", MISSING_VALUE),
             )
+    """
 
-    # Check for undocumented keys
-    # Build standard keys (fields that don't need to be in features)
-    standard_keys = {"name", "repo", "branch", "logo_url", "logo_alt", "license_custom"}
+    def decorator(factory):
+        PROCESSORS[name] = factory
+        if standard_keys_only:
+            _STANDARD_PROCESSORS.add(name)
+        else:
+            _STANDARD_PROCESSORS.discard(name)
+        return factory
 
-    # Build feature keys from features array
-    feature_keys = set()
-    for feature in features:
-        feature_name = feature["name"].lower().replace(" ", "_").replace("/", "_")
-        feature_keys.add(feature_name)
-        # Also add _url variant
-        feature_keys.add(f"{feature_name}_url")
+    return decorator
 
-    # Track which projects have which keys
-    all_keys = set()
-    project_key_map = {}
-    for project in projects:
-        project_name = project.get("name", "Unknown")
-        for key in project.keys():
-            all_keys.add(key)
-            if key not in project_key_map:
-                project_key_map[key] = []
-            project_key_map[key].append(project_name)
-
-    # Find unmapped keys
-    unmapped_keys = all_keys - standard_keys - feature_keys
-
-    if unmapped_keys:
-        errors.append(
-            f"Found {len(unmapped_keys)} project key(s) not mapped to any feature:"
+
+@register_processor("generate_logo_row", standard_keys_only=True)
+def _compile_logo_row(feature, key):
+    return lambda data, projects: ("Logo", iter_logo_cells(projects))
+
+
+@register_processor("generate_badge_row", standard_keys_only=True)
+def _compile_badge_row(feature, key):
+    # Read badge configuration from feature
+    label = f"[{feature['name']}]({feature.get('link')})"
+    badge_template = feature.get("badge_template", "")
+    use_lowercase = feature.get("use_lowercase", False)
+    use_branch = feature.get("use_branch", False)
+    snapshot = feature.get("snapshot")
+
+    def render(data, projects):
+        cells = iter_badge_cells(projects, badge_template, use_lowercase, use_branch)
+        return label, apply_badge_snapshot(cells, snapshot)
+
+    return render
+
+
+@register_processor("generate_license_row", standard_keys_only=True)
+def _compile_license_row(feature, key):
+    snapshot = feature.get("snapshot")
+
+    def render(data, projects):
+        cells = apply_badge_snapshot(iter_license_cells(projects), snapshot)
+        return "[License](features.md#license)", cells
+
+    return render
+
+
+def iter_project_values(data, key, default=None):
+    """
+    Yield the raw value of `key` for every project of a dict or Catalog.
+
+    Catalog projects only hold the STANDARD_KEYS, so processors reading
+    other keys should use this instead of the project dicts.
+    """
+    if key not in STANDARD_KEYS and isinstance(data, (Catalog, SpooledCatalog)):
+        return data.iter_values(key, default)
+    return (project.get(key, default) for project in _table_parts(data)[0])
+
+
+def _compile_default_row(feature, key):
+    label = feature_label(feature["name"], feature.get("link"))
+    if key is not None:
+        # Default conversion read straight from the catalog column
+        return lambda data, projects: (label, iter_column_cells(data, key))
+
+    project_key = feature_key(feature["name"])
+    return lambda data, projects: (label, iter_default_cells(project_key, projects))
+
+
+class CompiledFeature:
+    """
+    A feature spec compiled into its row renderer.
+
+    Calling it with (data, projects) returns the (label, cells) of the row.
+    Features are compiled once by compile_features and can then be rendered
+    any number of times, for several outputs or project subsets.
+
+    Pickling keeps the processor factory (by reference) instead of the
+    renderer, so worker processes compile the same processor even when it
+    was registered at runtime and the worker did not register it.
+    """
+
+    __slots__ = ("feature", "key", "name", "processor", "render", "_factory")
+
+    def __init__(self, feature, key=None, factory=None):
+        self.feature = feature
+        self.key = key
+        self.name = feature["name"]
+        processor = feature.get("processor")
+        if factory is None and processor:
+            factory = PROCESSORS.get(processor)
+        self.processor = processor if factory is not None else "default"
+        self._factory = factory
+        self.render = (factory or _compile_default_row)(feature, key)
+
+    def __call__(self, data, projects):
+        return self.render(data, projects)
+
+    def __reduce__(self):
+        return CompiledFeature, (self.feature, self.key, self._factory)
+
+
+# Compiled features by processor factory, feature spec and key, see
+# compile_features
+_compiled_features = {}
+_COMPILED_FEATURES_MAX = 1024
+
+
+def compile_features(data):
+    """
+    Compile every feature of data into a CompiledFeature, in table order.
+
+    Feature specs are read once, here; compile again after changing them
+    (e.g. after badge_snapshot.snapshot_badges). Compiled features are
+    cached by the content of their spec and by processor, so catalogs
+    sharing features (as in batch_generate.py) compile them once per
+    process.
+    """
+    _, features, keys = _table_parts(data)
+    schema = []
+    for feature, key in zip(features, keys):
+        processor = feature.get("processor")
+        cache_key = (
+            PROCESSORS.get(processor) if processor else None,
+            json.dumps(feature, sort_keys=True, default=repr),
+            key,
         )
-        for key in sorted(unmapped_keys):
-            projects_with_key = project_key_map[key]
-            errors.append(f"  • '{key}' in: {', '.join(projects_with_key)}")
+        compiled = _compiled_features.get(cache_key)
+        if compiled is None:
+            if len(_compiled_features) >= _COMPILED_FEATURES_MAX:
+                _compiled_features.clear()
+            compiled = _compiled_features[cache_key] = CompiledFeature(feature, key)
+        schema.append(compiled)
+    return schema
 
-    # If any errors were found, print them and raise exception
-    if errors:
-        print("projects.json validation FAILED:")
-        for error in errors:
-            print(error)
-        raise ValueError(f"projects.json validation failed with {len(errors)} error(s)")
 
+def feature_row_cells(data, projects, feature, key=None):
+    """
+    Return the (label, cells) of the table row for one feature.
 
-def generate_readme(
-    template_file="readme.tpl", output_file="readme.md", json_file="projects.json"
-):
-    """Generate README.md from template and JSON data."""
-    # Load data
-    data = load_json(json_file)
+    The label and cells are markdown; `cells` is an iterable with one cell
+    per project. format_row turns them into a markdown table row.
+    """
+    return CompiledFeature(feature, key)(data, projects)
 
-    # Read template
-    with open(template_file, "r", encoding="utf-8") as f:
-        template = f.read()
 
-    # Validate data
-    validate_projects_json(data)
+def render_compiled_row(compiled, data, projects):
+    """Render the markdown table row of a CompiledFeature."""
+    if not _stage_hooks:
+        return format_row(*compiled(data, projects))
+    with stage("render_row", feature=compiled.name, processor=compiled.processor):
+        return format_row(*compiled(data, projects))
+
+
+def render_feature_row(data, projects, feature, key=None):
+    """Render the markdown table row for one feature with its processor."""
+    return render_compiled_row(CompiledFeature(feature, key), data, projects)
+
+
+# Data shared with rendering worker processes, set by _init_render_worker
+_worker_data = None
+_worker_schema = None
+
+
+def _init_render_worker(data, schema):
+    """Process pool initializer: receive the data and schema once per worker."""
+    global _worker_data, _worker_schema
+    _worker_data = data
+    _worker_schema = schema
+
+
+def _select_projects(data, start, stop):
+    """Return data restricted to the projects in [start, stop)."""
+    if start == 0 and stop is None:
+        return data
+    if isinstance(data, Catalog):
+        return data.select(range(start, min(stop, len(data))))
+    return {**data, "projects": data["projects"][start:stop]}
+
+
+def _render_shard(start, stop, transpose):
+    """Render the table of the projects in [start, stop) in a worker process."""
+    data = _select_projects(_worker_data, start, stop)
+    return "".join(iter_layout_table(data, transpose, schema=_worker_schema))
+
+
+def _render_chunk(feature_start, feature_stop, project_start, project_stop):
+    """
+    Render part of the table in a worker process.
+
+    Returns:
+        List of (label, formatted cells) for the features in
+        [feature_start, feature_stop) and the projects in
+        [project_start, project_stop)
+    """
+    data = _select_projects(_worker_data, project_start, project_stop)
+    projects = _table_parts(data)[0]
+    chunk = []
+    for compiled in _worker_schema[feature_start:feature_stop]:
+        label, cells = compiled(data, projects)
+        chunk.append((label, _format_cells(cells)))
+    return chunk
+
+
+def _plan_chunks(feature_count, project_count, jobs, splittable):
+    """
+    Split the table into ordered render tasks for `jobs` workers.
+
+    Features are split into groups first. When there are fewer features
+    than tasks wanted (a very wide table), each feature group is also
+    split into ranges of project columns.
+    """
+    wanted = jobs * 4
+    feature_chunks = max(1, min(feature_count, wanted))
+    project_chunks = 1
+    if splittable and feature_count < wanted:
+        project_chunks = max(1, min(project_count, -(-wanted // max(feature_count, 1))))
+
+    feature_size = -(-feature_count // feature_chunks)
+    project_size = -(-project_count // project_chunks)
+    tasks = []
+    for feature_start in range(0, feature_count, feature_size):
+        feature_stop = min(feature_start + feature_size, feature_count)
+        if project_chunks == 1:
+            tasks.append((feature_start, feature_stop, 0, None))
+            continue
+        for project_start in range(0, project_count, project_size):
+            project_stop = project_start + project_size
+            tasks.append((feature_start, feature_stop, project_start, project_stop))
+    return tasks
+
+
+def _iter_parallel_rows(data, jobs, schema):
+    """Render the rows of a schema in a process pool, yielding them in order."""
+    projects = _table_parts(data)[0]
+    splittable = isinstance(data, (dict, Catalog))
+    project_count = len(projects) if splittable else len(data)
+    tasks = _plan_chunks(len(schema), project_count, jobs, splittable)
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_render_worker, initargs=(data, schema)
+    ) as executor:
+        results = executor.map(_render_chunk, *zip(*tasks))
+
+        # Tasks covering the same features arrive one after the other, in
+        # column order, starting with the task for the first project
+        rows = []
+        for (_, _, project_start, _), chunk in zip(tasks, results):
+            if project_start == 0:
+                yield from _join_row_parts(rows)
+                rows = [[label, cells] for label, cells in chunk]
+            else:
+                for row, (_, cells) in zip(rows, chunk):
+                    row.append(cells)
+        yield from _join_row_parts(rows)
+
+
+def _join_row_parts(rows):
+    """Yield rows assembled from a label and formatted cell parts."""
+    for label, *parts in rows:
+        yield f"| {label} " + "".join(parts) + "|\n"
+
+
+def iter_comparison_table(data, jobs=None, schema=None):
+    """
+    Yield the comparison table one row at a time.
+
+    Rows are produced lazily so they can be written straight to a file
+    without holding the whole table in memory. `data` may be the dict from
+    load_json, a Catalog or a SpooledCatalog.
+
+    With jobs > 1 the rows are rendered in a pool of `jobs` processes and
+    yielded in the original order; the output is identical to the serial
+    path.
+
+    `schema` is the result of compile_features(data); it is compiled here
+    when omitted. Worker processes receive it (see CompiledFeature).
+    """
+    projects = _table_parts(data)[0]
+
+    # Generate header
+    with stage("render_header"):
+        header = list(iter_table_header(projects))
+    yield from header
+
+    schema = schema or compile_features(data)
+    if jobs and jobs > 1 and schema:
+        yield from _iter_parallel_rows(data, jobs, schema)
+        return
+
+    # Loop over features and generate each row
+    for compiled in schema:
+        yield render_compiled_row(compiled, data, projects)
+
+
+def write_comparison_table(data, writer, jobs=None, schema=None):
+    """Stream the comparison table to a file-like writer."""
+    writer.writelines(iter_comparison_table(data, jobs, schema))
+
+
+def generate_comparison_table(data):
+    """Generate the complete comparison table dynamically based on features."""
+    return "".join(iter_comparison_table(data))
+
+
+def iter_transposed_table(data, schema=None):
+    """
+    Yield the comparison table with projects as rows and features as columns.
+
+    The table grows downwards with every added project instead of
+    sideways. Its cells are those of iter_comparison_table; every feature
+    row is rendered before the first project row can be written.
+    """
+    projects = _table_parts(data)[0]
+    labels = []
+    columns = []
+    for compiled in schema or compile_features(data):
+        label, cells = compiled(data, projects)
+        labels.append(label)
+        columns.append(list(cells))
+
+    yield format_row("Project", labels)
+    yield format_row(":------", [":---:"] * len(labels))
+    rows = zip(*columns) if columns else itertools.repeat(())
+    for project, cells in zip(projects, rows):
+        yield format_row(project_link(project), cells)
 
-    # Generate table
-    table = generate_comparison_table(data)
 
-    # Replace placeholder in template
-    output = template.replace("{{COMPARISON_TABLE}}", table)
+# Inline markdown link or image without a title: [text](url) or ![alt](url)
+_INLINE_LINK = re.compile(r"(!?\[[^\[\]]*\])\(([^()\s]+)\)")
+
+# Separator row of a markdown table, e.g. "| :------- | ----- |"
+_SEPARATOR_ROW = re.compile(r"^\|(?:\s*:?-+:?\s*\|)+\n?$")
+
+
+def compact_table(rows):
+    """
+    Shrink a rendered markdown table without changing how it displays.
+
+    Separator rows are reduced to a single dash per column. URLs used by
+    inline links and images are interned into reference definitions
+    (`[r0]: https://...`) when the references plus the definition are
+    shorter than repeating the URL; the most used URLs get the shortest
+    labels. The definitions follow the table after a blank line. Links
+    with titles or nested brackets are left inline.
+
+    Args:
+        rows: Rendered table rows, each ending with a newline
+
+    Returns:
+        (rows, saved): the compacted rows followed by the reference
+        definitions, and the number of UTF-8 bytes saved
+    """
+    rows = list(rows)
+    counts = {}
+    for row in rows:
+        for match in _INLINE_LINK.finditer(row):
+            counts[match[2]] = counts.get(match[2], 0) + 1
+
+    labels = {}
+    for url, count in sorted(counts.items(), key=lambda item: -item[1]):
+        label = f"r{len(labels)}"
+        size = len(url.encode("utf-8"))
+        if count * size > count * len(label) + len(f"[{label}]: \n") + size:
+            labels[url] = label
+
+    def reference(match):
+        label = labels.get(match[2])
+        return f"{match[1]}[{label}]" if label else match[0]
+
+    compacted = []
+    for row in rows:
+        if _SEPARATOR_ROW.match(row):
+            cells = row.strip().strip("|").split("|")
+            row = "|" + "|".join(re.sub("-+", "-", cell.strip()) for cell in cells)
+            row += "|\n"
+        elif labels:
+            row = _INLINE_LINK.sub(reference, row)
+        compacted.append(row)
+
+    if labels:
+        compacted.append("\n")
+        compacted.extend(f"[{label}]: {url}\n" for url, label in labels.items())
+
+    before = sum(len(row.encode("utf-8")) for row in rows)
+    after = sum(len(row.encode("utf-8")) for row in compacted)
+    return compacted, before - after
+
+
+def iter_layout_table(data, transpose=False, jobs=None, schema=None):
+    """Yield the comparison table, transposed when `transpose` is set."""
+    if transpose:
+        return iter_transposed_table(data, schema)
+    return iter_comparison_table(data, jobs, schema)
+
+
+def _cell_bytes(cell):
+    return len(f"| {cell} ".encode("utf-8"))
+
+
+def project_table_bytes(data, transpose=False, schema=None):
+    """
+    Measure how many bytes each project adds to the rendered table.
+
+    Both layouts are additive: a project adds a column (or a row) whose
+    size does not depend on the other projects, so the size of the table
+    of any subset of projects is `fixed` plus the sizes of its projects.
+
+    Returns:
+        (fixed, sizes): UTF-8 size of the table without any project, and a
+        list with the size each project adds, in project order
+    """
+    projects = _table_parts(data)[0]
+    row_end = len("|\n")
+    if transpose:
+        sizes = [_cell_bytes(project_link(project)) + row_end for project in projects]
+        fixed = 2 * row_end + _cell_bytes("Project") + _cell_bytes(":------")
+    else:
+        # Header cell plus the separator cell of the same width
+        sizes = [2 * _cell_bytes(project_link(project)) for project in projects]
+        fixed = 2 * row_end + _cell_bytes("Feature") + _cell_bytes(":-------")
+
+    for compiled in schema or compile_features(data):
+        label, cells = compiled(data, projects)
+        if transpose:
+            fixed += _cell_bytes(label) + _cell_bytes(":---:")
+        else:
+            fixed += _cell_bytes(label) + row_end
+        for index, cell in enumerate(cells):
+            sizes[index] += _cell_bytes(cell)
+    return fixed, sizes
+
+
+def plan_shards(sizes, fixed=0, max_bytes=None, shard_size=None):
+    """
+    Split projects into consecutive shards.
+
+    A new shard is started when the current one holds `shard_size`
+    projects, or when the next project would take its table past
+    `max_bytes`. A project too big for the budget on its own still gets a
+    shard.
+
+    Args:
+        sizes: Bytes each project adds to a table (see project_table_bytes)
+        fixed: Bytes of a table without projects
+        max_bytes: Size budget of each shard's table
+        shard_size: Maximum projects per shard
+
+    Returns:
+        List of (start, stop) project index ranges; a single range when
+        everything fits
+    """
+    shards = []
+    start = 0
+    total = fixed
+    for index, size in enumerate(sizes):
+        full = shard_size is not None and index - start >= shard_size
+        over = max_bytes is not None and total + size > max_bytes
+        if index > start and (full or over):
+            shards.append((start, index))
+            start = index
+            total = fixed
+        total += size
+    shards.append((start, len(sizes)))
+    return shards
+
+
+# Project fields every project must define
+REQUIRED_FIELDS = frozenset({"name", "repo", "logo_url", "logo_alt"})
+
+
+def heading_anchor(heading):
+    """Convert a markdown heading to its GitHub anchor (e.g., "Web App" → "web-app")."""
+    anchor = "".join(
+        char for char in heading.strip().lower() if char.isalnum() or char in " -_"
+    )
+    return anchor.replace(" ", "-")
+
+
+def load_feature_anchors(filepath="features.md"):
+    """Return the set of heading anchors defined in a markdown file."""
+    anchors = set()
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith("#"):
+                continue
+            anchor = heading_anchor(line.lstrip("#"))
+            # Repeated headings get a numeric suffix, like on GitHub
+            unique, count = anchor, 0
+            while unique in anchors:
+                count += 1
+                unique = f"{anchor}-{count}"
+            anchors.add(unique)
+    return anchors
+
+
+def build_feature_index(features):
+    """
+    Precompute the project keys defined by the features.
+
+    Returns:
+        Dict mapping every feature key and its "_url" variant to the feature
+    """
+    index = {}
+    for feature in features:
+        key = feature_key(feature["name"])
+        index[key] = feature
+        index[f"{key}_url"] = feature
+    return index
+
+
+def iter_validation_errors(data, anchors=None, anchors_file="features.md"):
+    """
+    Yield projects.json validation errors as they are found.
+
+    Projects are walked once against a precomputed feature index. Errors
+    about a single feature or project are yielded immediately; unmapped
+    keys are grouped by key and yielded after the walk.
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+        anchors: Heading anchors of anchors_file; feature links to
+            anchors_file are only checked when given
+        anchors_file: File name feature links must point into
+    """
+    catalog = isinstance(data, (Catalog, SpooledCatalog))
+    if catalog:
+        projects = data.projects
+        features = data.features
+        names = []
+    else:
+        projects = data["projects"]
+        features = data.get("features", [])
+
+    index = build_feature_index(features)
+
+    # Check that feature links point at an existing heading
+    if anchors is not None:
+        prefix = f"{anchors_file}#"
+        for feature in features:
+            link = feature.get("link") or ""
+            if link.startswith(prefix) and link[len(prefix) :] not in anchors:
+                yield (
+                    f"Feature '{feature['name']}' links to missing anchor "
+                    f"'{link}' (no matching heading in {anchors_file})"
+                )
+
+    # Track which projects have which keys
+    unmapped = {}
+    seen_names = {}
+    seen_repos = {}
+
+    for project in projects:
+        project_name = project.get("name", "Unknown")
+
+        # Check for missing required fields
+        missing_fields = REQUIRED_FIELDS - project.keys()
+        if missing_fields:
+            yield f"Project '{project_name}' is missing fields: {missing_fields}"
+
+        # Check for duplicate entries
+        for field, seen in (("name", seen_names), ("repo", seen_repos)):
+            value = project.get(field)
+            if value is None:
+                continue
+            if value in seen:
+                yield (
+                    f"Project '{project_name}' has the same {field} '{value}' "
+                    f"as project '{seen[value]}'"
+                )
+            else:
+                seen[value] = project_name
+
+        if catalog:
+            names.append(project_name)
+            continue
+
+        # Check for undocumented keys
+        for key in project:
+            if key not in index and key not in STANDARD_KEYS:
+                unmapped.setdefault(key, []).append(project_name)
+
+    if catalog:
+        # Columns already group keys, so only the key sets need checking
+        for key in data.extra_keys():
+            if key not in index:
+                unmapped[key] = [names[i] for i in data.key_positions(key)]
+
+    # "*_url" keys need their base feature
+    orphan_urls = {
+        key: projects_with_key
+        for key, projects_with_key in unmapped.items()
+        if key.endswith("_url") and key[: -len("_url")] not in index
+    }
+    for key in orphan_urls:
+        del unmapped[key]
+
+    if unmapped:
+        yield f"Found {len(unmapped)} project key(s) not mapped to any feature:"
+        for key in sorted(unmapped):
+            yield f"  • '{key}' in: {', '.join(unmapped[key])}"
+
+    if orphan_urls:
+        yield f"Found {len(orphan_urls)} url key(s) with no base feature:"
+        for key in sorted(orphan_urls):
+            yield f"  • '{key}' in: {', '.join(orphan_urls[key])}"
+
+
+def validate_projects_json(data, anchors=None, max_errors=None):
+    """
+    Validate the projects.json structure (a raw dict or a Catalog).
+
+    Errors are printed as soon as they are found. Validation stops after
+    max_errors errors when given.
+
+    Raises:
+        ValueError: If any error was found
+    """
+    count = 0
+    for error in iter_validation_errors(data, anchors):
+        if count == 0:
+            print("projects.json validation FAILED:")
+        print(error)
+        count += 1
+        if max_errors is not None and count >= max_errors:
+            print(f"Stopped after {count} error(s)")
+            break
+
+    if count:
+        raise ValueError(f"projects.json validation failed with {count} error(s)")
+
+
+def _feature_anchors_for(json_file):
+    """Return anchors of the features.md next to json_file, or None if absent."""
+    path = os.path.join(os.path.dirname(json_file), "features.md")
+    if os.path.exists(path):
+        return load_feature_anchors(path)
+    return None
+
+
+# Placeholder replaced by the comparison table in readme.tpl
+TABLE_PLACEHOLDER = "{{COMPARISON_TABLE}}"
+
+# {{NAME}} or {{NAME:argument}}; lowercase {{ ... }} (e.g. Liquid) is left alone
+_PLACEHOLDER = re.compile(r"\{\{([A-Z][A-Z0-9_]*)(?::([^{}]*))?\}\}")
+
+# Placeholder name → render(data, argument, context) yielding text
+PLACEHOLDERS = {}
+
+# Placeholder name → check(argument) raising ValueError for bad arguments
+_PLACEHOLDER_CHECKS = {}
+
+# Compiled templates by content hash, see compile_template
+_compiled_templates = {}
+_COMPILED_TEMPLATES_MAX = 32
+
+
+def register_placeholder(name, check=None):
+    """
+    Decorator registering a template placeholder under `name`.
+
+    The decorated function is called as render(data, argument, context)
+    for every {{NAME}} or {{NAME:argument}} in a template (argument is
+    None without a colon) and returns an iterable of text. `context` holds
+    the "schema" from compile_features, "jobs" and the "now" datetime of
+    the render.
+
+    Args:
+        name: Placeholder name used in templates
+        check: Optional check(argument) called when a template is
+            compiled; a ValueError it raises is reported with the
+            placeholder and its line
+    """
+
+    def decorator(render):
+        PLACEHOLDERS[name] = render
+        if check is not None:
+            _PLACEHOLDER_CHECKS[name] = check
+        else:
+            _PLACEHOLDER_CHECKS.pop(name, None)
+        return render
+
+    return decorator
+
+
+def _positive_count(argument):
+    """Placeholder check: the argument, if any, is a whole number above zero."""
+    if argument is not None and not (argument.strip().isdecimal() and int(argument)):
+        raise ValueError(f"expected a number above zero, found {argument!r}")
+
+
+@register_placeholder("COMPARISON_TABLE")
+def _comparison_table_placeholder(data, argument, context):
+    return iter_comparison_table(data, context.get("jobs"), context["schema"])
+
+
+@register_placeholder("FEATURE_TABLE")
+def _feature_table_placeholder(data, argument, context):
+    """Table of the features named in the argument, or in a "group" it names."""
+    wanted = {name.strip() for name in (argument or "").split(",") if name.strip()}
+    schema = [
+        compiled
+        for compiled in context["schema"]
+        if compiled.name in wanted or compiled.feature.get("group") in wanted
+    ]
+    if not schema:
+        return iter_table_header(_table_parts(data)[0])
+    return iter_comparison_table(data, schema=schema)
+
+
+@register_placeholder("PROJECT_COUNT")
+def _project_count_placeholder(data, argument, context):
+    return (str(len(_table_parts(data)[0])),)
+
+
+@register_placeholder("FEATURE_COUNT")
+def _feature_count_placeholder(data, argument, context):
+    return (str(len(context["schema"])),)
+
+
+@register_placeholder("FEATURE_COVERAGE")
+def _feature_coverage_placeholder(data, argument, context):
+    """Table of how many projects have each score feature (not x or missing)."""
+    projects, features, _ = _table_parts(data)
+    total = len(projects) if isinstance(data, dict) else len(data)
+    yield "| Feature | Projects | Coverage |\n| :------- | -------: | -------: |\n"
+    for compiled in context["schema"]:
+        if compiled.processor != "default":
+            continue
+        count = 0
+        for value in iter_project_values(data, feature_key(compiled.name)):
+            if value is not None and str(value).strip().lower() != "x":
+                count += 1
+        coverage = f"{count / total:.0%}" if total else "-"
+        label = feature_label(compiled.name, compiled.feature.get("link"))
+        yield f"| {label} | {count} | {coverage} |\n"
+
+
+@register_placeholder("PROJECT_RANKING", check=_positive_count)
+def _project_ranking_placeholder(data, argument, context):
+    """Projects by weighted total (see catalog_ranking); the argument keeps N."""
+    from catalog_ranking import iter_ranking_table, ranking
+
+    return iter_ranking_table(ranking(data, int(argument) if argument else None))
+
+
+@register_placeholder("SCORE_STATISTICS")
+def _score_statistics_placeholder(data, argument, context):
+    """Table of the ✅/🚧/❌/missing counts and mean value of every score feature."""
+    from catalog_ranking import iter_statistics_table
+
+    return iter_statistics_table(data)
+
+
+@register_placeholder("CLOSEST_ALTERNATIVES", check=_positive_count)
+def _closest_alternatives_placeholder(data, argument, context):
+    """Table of each project's most similar projects; the argument sets how many."""
+    from catalog_similarity import closest_alternatives, iter_alternatives_table
+
+    nearest = closest_alternatives(data, int(argument) if argument else 3)
+    return iter_alternatives_table(_table_parts(data)[0], nearest)
+
+
+@register_placeholder("GENERATED_DATE")
+def _generated_date_placeholder(data, argument, context):
+    """Date of the render, formatted with the strftime argument (default ISO)."""
+    return (context["now"].strftime(argument or "%Y-%m-%d"),)
+
+
+# Stands in for every {{GENERATED_DATE}} while checking, see _masked_dates
+_DATE_MASK = "\0GENERATED_DATE\0"
+
+# Render time used instead of the clock, set by _masked_dates
+_render_time_override = None
+
+
+class _MaskedDate:
+    """Render time whose every formatted date is _DATE_MASK."""
+
+    def strftime(self, format):
+        return _DATE_MASK
+
+
+@contextlib.contextmanager
+def _masked_dates():
+    """Render {{GENERATED_DATE}} as _DATE_MASK, which matches any date."""
+    global _render_time_override
+    previous = _render_time_override
+    _render_time_override = _MaskedDate()
+    try:
+        yield
+    finally:
+        _render_time_override = previous
+
+
+def _render_time():
+    """Return the render time, honouring SOURCE_DATE_EPOCH for reproducible output."""
+    if _render_time_override is not None:
+        return _render_time_override
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.datetime.fromtimestamp(int(epoch), datetime.timezone.utc)
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class CompiledTemplate:
+    """
+    A template parsed into literal and placeholder segments.
+
+    Placeholder arguments are checked while compiling (see
+    register_placeholder); a bad one raises ValueError naming the
+    placeholder and its line.
+
+    Attributes:
+        segments: Literal strings and (name, argument) placeholder tuples,
+            in template order; unknown placeholder names stay literal
+    """
+
+    __slots__ = ("segments",)
+
+    def __init__(self, text, table_placeholder=TABLE_PLACEHOLDER):
+        segments = []
+        # A custom table token is matched before the {{NAME}} placeholders
+        pieces = text.split(table_placeholder)
+        offset = 0
+        for index, piece in enumerate(pieces):
+            if index:
+                segments.append(("COMPARISON_TABLE", None))
+                offset += len(table_placeholder)
+            position = 0
+            for match in _PLACEHOLDER.finditer(piece):
+                if match[1] not in PLACEHOLDERS:
+                    continue
+                check = _PLACEHOLDER_CHECKS.get(match[1])
+                if check is not None:
+                    try:
+                        check(match[2])
+                    except ValueError as error:
+                        line = text.count("\n", 0, offset + match.start()) + 1
+                        raise ValueError(
+                            f"Invalid placeholder {match[0]} on line {line}: {error}"
+                        ) from None
+                segments.append(piece[position : match.start()])
+                segments.append((match[1], match[2]))
+                position = match.end()
+            segments.append(piece[position:])
+            offset += len(piece)
+
+        # Merge adjacent literals and drop empty ones
+        self.segments = []
+        for segment in segments:
+            if isinstance(segment, str):
+                if not segment:
+                    continue
+                if self.segments and isinstance(self.segments[-1], str):
+                    self.segments[-1] += segment
+                    continue
+            self.segments.append(segment)
+
+    def placeholders(self):
+        """Return the (name, argument) of every placeholder, in order."""
+        return [segment for segment in self.segments if not isinstance(segment, str)]
+
+    def table_literals(self):
+        """
+        Return (prefix, suffix) around the table when the template's only
+        placeholder is one plain {{COMPARISON_TABLE}}, else None.
+        """
+        if self.placeholders() != [("COMPARISON_TABLE", None)]:
+            return None
+        index = self.segments.index(("COMPARISON_TABLE", None))
+        return "".join(self.segments[:index]), "".join(self.segments[index + 1 :])
+
+    def iter_render(self, data, schema=None, jobs=None, table=None, now=None):
+        """
+        Yield the rendered template piece by piece.
+
+        Args:
+            data: Dict from load_json, a Catalog or a SpooledCatalog
+            schema: Result of compile_features(data), compiled when omitted
+            jobs: Worker processes for the comparison table
+            table: Already rendered rows to use for {{COMPARISON_TABLE}}
+            now: datetime for {{GENERATED_DATE}} (default: _render_time())
+        """
+        context = {
+            "schema": schema or compile_features(data),
+            "jobs": jobs,
+            "now": now or _render_time(),
+        }
+        repeated = {
+            segment
+            for segment in self.placeholders()
+            if self.placeholders().count(segment) > 1
+        }
+        rendered = {}
+        if table is not None:
+            rendered[("COMPARISON_TABLE", None)] = table
+
+        for segment in self.segments:
+            if isinstance(segment, str):
+                yield segment
+            elif segment in rendered:
+                yield from rendered[segment]
+            elif segment in repeated:
+                # Render placeholders used more than once a single time
+                rendered[segment] = list(
+                    PLACEHOLDERS[segment[0]](data, segment[1], context)
+                )
+                yield from rendered[segment]
+            else:
+                yield from PLACEHOLDERS[segment[0]](data, segment[1], context)
+
+    def render(self, data, writer, **options):
+        """Stream the rendered template to a writer (see iter_render)."""
+        writer.writelines(self.iter_render(data, **options))
+
+
+def compile_template(text, table_placeholder=TABLE_PLACEHOLDER):
+    """
+    Return the CompiledTemplate of a template text.
+
+    Compiled templates are cached by a hash of their content, so the same
+    template is only parsed once per process.
+    """
+    digest = hashlib.sha256(f"{table_placeholder}\0{text}".encode("utf-8")).digest()
+    compiled = _compiled_templates.get(digest)
+    if compiled is None:
+        if len(_compiled_templates) >= _COMPILED_TEMPLATES_MAX:
+            _compiled_templates.clear()
+        compiled = _compiled_templates[digest] = CompiledTemplate(
+            text, table_placeholder
+        )
+    return compiled
+
+
+def shard_file(output_file, number):
+    """Return the file name of shard `number` (from 1) of output_file."""
+    stem, extension = os.path.splitext(output_file)
+    return f"{stem}-{number}{extension}"
+
+
+# Marks the shard pages written by write_sharded_readme, see remove_stale_shards
+SHARD_MARKER = "<!-- Page generated by generate_readme.py -->\n"
+
+
+def remove_stale_shards(output_file, keep=0):
+    """
+    Remove the shard pages of output_file after the first `keep`.
+
+    Pages left over from an earlier sharded run would otherwise linger
+    next to an output_file that no longer links them. Only pages holding
+    SHARD_MARKER are removed, so hand-written files with a shard-like
+    name are kept.
+    """
+    number = keep + 1
+    while os.path.exists(shard_file(output_file, number)):
+        path = shard_file(output_file, number)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            generated = SHARD_MARKER in f.read()
+        if generated:
+            os.remove(path)
+        number += 1
+
+
+def iter_shard_index(projects, shards, files):
+    """Yield a table linking every shard page with the projects it holds."""
+    yield "| Page | Projects |\n| :--- | :------- |\n"
+    for number, ((start, stop), name) in enumerate(zip(shards, files), 1):
+        links = ", ".join(project_link(project) for project in projects[start:stop])
+        yield f"| [Page {number}]({name}) | {links} |\n"
+
+
+def _render_shard_tables(data, shards, transpose, jobs, schema):
+    """Render the table of every shard, in a process pool when jobs > 1."""
+    if not jobs or jobs <= 1 or len(shards) == 1:
+        return [
+            "".join(
+                iter_layout_table(
+                    _select_projects(data, *shard), transpose, schema=schema
+                )
+            )
+            for shard in shards
+        ]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(jobs, len(shards)),
+        initializer=_init_render_worker,
+        initargs=(data, schema or compile_features(data)),
+    ) as executor:
+        starts, stops = zip(*shards)
+        return list(
+            executor.map(_render_shard, starts, stops, [transpose] * len(shards))
+        )
+
+
+def write_sharded_readme(
+    template,
+    data,
+    output_file,
+    shard_size=None,
+    max_bytes=None,
+    transpose=False,
+    jobs=None,
+    schema=None,
+    placeholder=TABLE_PLACEHOLDER,
+):
+    """
+    Render the template with the table split into pages of projects.
+
+    When the table fits in `max_bytes` (and `shard_size` is not exceeded),
+    output_file simply gets the whole table. Otherwise every shard is
+    rendered into its own page (output_file with -1, -2, ... before the
+    extension) from the same template, and output_file gets a table
+    linking the pages instead. Shard pages left over from a previous run
+    with more shards are removed.
+
+    Args:
+        template: Template text
+        data: Dict from load_json or a Catalog (a SpooledCatalog cannot be
+            split)
+        output_file: Path of the index page, or of the whole table
+        shard_size: Maximum projects per page
+        max_bytes: Size budget of each page's table, in UTF-8 bytes
+        transpose: Render projects as rows and features as columns
+        jobs: Render the shards in this many worker processes
+        schema: Result of compile_features(data), compiled when omitted
+        placeholder: Token replaced by the table in the template
+
+    Returns:
+        List of the shard pages written (empty when nothing was sharded)
+    """
+    schema = schema or compile_features(data)
+    compiled = compile_template(template, placeholder)
+    if max_bytes is None and shard_size is None:
+        shards = [(0, len(_table_parts(data)[0]))]
+    else:
+        with stage("plan_shards"):
+            fixed, sizes = project_table_bytes(data, transpose, schema)
+            shards = plan_shards(sizes, fixed, max_bytes, shard_size)
+
+    if len(shards) == 1:
+        table = iter_layout_table(data, transpose, jobs, schema)
+        with AtomicWriter(output_file) as f:
+            compiled.render(data, f, schema=schema, table=list(table))
+        files = []
+    else:
+        with stage("render_shards", shards=len(shards)):
+            tables = _render_shard_tables(data, shards, transpose, jobs, schema)
+        files = [
+            shard_file(output_file, number) for number in range(1, len(shards) + 1)
+        ]
+        index_name = os.path.basename(output_file)
+        for number, (shard, table, path) in enumerate(zip(shards, tables, files), 1):
+            navigation = (
+                f"{SHARD_MARKER}[Index]({index_name}) · "
+                f"Page {number} of {len(shards)}\n\n"
+            )
+            with AtomicWriter(path) as f:
+                compiled.render(
+                    _select_projects(data, *shard),
+                    f,
+                    schema=schema,
+                    table=[navigation, table],
+                )
+
+        links = iter_shard_index(
+            _table_parts(data)[0], shards, [os.path.basename(path) for path in files]
+        )
+        with AtomicWriter(output_file) as f:
+            compiled.render(data, f, schema=schema, table=list(links))
+
+    # Remove the pages of shards that no longer exist
+    remove_stale_shards(output_file, len(files))
+    return files
+
+
+def write_readme(
+    template, data, writer, placeholder=TABLE_PLACEHOLDER, jobs=None, schema=None
+):
+    """
+    Stream a rendered template to a file-like writer.
+
+    The template is compiled with compile_template and its literal parts
+    and placeholders are written in order, so the rendered output is never
+    held whole. `placeholder` is the token replaced by the comparison table
+    (every occurrence, like str.replace); the other {{NAME}} placeholders
+    of PLACEHOLDERS are filled too. With jobs > 1 rows are rendered in a
+    process pool (see iter_comparison_table).
+    """
+    compiled = compile_template(template, placeholder)
+    compiled.render(data, writer, schema=schema, jobs=jobs)
+
+
+def write_templates(data, templates, jobs=None, schema=None):
+    """
+    Render several templates from one data load.
+
+    Args:
+        data: Dict from load_json, a Catalog or a SpooledCatalog
+        templates: Iterable of (template file, output file) pairs
+        jobs: Worker processes for the comparison tables
+        schema: Result of compile_features(data), compiled when omitted
+
+    Returns:
+        List of the output files whose content changed
+    """
+    schema = schema or compile_features(data)
+    now = _render_time()
+    changed = []
+    for template_file, output_file in templates:
+        with open(template_file, "r", encoding="utf-8") as f:
+            compiled = compile_template(f.read())
+        writer = AtomicWriter(output_file)
+        with writer as f:
+            compiled.render(data, f, schema=schema, jobs=jobs, now=now)
+        if writer.changed:
+            changed.append(output_file)
+    return changed
+
+
+class AtomicWriter:
+    """
+    Write a file through a temporary file that replaces it on success.
+
+    Readers never see a half-written file, and when the new content is
+    identical to the existing file the temporary file is discarded, so the
+    file (and its mtime) is left untouched. Use as a context manager; after
+    it exits, `changed` tells whether the file was replaced. On error the
+    existing file is kept.
+
+    Args:
+        path: File to write
+        binary: Open the temporary file in binary mode
+    """
+
+    def __init__(self, path, binary=False):
+        self.path = path
+        self.binary = binary
+        self.changed = False
+        self._file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        directory, name = os.path.split(self.path)
+        fd, self._temp_path = tempfile.mkstemp(
+            prefix=f".{name}.", suffix=".tmp", dir=directory or "."
+        )
+        if self.binary:
+            self._file = os.fdopen(fd, "wb")
+        else:
+            self._file = os.fdopen(fd, "w", encoding="utf-8")
+        return self._file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        if exc_type is not None or self._unchanged():
+            os.unlink(self._temp_path)
+            return
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except OSError:
+            # mkstemp creates 0600 files; use what open() would have used
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(self._temp_path, mode)
+        os.replace(self._temp_path, self.path)
+        self.changed = True
+
+    def _unchanged(self):
+        """Return whether the temporary file has the same content as the file."""
+        try:
+            if os.path.getsize(self.path) != os.path.getsize(self._temp_path):
+                return False
+        except OSError:
+            return False
+        return _file_sha256(self.path) == _file_sha256(self._temp_path)
+
+
+def _matches_masked(expected, current):
+    """Return whether current equals expected, any date standing for _DATE_MASK."""
+    if _DATE_MASK not in expected:
+        return expected == current
+    pattern = "[^\n]*?".join(map(re.escape, expected.split(_DATE_MASK)))
+    return re.fullmatch(pattern, current) is not None
+
+
+def _diff_output(expected, output_file):
+    """
+    Return unified diff lines from output_file to the expected text.
+
+    Dates rendered as _DATE_MASK match whatever date the existing line
+    holds, so an output generated on an earlier day is still up to date.
+    """
+    try:
+        with open(output_file, "r", encoding="utf-8", newline="") as f:
+            current = f.read()
+    except OSError:
+        current = None
+    if current is not None and _matches_masked(expected, current):
+        return []
+
+    current_lines = (current or "").splitlines(keepends=True)
+    expected_lines = expected.splitlines(keepends=True)
+    for index, line in enumerate(expected_lines):
+        if _DATE_MASK not in line:
+            continue
+        if index < len(current_lines) and _matches_masked(line, current_lines[index]):
+            expected_lines[index] = current_lines[index]
+        else:
+            expected_lines[index] = line.replace(_DATE_MASK, "<generated date>")
+    return list(
+        difflib.unified_diff(
+            current_lines,
+            expected_lines,
+            fromfile=output_file,
+            tofile=f"{output_file} (generated)",
+            n=0,
+        )
+    )
+
+
+def check_readme(
+    template, data, output_file, placeholder="{{COMPARISON_TABLE}}", schema=None
+):
+    """
+    Check whether output_file matches the rendered template.
+
+    {{GENERATED_DATE}} placeholders match any date (see _diff_output).
+
+    Returns:
+        List of unified diff lines from output_file to the expected
+        output, empty when the file is up to date
+    """
+    expected = StringIO()
+    with _masked_dates():
+        write_readme(template, data, expected, placeholder, schema=schema)
+    return _diff_output(expected.getvalue(), output_file)
+
+
+def check_outputs(data, template_file, output_file, json_file, **options):
+    """
+    Check output_file, and its shard pages, against a fresh render.
+
+    The outputs are rendered by _render_readme with the same options as
+    the write (compact, rank, layout, logos, ...) into a temporary
+    directory and compared with the existing files. The HTML table,
+    filter index and extra templates are not checked; incremental mode
+    renders the same output as a full render. {{GENERATED_DATE}}
+    placeholders match any date.
+
+    Returns:
+        List of unified diff lines, empty when every file is up to date
+    """
+    for option in ("html_file", "filter_index", "templates", "incremental"):
+        options.pop(option, None)
+    logo_assets = options.get("logo_assets")
+    if logo_assets is not None and not logo_assets.get("base_url"):
+        from logo_assets import DEFAULT_ASSET_DIR
+
+        # Keep the logo paths relative to the real output file
+        directory = logo_assets.get("directory", DEFAULT_ASSET_DIR)
+        base_url = os.path.relpath(directory, os.path.dirname(output_file) or ".")
+        options["logo_assets"] = {**logo_assets, "base_url": base_url}
+
+    directory = os.path.dirname(output_file)
+    differences = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_output = os.path.join(temp_dir, os.path.basename(output_file))
+        with _masked_dates(), contextlib.redirect_stdout(StringIO()):
+            _render_readme(data, template_file, temp_output, json_file, **options)
+        for name in sorted(os.listdir(temp_dir)):
+            if name.startswith("."):
+                continue
+            with open(os.path.join(temp_dir, name), "r", encoding="utf-8") as f:
+                expected = f.read()
+            differences.extend(_diff_output(expected, os.path.join(directory, name)))
+    return differences
+
+
+# Display size of logos and badges in the HTML table. Images are fitted
+# into boxes of this size, so the page layout does not shift as they load.
+HTML_LOGO_SIZE = 50
+HTML_BADGE_WIDTH = 150
+HTML_BADGE_HEIGHT = 20
+
+# Defines toggleWidth() when the page does not (see _includes/head-custom.html)
+_HTML_TOGGLE_SCRIPT = """<script>
+window.toggleWidth = window.toggleWidth || function () {
+  var button = document.querySelector("button[name='toggle-table-width']");
+  var container = document.querySelector("div.container-lg") || button.parentNode;
+  var expand = !container.style.maxWidth;
+  container.style.maxWidth = expand ? "100%" : null;
+  button.textContent = expand ? "Collapse table" : "Expand table";
+};
+</script>
+"""
+
+_IMAGE_TOKEN = re.compile("\0(\\d+)\0")
+
+
+def _html_href(url):
+    """Point relative links to markdown pages at their rendered .html page."""
+    return re.sub(r"^([^:/?#]+)\.md(?=#|$)", r"\1.html", url)
+
+
+def markdown_cell_to_html(text):
+    """
+    Convert a markdown table cell to HTML.
+
+    Handles the inline images and links produced by the row builders;
+    everything else is escaped. Images are lazy-loaded into a box of
+    HTML_BADGE_WIDTH × HTML_BADGE_HEIGHT; badges, whose width depends on
+    their text, keep their size within it and are only shrunk to fit.
+    """
+    images = []
+
+    def image(match):
+        images.append(
+            f'<img src="{html.escape(match[2])}" alt="{html.escape(match[1])}" '
+            f'loading="lazy" width="{HTML_BADGE_WIDTH}" '
+            f'height="{HTML_BADGE_HEIGHT}" style="object-fit: scale-down; '
+            'object-position: left"/>'
+        )
+        return f"\0{len(images) - 1}\0"
+
+    text = _MARKDOWN_IMAGE.sub(image, str(text))
+
+    parts = []
+    position = 0
+    for match in _MARKDOWN_LINK.finditer(text):
+        parts.append(html.escape(text[position : match.start()]))
+        href = html.escape(_html_href(match[2]))
+        parts.append(f'<a href="{href}">{html.escape(match[1])}</a>')
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+
+    return _IMAGE_TOKEN.sub(lambda match: images[int(match[1])], "".join(parts))
+
+
+def iter_html_logo_cells(projects):
+    """Yield the HTML logo cell for each project."""
+    size = HTML_LOGO_SIZE
+    for project in projects:
+        logo_url = html.escape(project["logo_url"])
+        logo_alt = html.escape(project["logo_alt"])
+        if project.get("logo_sprite"):
+            # Set by logo_assets.localize_logos(sprite=True)
+            css_class = html.escape(project["logo_sprite"])
+            yield (
+                f'<span class="logo-sprite {css_class}" role="img" '
+                f'aria-label="{logo_alt}"></span>'
+            )
+            continue
+        yield (
+            f'<img src="{logo_url}" alt="{logo_alt}" loading="lazy" '
+            f'width="{size}" height="{size}" style="object-fit: contain"/>'
+        )
+
+
+def format_html_row(tag, label, cells):
+    """Format a single HTML table row from an HTML label and HTML cells."""
+    row = [f'<tr><{tag} align="left">{label}</{tag}>']
+    row.extend([f"<{tag}>{cell}</{tag}>" for cell in cells])
+    row.append("</tr>\n")
+    return "".join(row)
+
+
+def iter_html_table(data, schema=None, stylesheets=()):
+    """
+    Yield the comparison table as native HTML, one row at a time.
+
+    The table is already wrapped in the div.table-wrapper and preceded by
+    the toggle button that _includes/head-custom.html would otherwise add
+    on page load, so the page needs no markdown table parsing or DOM
+    changes. The fragment is self-contained: it defines toggleWidth()
+    unless the page already does. `schema` is the result of
+    compile_features(data);
+    `stylesheets` are linked before the table (e.g. the logo sprite CSS).
+    """
+    projects = _table_parts(data)[0]
+
+    for href in stylesheets:
+        yield f'<link rel="stylesheet" href="{html.escape(href)}">\n'
+    yield _HTML_TOGGLE_SCRIPT
+    yield (
+        '<button name="toggle-table-width" onclick="toggleWidth()">'
+        "Expand table</button>\n"
+        '<div class="table-wrapper">\n<table>\n<thead>\n'
+    )
+
+    names = []
+    for project in projects:
+        name = html.escape(project["name"])
+        url = html.escape(f"https://github.com/{project['repo']}")
+        names.append(f'<a href="{url}">{name}</a>')
+    yield format_html_row("th", "Feature", names)
+    yield "</thead>\n<tbody>\n"
+
+    for compiled in schema or compile_features(data):
+        label, cells = compiled(data, projects)
+        if compiled.processor == "generate_logo_row":
+            cells = iter_html_logo_cells(projects)
+        else:
+            cells = map(markdown_cell_to_html, cells)
+        yield format_html_row("td", markdown_cell_to_html(label), cells)
+
+    yield "</tbody>\n</table>\n</div>\n"
+
+
+def write_html_file(
+    data,
+    output_file="comparison_table.html",
+    compress=True,
+    schema=None,
+    stylesheets=(),
+):
+    """
+    Write the HTML table to output_file, plus a precompressed .gz companion.
+
+    Both files are written in the same streaming pass. The gzip header
+    carries no timestamp so unchanged tables give identical files.
+    `stylesheets` are linked before the table, see iter_html_table.
+    """
+    with AtomicWriter(output_file) as f:
+        if not compress:
+            f.writelines(iter_html_table(data, schema, stylesheets))
+            return
+        with AtomicWriter(output_file + ".gz", binary=True) as raw, gzip.GzipFile(
+            output_file + ".gz", "wb", fileobj=raw, mtime=0
+        ) as compressed:
+            for row in iter_html_table(data, schema, stylesheets):
+                f.write(row)
+                compressed.write(row.encode("utf-8"))
+
+
+def _digest(*parts):
+    """Return a stable SHA-256 hex digest of JSON-serialisable parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=repr).encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Bump to invalidate every incremental cache, e.g. when rows change in ways
+# the renderer digest cannot see (data files read while rendering)
+RENDER_CACHE_VERSION = 1
+
+
+def _update_code_digest(digest, code):
+    """
+    Feed the bytecode, names and constants of a code object to a digest.
+
+    Unlike marshal output this only depends on the code itself, not on
+    reference counts, so it is stable within and across runs.
+    """
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"):
+            _update_code_digest(digest, constant)
+        elif isinstance(constant, frozenset):
+            # Set order depends on string hash randomization
+            digest.update(repr(sorted(constant, key=repr)).encode("utf-8"))
+        else:
+            digest.update(repr(constant).encode("utf-8"))
+
+
+def _renderer_digest():
+    """
+    Return a digest of the code that renders table rows.
+
+    Covers the functions, methods and plain constants of this module and
+    the registered processors, so a changed cell renderer invalidates the
+    cached rows of incremental mode even when projects.json did not change.
+    """
+    digest = hashlib.sha256(str(RENDER_CACHE_VERSION).encode("utf-8"))
+    module = sys.modules[__name__]
+    functions = []
+    for name, value in sorted(vars(module).items()):
+        if name.startswith("__"):
+            # __file__ and __name__ depend on how the module was loaded
+            continue
+        if isinstance(value, type) and value.__module__ == __name__:
+            functions.extend(
+                (f"{name}.{attribute}", member)
+                for attribute, member in sorted(vars(value).items())
+            )
+        elif type(value) in (str, int, float):
+            digest.update(f"{name}={value!r}".encode("utf-8"))
+        else:
+            functions.append((name, value))
+    functions.extend(
+        (f"processor:{name}", factory) for name, factory in sorted(PROCESSORS.items())
+    )
+    for name, function in functions:
+        function = getattr(function, "__func__", function)
+        code = getattr(function, "__code__", None)
+        if code is not None:
+            digest.update(name.encode("utf-8"))
+            _update_code_digest(digest, code)
+    return digest.hexdigest()
+
+
+def iter_row_hashes(data):
+    """
+    Yield a content hash of the inputs of every table row.
+
+    The first hash covers the header (both header lines), followed by one
+    hash per feature. A row hash only changes when the feature spec or the
+    project values that row reads change.
+    """
+    projects, features, keys = _table_parts(data)
+
+    # Header, logo, badge and license rows only read the standard keys
+    standard_fields = sorted(STANDARD_KEYS)
+    standard = _digest(
+        [[project.get(field) for field in standard_fields] for project in projects]
+    )
+    yield _digest("header", standard)
+
+    everything = None
+    for feature, key in zip(features, keys):
+        processor = feature.get("processor")
+        if processor in _STANDARD_PROCESSORS:
+            yield _digest(feature, standard)
+        elif processor in PROCESSORS:
+            # Other registered processors may read any project value
+            if everything is None:
+                everything = _digest_all_values(data, standard)
+            yield _digest(feature, everything)
+        elif key is not None:
+            yield _digest(feature, data.column_digest(key))
+        else:
+            key = feature_key(feature["name"])
+            url_key = key + "_url"
+            yield _digest(
+                feature,
+                [[project.get(key), project.get(url_key)] for project in projects],
+            )
+
+
+def _digest_all_values(data, standard):
+    """Return a digest of every project value of a dict or Catalog."""
+    if isinstance(data, (Catalog, SpooledCatalog)):
+        keys = sorted(data.extra_keys())
+        return _digest(standard, keys, [data.column_digest(key) for key in keys])
+    return _digest(data["projects"])
+
+
+def _file_sha256(path):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_file(output_file):
+    """Return the incremental cache path used for an output file."""
+    directory, name = os.path.split(output_file)
+    return os.path.join(directory, f".{name}.cache.json")
+
+
+def _read_previous_rows(output_file, cache, prefix, suffix):
+    """
+    Return {row hash: row text} from the previous output, or None.
+
+    The previous output is only trusted when its hash matches the cache, so
+    hand edits to the output fall back to a full render.
+    """
+    try:
+        with open(output_file, "r", encoding="utf-8", newline="") as f:
+            content = f.read()
+    except OSError:
+        return None
+
+    if hashlib.sha256(content.encode("utf-8")).hexdigest() != cache.get("output"):
+        return None
+    if not (content.startswith(prefix) and content.endswith(suffix)):
+        return None
+
+    lines = content[len(prefix) : len(content) - len(suffix)].splitlines(keepends=True)
+    hashes = cache.get("rows", [])
+    if len(lines) != len(hashes) + 1:
+        return None
+
+    # The first row hash covers the two header lines
+    rows = ["".join(lines[:2])] + lines[2:]
+    return dict(zip(hashes, rows))
+
+
+def write_readme_incremental(
+    template,
+    data,
+    output_file,
+    cache_file=None,
+    placeholder="{{COMPARISON_TABLE}}",
+    schema=None,
+):
+    """
+    Regenerate output_file, re-rendering only rows whose inputs changed.
+
+    Row hashes from the previous run are stored in cache_file. Rows whose
+    hash is unchanged are copied from the existing output; the template
+    hash guards the literal parts around the table and the rendering
+    code (see _renderer_digest). Falls back to a full
+    render when the cache or the existing output cannot be trusted, or
+    when the template has other placeholders than one comparison table.
+
+    Returns:
+        Number of table rows rendered (the header counts as one row)
+    """
+    cache_file = cache_file or default_cache_file(output_file)
+    template_hash = _digest(template, placeholder, _renderer_digest())
+    row_hashes = list(iter_row_hashes(data))
+
+    # Rows can only be reused around a single plain table placeholder
+    literal_parts = compile_template(template, placeholder).table_literals()
+    previous_rows = None
+    if literal_parts is not None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = None
+        if cache and cache.get("template") == template_hash:
+            previous_rows = _read_previous_rows(output_file, cache, *literal_parts)
+
+    if previous_rows is None:
+        # Full render
+        with AtomicWriter(output_file) as f:
+            write_readme(template, data, f, placeholder, schema=schema)
+        rendered = len(row_hashes)
+    else:
+        projects = _table_parts(data)[0]
+        schema = schema or compile_features(data)
+        rendered = 0
+        rows = []
+        for index, row_hash in enumerate(row_hashes):
+            row = previous_rows.get(row_hash)
+            if row is None:
+                if index == 0:
+                    row = generate_table_header(projects)
+                else:
+                    row = render_compiled_row(schema[index - 1], data, projects)
+                rendered += 1
+            rows.append(row)
+
+        with AtomicWriter(output_file) as f:
+            f.write(literal_parts[0])
+            f.writelines(rows)
+            f.write(literal_parts[1])
+
+    output_hash = _file_sha256(output_file)
+    with AtomicWriter(cache_file) as f:
+        json.dump(
+            {"template": template_hash, "output": output_hash, "rows": row_hashes}, f
+        )
+
+    return rendered
+
+
+def generate_readme(
+    template_file="readme.tpl",
+    output_file="readme.md",
+    json_file="projects.json",
+    incremental=False,
+    cache_file=None,
+    streaming=False,
+    html_file=None,
+    jobs=None,
+    badge_snapshot=None,
+    logo_assets=None,
+    filter_index=None,
+    templates=(),
+    layout=None,
+    compact=False,
+    snapshot_file=None,
+    rank=None,
+):
+    """
+    Generate README.md from template and JSON data.
+
+    With incremental=True only the rows whose inputs changed since the last
+    incremental run are re-rendered (see write_readme_incremental).
+    With streaming=True the JSON file is spooled to column files with
+    spool_json instead of being loaded whole.
+    With html_file set, the table is also written as native HTML (plus a
+    gzip companion) with write_html_file.
+    With jobs > 1 the table rows are rendered in a process pool.
+    With badge_snapshot set (a dict of badge_snapshot.BadgeFetcher options,
+    possibly empty), badge rows are resolved to static text.
+    With logo_assets set (a dict of logo_assets.localize_logos options,
+    possibly empty), logos are served from a local, downscaled cache.
+    With filter_index set, a compact filter index of the feature scores is
+    written to that path (see catalog_query.filter_index_payload).
+    With templates set to (template file, output file) pairs, those
+    templates are rendered from the same data too (see write_templates).
+    With layout set (a dict of write_sharded_readme options: shard_size,
+    max_bytes, transpose), the table is transposed and/or split into pages.
+    With compact=True the table is shrunk with compact_table and the bytes
+    saved are printed.
+    With snapshot_file set, the validated catalog is read from that binary
+    snapshot while projects.json is unchanged, and the snapshot is rebuilt
+    otherwise (see catalog_snapshot.load_catalog).
+    With rank set (a dict of catalog_ranking.order_by_rank options, possibly
+    empty), the projects are ordered by their weighted total before the
+    table is rendered.
+    """
+    options = dict(
+        incremental=incremental,
+        cache_file=cache_file,
+        html_file=html_file,
+        jobs=jobs,
+        badge_snapshot=badge_snapshot,
+        logo_assets=logo_assets,
+        filter_index=filter_index,
+        templates=templates,
+        layout=layout,
+        compact=compact,
+        rank=rank,
+    )
+
+    if streaming:
+        with stage("spool_json"):
+            spooled = spool_json(json_file)
+        with spooled as data:
+            _render_readme(data, template_file, output_file, json_file, **options)
+        return
+
+    if snapshot_file:
+        from catalog_snapshot import load_catalog
+
+        # The snapshot only ever holds validated data
+        with stage("load_snapshot"):
+            data, _ = load_catalog(json_file, snapshot_file)
+        _render_readme(
+            data, template_file, output_file, json_file, validated=True, **options
+        )
+        return
+
+    # Load data
+    with stage("load_json"):
+        data = load_json(json_file, columnar=True)
+    _render_readme(data, template_file, output_file, json_file, **options)
+
+
+def _render_readme(
+    data,
+    template_file,
+    output_file,
+    json_file,
+    incremental=False,
+    cache_file=None,
+    html_file=None,
+    jobs=None,
+    badge_snapshot=None,
+    logo_assets=None,
+    filter_index=None,
+    templates=(),
+    layout=None,
+    compact=False,
+    validated=False,
+    rank=None,
+):
+    """Validate loaded data, write the rendered templates and the HTML table."""
+    # Read template
+    with open(template_file, "r", encoding="utf-8") as f:
+        template = f.read()
+
+    # Validate data
+    if not validated:
+        with stage("validate"):
+            validate_projects_json(data, anchors=_feature_anchors_for(json_file))
+
+    if rank is not None:
+        from catalog_ranking import order_by_rank
+
+        with stage("rank_projects"):
+            data = order_by_rank(data, **rank)
+
+    if badge_snapshot is not None:
+        from badge_snapshot import snapshot_badges
+
+        with stage("snapshot_badges"):
+            snapshot_badges(data, **badge_snapshot)
+
+    if logo_assets is not None:
+        from logo_assets import DEFAULT_ASSET_DIR, localize_logos
+
+        # Logo paths are written relative to the output file
+        directory = logo_assets.get("directory", DEFAULT_ASSET_DIR)
+        base_url = logo_assets.get("base_url") or os.path.relpath(
+            directory, os.path.dirname(output_file) or "."
+        )
+        with stage("localize_logos"):
+            localize_logos(data, **{"base_url": base_url, **logo_assets})
+
+    # Compile the feature specs once for every output
+    schema = compile_features(data)
+
+    if layout is not None:
+        with stage("write_readme", **layout):
+            write_sharded_readme(
+                template, data, output_file, jobs=jobs, schema=schema, **layout
+            )
+    elif compact:
+        with stage("render_table"):
+            table = iter_comparison_table(data, jobs, schema)
+            table, saved = compact_table(table)
+        with stage("write_readme", compact=True), AtomicWriter(output_file) as f:
+            compile_template(template).render(data, f, schema=schema, table=table)
+        size = sum(len(row.encode("utf-8")) for row in table)
+        print(
+            f"Compact table: {size:,} bytes, {saved:,} bytes saved "
+            f"({saved / (size + saved):.0%})"
+        )
+    elif incremental:
+        with stage("write_readme", incremental=True):
+            write_readme_incremental(
+                template, data, output_file, cache_file, schema=schema
+            )
+    else:
+        # Stream template and table to the output file (through a temporary
+        # file, so an unchanged README is not touched)
+        with stage("write_readme"), AtomicWriter(output_file) as f:
+            write_readme(template, data, f, jobs=jobs, schema=schema)
+    if layout is None:
+        # Pages of an earlier sharded run are no longer linked
+        remove_stale_shards(output_file)
+
+    if templates:
+        with stage("write_templates"):
+            write_templates(data, templates, jobs=jobs, schema=schema)
+
+    if html_file:
+        stylesheets = []
+        if logo_assets is not None:
+            from logo_assets import rebase_logos, sprite_stylesheet
+
+            # The HTML table may live in another directory than output_file
+            html_directory = os.path.dirname(html_file) or "."
+            if not logo_assets.get("base_url"):
+                html_base_url = os.path.relpath(directory, html_directory)
+                rebase_logos(data, base_url, html_base_url.replace(os.sep, "/"))
+            if logo_assets.get("sprite"):
+                css_file = sprite_stylesheet(directory)
+                stylesheets.append(
+                    os.path.relpath(css_file, html_directory).replace(os.sep, "/")
+                )
+        with stage("write_html"):
+            write_html_file(data, html_file, schema=schema, stylesheets=stylesheets)
+
+    if filter_index:
+        from catalog_query import write_filter_index
+
+        with stage("write_filter_index"):
+            write_filter_index(data, filter_index)
+
+
+class ReadmeWatcher:
+    """
+    Keep the catalog resident and regenerate the README when its inputs change.
+
+    The JSON file, the template and the features.md next to the JSON file
+    are polled with os.stat. A burst of saves is folded into one update
+    once the files have been quiet for `debounce` seconds. Only the changed
+    inputs are reloaded, and only the table rows whose inputs changed are
+    re-rendered: the rendered rows of the last update are kept by row hash
+    (see iter_row_hashes), so a template edit re-renders no rows at all.
+
+    Args:
+        template_file: Path to the template
+        output_file: Path of the generated README
+        json_file: Path to projects.json
+        html_file: Also write the HTML table here when the data changes
+        interval: Seconds between polls
+        debounce: Quiet time, in seconds, before a change is rendered
+        placeholder: Placeholder replaced by the table in the template
+    """
+
+    def __init__(
+        self,
+        template_file="readme.tpl",
+        output_file="readme.md",
+        json_file="projects.json",
+        html_file=None,
+        interval=0.05,
+        debounce=0.02,
+        placeholder="{{COMPARISON_TABLE}}",
+    ):
+        self.json_file = json_file
+        self.template_file = template_file
+        self.anchors_file = os.path.join(os.path.dirname(json_file), "features.md")
+        self.output_file = output_file
+        self.html_file = html_file
+        self.interval = interval
+        self.debounce = debounce
+        self.placeholder = placeholder
+
+        self.data = None
+        self.schema = None
+        self.template = None
+        self.anchors = None
+        self._stats = {}
+        self._rows = {}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """Return the set of watched paths changed since the last poll."""
+        changed = set()
+        for path in (self.json_file, self.template_file, self.anchors_file):
+            stat = self._stat(path)
+            if path not in self._stats or self._stats[path] != stat:
+                self._stats[path] = stat
+                changed.add(path)
+        return changed
+
+    def update(self, changed):
+        """
+        Reload the changed inputs and rewrite the outputs.
+
+        The previous data is kept when the new data fails to load or
+        validate.
+
+        Returns:
+            Number of table rows rendered (the header counts as one row)
+
+        Raises:
+            ValueError: If projects.json is not valid JSON or fails validation
+            OSError: If an input cannot be read
+        """
+        # Inputs that failed to load before are read again
+        if self.data is None:
+            changed = changed | {self.json_file, self.anchors_file}
+        if self.template is None:
+            changed = changed | {self.template_file}
+
+        data, schema = self.data, self.schema
+        if self.json_file in changed:
+            with stage("load_json"):
+                data = load_json(self.json_file, columnar=True)
+            schema = None
+
+        if self.anchors_file in changed:
+            self.anchors = _feature_anchors_for(self.json_file)
+
+        if self.json_file in changed or self.anchors_file in changed:
+            with stage("validate"):
+                validate_projects_json(data, anchors=self.anchors)
+
+        if self.template_file in changed:
+            with open(self.template_file, "r", encoding="utf-8") as f:
+                self.template = f.read()
+
+        if schema is None:
+            schema = compile_features(data)
+        self.data, self.schema = data, schema
+
+        # Reuse the rows whose inputs are unchanged since the last update
+        projects = _table_parts(data)[0]
+        rows = {}
+        table = []
+        rendered = 0
+        for index, row_hash in enumerate(iter_row_hashes(data)):
+            row = self._rows.get(row_hash)
+            if row is None:
+                if index == 0:
+                    with stage("render_header"):
+                        row = generate_table_header(projects)
+                else:
+                    row = render_compiled_row(schema[index - 1], data, projects)
+                rendered += 1
+            rows[row_hash] = row
+            table.append(row)
+        self._rows = rows
+
+        compiled = compile_template(self.template, self.placeholder)
+        with stage("write_readme"), AtomicWriter(self.output_file) as f:
+            compiled.render(data, f, schema=schema, table=table)
+        remove_stale_shards(self.output_file)
+
+        if self.html_file and self.json_file in changed:
+            with stage("write_html"):
+                write_html_file(data, self.html_file, schema=schema)
+        return rendered
+
+    def _report_update(self, changed):
+        start = time.perf_counter()
+        try:
+            rendered = self.update(changed)
+        except (OSError, ValueError) as error:
+            print(f"{self.output_file} not regenerated: {error}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"Regenerated {self.output_file} in {elapsed:.1f} ms "
+            f"({rendered} row(s) rendered)"
+        )
+
+    def run(self, stop=None):
+        """
+        Render once, then poll and re-render until `stop` is set.
+
+        Args:
+            stop: threading.Event ending the loop (default: run until
+                interrupted)
+        """
+        stop = stop or threading.Event()
+        changed = self.poll()
+        while not stop.is_set():
+            if changed:
+                # Wait for a burst of saves to settle
+                while not stop.wait(self.debounce):
+                    more = self.poll()
+                    if not more:
+                        break
+                    changed |= more
+                else:
+                    break
+                self._report_update(changed)
+            if stop.wait(self.interval):
+                break
+            changed = self.poll()
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--template", default="readme.tpl", help="Template file")
+    parser.add_argument("--output", default="readme.md", help="Output file")
+    parser.add_argument("--json", default="projects.json", help="Projects JSON file")
+    parser.add_argument(
+        "--template-output",
+        action="append",
+        nargs=2,
+        default=[],
+        metavar=("TEMPLATE", "OUTPUT"),
+        help="Also render TEMPLATE to OUTPUT from the same data; repeatable",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-render rows whose inputs changed since the last incremental run",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only validate the JSON file; exit with status 1 on errors",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check that the output file is up to date; print the differing "
+        "lines and exit with status 1 when it is not",
+    )
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=None,
+        help="Stop validation after this many errors",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="Incremental cache file (default: .<output>.cache.json next to the output)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Render table rows in this many worker processes",
+    )
+    parser.add_argument(
+        "--html",
+        default=None,
+        metavar="PATH",
+        help="Also write the table as native HTML (and PATH.gz)",
+    )
+    parser.add_argument(
+        "--filter-index",
+        default=None,
+        metavar="PATH",
+        help="Also write a compact filter index of the feature scores "
+        "(read by assets/js/filter-index.js)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Shrink the table: minimal separators and reference links for "
+        "repeated URLs",
+    )
+    parser.add_argument(
+        "--rank",
+        action="store_true",
+        help="Order the projects by their weighted total score, weighted by the "
+        'feature "weight" in the JSON file (see catalog_ranking.py)',
+    )
+    parser.add_argument(
+        "--transpose",
+        action="store_true",
+        help="Render projects as rows and features as columns",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=None,
+        metavar="K",
+        help="Split the table into pages of at most K projects, linked from the output",
+    )
+    parser.add_argument(
+        "--max-table-bytes",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Split the table into pages whenever it would exceed N bytes",
+    )
+    parser.add_argument(
+        "--snapshot-badges",
+        action="store_true",
+        help="Write badge values as static text instead of live shields.io images",
+    )
+    parser.add_argument(
+        "--badge-endpoint",
+        default="https://img.shields.io",
+        help="shields.io compatible service used by --snapshot-badges",
+    )
+    parser.add_argument(
+        "--badge-cache",
+        default=".badge_cache.json",
+        help="ETag/TTL cache file used by --snapshot-badges",
+    )
+    parser.add_argument(
+        "--badge-ttl",
+        type=int,
+        default=24 * 60 * 60,
+        help="Seconds a cached badge value is used without revalidation",
+    )
+    parser.add_argument(
+        "--badge-concurrency",
+        type=int,
+        default=8,
+        help="Maximum badge requests in flight",
+    )
+    parser.add_argument(
+        "--local-logos",
+        action="store_true",
+        help="Serve logos from a local content-addressed cache (see logo_assets.py)",
+    )
+    parser.add_argument(
+        "--logo-dir",
+        default=os.path.join("assets", "logos"),
+        help="Directory of the local logo cache",
+    )
+    parser.add_argument(
+        "--logo-source",
+        default=None,
+        metavar="DIR",
+        help="Read logos from this directory instead of downloading them",
+    )
+    parser.add_argument(
+        "--logo-sprite",
+        action="store_true",
+        help="Also pack the logos into a sprite sheet for the HTML table",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PATH",
+        help="Write a Chrome trace of the generation stages to PATH "
+        "(open in chrome://tracing or ui.perfetto.dev) and print a summary",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate whenever projects.json, the template "
+        "or features.md change",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.05,
+        metavar="SECONDS",
+        help="How often --watch checks the files",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        metavar="PATH",
+        help="Read the validated catalog from this binary snapshot while "
+        "projects.json is unchanged (rebuilt when it changes)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Spool the JSON file to column files instead of loading it whole",
+    )
+    return parser.parse_args(argv)
+
+
+def _check_cli(args, **options):
+    """Run --check with the same rendering options as a write."""
+    try:
+        if args.snapshot:
+            from catalog_snapshot import load_catalog
+
+            # The snapshot only ever holds validated data
+            data, _ = load_catalog(args.json, args.snapshot)
+        else:
+            data = load_json(args.json, columnar=True)
+            validate_projects_json(data, anchors=_feature_anchors_for(args.json))
+        differences = check_outputs(
+            data, args.template, args.output, args.json, validated=True, **options
+        )
+    except ValueError as error:
+        # Validation errors are already listed; template errors are not
+        print(error, file=sys.stderr)
+        return 1
+    if not differences:
+        print(f"{args.output} is up to date")
+        return 0
+    sys.stdout.writelines(differences)
+    print(f"\n{args.output} is out of date: run python3 generate_readme.py")
+    return 1
+
+
+def main(argv=None):
+    """Command line entry point."""
+    args = parse_args(argv)
+
+    if args.validate_only:
+        data = load_json(args.json)
+        try:
+            validate_projects_json(
+                data,
+                anchors=_feature_anchors_for(args.json),
+                max_errors=args.max_errors,
+            )
+        except ValueError:
+            return 1
+        print(f"{args.json} is valid")
+        return 0
+
+    if args.watch:
+        watcher = ReadmeWatcher(
+            args.template,
+            args.output,
+            args.json,
+            html_file=args.html,
+            interval=args.watch_interval,
+        )
+        print(f"Watching {args.json}, {args.template} and features.md (Ctrl+C to stop)")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    # Options that need the whole catalog in memory
+    if args.compact and args.incremental:
+        print("--compact cannot be combined with --incremental", file=sys.stderr)
+        return 2
+
+    if args.streaming:
+        for option, value in (
+            ("--local-logos", args.local_logos),
+            ("--filter-index", args.filter_index),
+            ("--shard-size", args.shard_size),
+            ("--max-table-bytes", args.max_table_bytes),
+            ("--snapshot", args.snapshot),
+            ("--rank", args.rank),
+        ):
+            if value:
+                print(f"{option} cannot be combined with --streaming", file=sys.stderr)
+                return 2
+
+    layout = None
+    if args.transpose or args.shard_size or args.max_table_bytes:
+        for option, value in (
+            ("--incremental", args.incremental),
+            ("--compact", args.compact),
+        ):
+            if value:
+                print(
+                    f"{option} cannot be combined with --transpose, --shard-size "
+                    "or --max-table-bytes",
+                    file=sys.stderr,
+                )
+                return 2
+        layout = {
+            "shard_size": args.shard_size,
+            "max_bytes": args.max_table_bytes,
+            "transpose": args.transpose,
+        }
+
+    badge_snapshot = None
+    if args.snapshot_badges:
+        badge_snapshot = {
+            "endpoint": args.badge_endpoint,
+            "cache_file": args.badge_cache,
+            "ttl": args.badge_ttl,
+            "concurrency": args.badge_concurrency,
+        }
+
+    logo_assets = None
+    if args.local_logos:
+        if args.logo_sprite:
+            from logo_assets import Image
+
+            if Image is None:
+                print("--logo-sprite needs Pillow: pip install pillow", file=sys.stderr)
+                return 2
+        logo_assets = {"directory": args.logo_dir, "sprite": args.logo_sprite}
+        if args.logo_source:
+            from logo_assets import directory_fetch
+
+            logo_assets["fetch"] = directory_fetch(args.logo_source)
+
+    if args.check:
+        return _check_cli(
+            args,
+            badge_snapshot=badge_snapshot,
+            logo_assets=logo_assets,
+            layout=layout,
+            compact=args.compact,
+            rank={} if args.rank else None,
+        )
+
+    profiler = StageProfiler() if args.profile else None
+    try:
+        with profiler or contextlib.nullcontext():
+            generate_readme(
+                args.template,
+                args.output,
+                args.json,
+                incremental=args.incremental,
+                cache_file=args.cache,
+                streaming=args.streaming,
+                html_file=args.html,
+                jobs=args.jobs,
+                badge_snapshot=badge_snapshot,
+                logo_assets=logo_assets,
+                filter_index=args.filter_index,
+                templates=args.template_output,
+                layout=layout,
+                compact=args.compact,
+                snapshot_file=args.snapshot,
+                rank={} if args.rank else None,
+            )
+    except ValueError as error:
+        # Validation errors are already listed; template errors are not
+        print(error, file=sys.stderr)
+        return 1
 
-    # Write output
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(output)
+    if profiler is not None:
+        profiler.write_chrome_trace(args.profile)
+        print(profiler.summary())
+        print(f"Wrote trace to {args.profile}")
+    return 0
 
 
 if __name__ == "__main__":
-    generate_readme()
+    # Let helper modules that import generate_readme share this module
+    sys.modules.setdefault("generate_readme", sys.modules[__name__])
+    sys.exit(main())
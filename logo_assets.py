@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Fetch, downscale and sprite the project logos.
+
+generate_logo_row hot-links every project's logo_url, often full-size
+images that are only displayed 50px wide. This module fetches each logo
+once into a content-addressed cache, downsizes raster logos to the
+display size and can pack them into a single sprite sheet, then points
+the projects at the local files.
+
+Downscaling and sprites need Pillow (`pip install pillow`); without it
+logos are cached and served locally at their original size.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import urllib.request
+from io import BytesIO
+
+from generate_readme import HTML_LOGO_SIZE, AtomicWriter, _table_parts
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional
+    Image = None
+
+DEFAULT_ASSET_DIR = os.path.join("assets", "logos")
+
+# Logos are stored at twice the display size for high-DPI screens
+DEFAULT_SCALE = 2
+
+# File name of the sprite sheet inside the cache directory
+SPRITE_NAME = "sprite.png"
+
+# File signatures of the logo formats found in projects.json
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF8", ".gif"),
+    (b"\x00\x00\x01\x00", ".ico"),
+)
+
+
+def urllib_fetch(url, timeout=30):
+    """Fetch a URL (http, https or file) and return its bytes."""
+    request = urllib.request.Request(url, headers={"User-Agent": "generate_readme.py"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def directory_fetch(root):
+    """
+    Return a fetch function that reads logos from a local directory.
+
+    The last path component of each logo URL is looked up in `root`, so a
+    mirror of the logos can stand in for the network.
+    """
+
+    def fetch(url):
+        name = url.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+        with open(os.path.join(root, name), "rb") as f:
+            return f.read()
+
+    return fetch
+
+
+def image_extension(content):
+    """Guess the file extension of image bytes from their signature."""
+    for signature, extension in _SIGNATURES:
+        if content.startswith(signature):
+            return extension
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return ".webp"
+    head = content[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return ".svg"
+    return ".bin"
+
+
+class LogoCache:
+    """
+    Content-addressed store of logo files.
+
+    Files are named after the SHA-256 of their content, so identical logos
+    are stored once and a changed logo never overwrites an old one. An
+    index.json maps every fetched URL to its file so logos are only
+    fetched once.
+
+    Args:
+        directory: Where logos and index.json are kept
+        fetch: Callable taking a URL and returning the image bytes
+        size: Width logos are downscaled to, in pixels (needs Pillow)
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_ASSET_DIR,
+        fetch=urllib_fetch,
+        size=HTML_LOGO_SIZE * DEFAULT_SCALE,
+    ):
+        self.directory = directory
+        self.fetch = fetch
+        self.size = size
+        self.index_file = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _store(self, content, extension):
+        """Write content under its hash and return the file name."""
+        name = hashlib.sha256(content).hexdigest()[:16] + extension
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            # An interrupted write must not leave a truncated logo behind
+            with AtomicWriter(path, binary=True) as f:
+                f.write(content)
+        return name
+
+    def downscale(self, content, extension):
+        """
+        Return (content, extension) of a logo no wider than self.size.
+
+        SVG logos and logos that Pillow cannot read are kept as they are.
+        """
+        if Image is None or extension in (".svg", ".bin"):
+            return content, extension
+        try:
+            with Image.open(BytesIO(content)) as image:
+                image.load()
+                if image.width <= self.size and image.height <= self.size:
+                    return content, extension
+                image.thumbnail((self.size, self.size), Image.LANCZOS)
+                output = BytesIO()
+                image.convert("RGBA").save(output, "PNG", optimize=True)
+        except (OSError, ValueError):
+            return content, extension
+        return output.getvalue(), ".png"
+
+    def get(self, url):
+        """Return the local file name for a logo URL, fetching it if needed."""
+        name = self.index.get(url)
+        if name and os.path.exists(os.path.join(self.directory, name)):
+            return name
+
+        content = self.fetch(url)
+        content, extension = self.downscale(content, image_extension(content))
+        name = self._store(content, extension)
+        self.index[url] = name
+        return name
+
+    def save_index(self):
+        """Write index.json (atomically, so readers never see half a file)."""
+        with AtomicWriter(self.index_file) as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+
+
+def sprite_stylesheet(directory, sprite_name=SPRITE_NAME):
+    """Return the path of the CSS written next to a sprite sheet."""
+    return os.path.join(directory, os.path.splitext(sprite_name)[0] + ".css")
+
+
+def build_sprite(cache, names, sprite_name=SPRITE_NAME, css_file=None):
+    """
+    Pack raster logos into one sprite sheet with a CSS class per logo.
+
+    Logos are placed left to right in cells of cache.size pixels and
+    displayed at half that size, like the hot-linked logos.
+
+    Args:
+        cache: LogoCache holding the logo files
+        names: Logo file names, in the order they are packed
+        sprite_name: File name of the sprite sheet inside cache.directory
+        css_file: Where to write the CSS (default: sprite name with .css)
+
+    Returns:
+        Dict mapping logo file name → CSS class (SVG logos are left out)
+    """
+    if Image is None:
+        raise RuntimeError("Sprites need Pillow: pip install pillow")
+
+    size = cache.size
+    display = size // DEFAULT_SCALE
+    raster = []
+    for name in dict.fromkeys(names):
+        if os.path.splitext(name)[1] not in (".svg", ".bin"):
+            raster.append(name)
+
+    sprite = Image.new("RGBA", (max(1, len(raster)) * size, size), (0, 0, 0, 0))
+    classes = {}
+    rules = [
+        ".logo-sprite { display: inline-block; "
+        f"width: {display}px; height: {display}px; "
+        f"background-image: url({sprite_name}); "
+        f"background-size: {len(raster) * display}px {display}px; }}"
+    ]
+    for slot, name in enumerate(raster):
+        with Image.open(os.path.join(cache.directory, name)) as image:
+            image = image.convert("RGBA")
+            image.thumbnail((size, size), Image.LANCZOS)
+            left = slot * size + (size - image.width) // 2
+            top = (size - image.height) // 2
+            sprite.paste(image, (left, top), image)
+        css_class = f"logo-{os.path.splitext(name)[0]}"
+        classes[name] = css_class
+        rules.append(f".{css_class} {{ background-position: -{slot * display}px 0; }}")
+
+    with AtomicWriter(os.path.join(cache.directory, sprite_name), binary=True) as f:
+        sprite.save(f, "PNG", optimize=True)
+    css_file = css_file or sprite_stylesheet(cache.directory, sprite_name)
+    with AtomicWriter(css_file) as f:
+        f.write("\n".join(rules) + "\n")
+    return classes
+
+
+def localize_logos(data, cache=None, sprite=False, base_url=None, **options):
+    """
+    Point every project's logo_url at a locally cached copy.
+
+    Logos that cannot be fetched keep their remote URL. With sprite=True
+    the projects also get a "logo_sprite" CSS class, used by the HTML
+    table instead of an <img>.
+
+    Args:
+        data: Dict from load_json or a Catalog (projects are updated in
+            place, so a SpooledCatalog is not supported)
+        cache: LogoCache to use; created from `options` when omitted
+        sprite: Also build a sprite sheet (needs Pillow)
+        base_url: URL prefix of the logo files in the output (default:
+            the cache directory, relative to the output)
+        **options: Keyword arguments for LogoCache
+
+    Returns:
+        The LogoCache used
+    """
+    cache = cache or LogoCache(**options)
+    os.makedirs(cache.directory, exist_ok=True)
+    base_url = (base_url or cache.directory.replace(os.sep, "/")).rstrip("/")
+    projects, _, _ = _table_parts(data)
+
+    names = {}
+    for project in projects:
+        url = project.get("logo_url")
+        if not url or url in names:
+            continue
+        try:
+            names[url] = cache.get(url)
+        except (OSError, ValueError, http.client.HTTPException):
+            # Also covers truncated responses (IncompleteRead)
+            names[url] = None
+    cache.save_index()
+
+    classes = {}
+    if sprite:
+        classes = build_sprite(cache, [name for name in names.values() if name])
+
+    for project in projects:
+        name = names.get(project.get("logo_url"))
+        if name is None:
+            continue
+        project["logo_url"] = f"{base_url}/{name}"
+        if name in classes:
+            project["logo_sprite"] = classes[name]
+    return cache
+
+
+def rebase_logos(data, base_url, new_base_url):
+    """
+    Point the logos localized under base_url at new_base_url instead.
+
+    Used when a second output (e.g. the HTML table) lives in another
+    directory than the one the logos were localized for.
+    """
+    base_url = base_url.rstrip("/") + "/"
+    new_base_url = new_base_url.rstrip("/") + "/"
+    for project in _table_parts(data)[0]:
+        url = project.get("logo_url") or ""
+        if url.startswith(base_url):
+            project["logo_url"] = new_base_url + url[len(base_url) :]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Append-only history of every project's feature scores.
+
+Builds a time series per (feature, project) from the git history of
+projects.json, to chart how scores moved:
+
+    python3 score_history.py update
+    python3 score_history.py show object_face_recognition
+    python3 score_history.py show object_face_recognition --project immich-app/immich
+
+The first update reads every commit that changed projects.json; later
+updates only read the commits added since. Points are appended to a
+binary file (.score_history.bin) as fixed-size (commit time, value code)
+records, one contiguous block per series and update, and only when a
+value changes. The JSON index next to it (.score_history.bin.json) lists
+the blocks of every series, so a query reads just the blocks of the
+series it asks for.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import struct
+import subprocess
+import sys
+
+from catalog_changelog import _git, read_revisions
+from generate_readme import AtomicWriter
+
+DEFAULT_HISTORY_FILE = ".score_history.bin"
+
+# Bump when the layout changes; histories of other versions are rebuilt
+VERSION = 1
+
+# Commit time (Unix seconds) and value code of one point
+_POINT = struct.Struct("<qH")
+
+# Value codes are stored in 16 bits; code 0 means "no value"
+_MAX_CODES = 1 << 16
+
+
+def _empty_index():
+    return {
+        "version": VERSION,
+        "head": None,
+        "size": 0,
+        "values": [None],
+        "names": {},
+        "series": {},
+    }
+
+
+class ScoreHistory:
+    """
+    Score history store: an append-only data file and its JSON index.
+
+    The index maps feature key → project repo → {"blocks": [[offset,
+    count], ...], "last": code}, where every block holds `count` points of
+    _POINT at `offset` in the data file. "values" interns the raw values
+    (code → value), "names" the latest name of each repo, "head" the last
+    commit read and "size" the length of the data file the index covers.
+
+    Args:
+        path: Path of the data file; the index is path + ".json"
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = path
+        self.index_file = path + ".json"
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = _empty_index()
+        if self.index.get("version") != VERSION:
+            self.index = _empty_index()
+        self._codes = {
+            json.dumps(value): code for code, value in enumerate(self.index["values"])
+        }
+
+    def _code(self, value):
+        """Return the code of a raw value, interning it if new."""
+        key = json.dumps(value)
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.index["values"])
+            if code >= _MAX_CODES:
+                raise ValueError(f"More than {_MAX_CODES} distinct score values")
+            self.index["values"].append(value)
+            self._codes[key] = code
+        return code
+
+    def update(self, repo_dir=".", path="projects.json", jobs=None):
+        """
+        Append the points of the commits added since the last update.
+
+        The history is rebuilt from scratch when the last commit read is no
+        longer an ancestor of HEAD (e.g. after a rebase).
+
+        Args:
+            repo_dir: Directory inside the git repository
+            path: Path of projects.json relative to the repository root
+            jobs: Worker processes for parsing long ranges
+
+        Returns:
+            Number of commits read
+        """
+        head = _git(repo_dir, "rev-parse", "HEAD").strip()
+        previous = self.index["head"]
+        if previous == head:
+            return 0
+        if previous and not _is_ancestor(previous, head, repo_dir):
+            self.index = _empty_index()
+            self._codes = {json.dumps(None): 0}
+            previous = None
+
+        revision_range = f"{previous}..{head}" if previous else head
+        log = _git(
+            repo_dir, "log", "--reverse", "--format=%H %ct", revision_range, "--", path
+        )
+        commits = [line.split() for line in log.splitlines()]
+        catalogs = read_revisions([sha for sha, _ in commits], path, repo_dir, jobs)
+
+        series = self.index["series"]
+        pending = {}
+        for (_, time), catalog in zip(commits, catalogs):
+            seen = set()
+            for feature in catalog["features"]:
+                column = series.setdefault(feature, {})
+                for repo, project in catalog["projects"].items():
+                    seen.add((feature, repo))
+                    code = self._code(project["values"].get(feature))
+                    entry = column.get(repo)
+                    if code != (entry["last"] if entry else 0):
+                        if entry is None:
+                            entry = column[repo] = {"blocks": [], "last": 0}
+                        pending.setdefault((feature, repo), []).append(
+                            (int(time), code)
+                        )
+                        entry["last"] = code
+            for repo, project in catalog["projects"].items():
+                self.index["names"][repo] = project["name"]
+
+            # Features or projects that disappeared end their series
+            for feature, column in series.items():
+                for repo, entry in column.items():
+                    if entry["last"] and (feature, repo) not in seen:
+                        pending.setdefault((feature, repo), []).append((int(time), 0))
+                        entry["last"] = 0
+
+        self._append(pending)
+        self.index["head"] = head
+        self._save_index()
+        return len(commits)
+
+    def _append(self, pending):
+        """Append one block per series to the data file."""
+        mode = "r+b" if os.path.exists(self.path) else "w+b"
+        with open(self.path, mode) as f:
+            # Drop anything written after the last saved index
+            f.truncate(self.index["size"])
+            f.seek(self.index["size"])
+            for (feature, repo), points in pending.items():
+                offset = f.tell()
+                f.write(b"".join(_POINT.pack(*point) for point in points))
+                block = [offset, len(points)]
+                self.index["series"][feature][repo]["blocks"].append(block)
+            f.flush()
+            os.fsync(f.fileno())
+            self.index["size"] = f.tell()
+
+    def _save_index(self):
+        with AtomicWriter(self.index_file) as f:
+            json.dump(self.index, f, separators=(",", ":"), ensure_ascii=False)
+
+    def _read_blocks(self, f, blocks):
+        values = self.index["values"]
+        points = []
+        for offset, count in blocks:
+            f.seek(offset)
+            content = f.read(count * _POINT.size)
+            points.extend(
+                (time, values[code]) for time, code in _POINT.iter_unpack(content)
+            )
+        return points
+
+    def points(self, feature, repo):
+        """
+        Return the history of one project's feature.
+
+        Returns:
+            List of (commit time, raw value) in time order, one per change;
+            the value is None while the project had no value
+        """
+        entry = self.index["series"].get(feature, {}).get(repo)
+        if entry is None:
+            return []
+        with open(self.path, "rb") as f:
+            return self._read_blocks(f, entry["blocks"])
+
+    def feature(self, feature):
+        """Return repo → points (see points) for every project of a feature."""
+        column = self.index["series"].get(feature, {})
+        if not column:
+            return {}
+        with open(self.path, "rb") as f:
+            return {
+                repo: self._read_blocks(f, entry["blocks"])
+                for repo, entry in column.items()
+            }
+
+    def project(self, repo):
+        """Return feature → points (see points) for every feature of a project."""
+        blocks = {
+            feature: column[repo]["blocks"]
+            for feature, column in self.index["series"].items()
+            if repo in column
+        }
+        if not blocks:
+            return {}
+        with open(self.path, "rb") as f:
+            return {
+                feature: self._read_blocks(f, blocks[feature]) for feature in blocks
+            }
+
+    def name(self, repo):
+        """Return the latest project name of a repo."""
+        return self.index["names"].get(repo, repo)
+
+
+def _is_ancestor(ancestor, revision, repo_dir):
+    result = subprocess.run(
+        ["git", "merge-base", "--is-ancestor", ancestor, revision],
+        cwd=repo_dir,
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+def format_points(points):
+    """Return points as "date value" text, e.g. "2024-05-01 wip-3 → 2024-09-12 8"."""
+    parts = []
+    for time, value in points:
+        date = datetime.datetime.fromtimestamp(time, datetime.timezone.utc)
+        parts.append(f"{date:%Y-%m-%d} {'—' if value is None else value}")
+    return " → ".join(parts)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--history", default=DEFAULT_HISTORY_FILE, help="History data file"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser("update", help="Read new commits into the history")
+    update.add_argument(
+        "--path",
+        default="projects.json",
+        help="Path of projects.json relative to the repository root",
+    )
+    update.add_argument("--jobs", type=int, default=None)
+
+    show = commands.add_parser("show", help="Print the history of a feature")
+    show.add_argument("feature", help="Feature key, e.g. object_face_recognition")
+    show.add_argument("--project", metavar="REPO", help="Only this project")
+    show.add_argument("--format", choices=("text", "json"), default="text")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a history command."""
+    args = parse_args(argv)
+    history = ScoreHistory(args.history)
+
+    if args.command == "update":
+        count = history.update(path=args.path, jobs=args.jobs)
+        print(f"Read {count} new commit(s) into {args.history}")
+        return 0
+
+    if args.project:
+        series = {args.project: history.points(args.feature, args.project)}
+    else:
+        series = history.feature(args.feature)
+    if args.format == "json":
+        print(json.dumps(series, indent=1, ensure_ascii=False))
+        return 0
+    for repo, points in series.items():
+        print(f"{history.name(repo)}: {format_points(points) or 'no history'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
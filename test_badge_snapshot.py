@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Tests for badge_snapshot.py
+"""
+
+import unittest
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from badge_snapshot import (
+    BadgeFetcher,
+    badge_request_url,
+    static_badge_value,
+    collect_badge_urls,
+    snapshot_badges,
+)
+from generate_readme import Catalog, generate_comparison_table
+
+
+class _BadgeHandler(BaseHTTPRequestHandler):
+    """Stand-in for the shields.io JSON endpoint."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.paths.append(self.path)
+        path = self.path.split("?")[0]
+        if "broken" in path:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = f'"{path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps({"label": " ", "value": f"v|{path}"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BadgeServerTestCase(unittest.TestCase):
+    """Run a local badge server for the duration of each test."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _BadgeHandler)
+        self.server.paths = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tempdir.name, "badges.json")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tempdir.cleanup()
+
+    def make_fetcher(self, **options):
+        options.setdefault("endpoint", self.endpoint)
+        options.setdefault("cache_file", self.cache_file)
+        return BadgeFetcher(**options)
+
+
+class TestBadgeUrls(unittest.TestCase):
+    """Test cases for badge URL helpers."""
+
+    def test_request_url(self):
+        """Test that badge images map to the JSON endpoint."""
+        self.assertEqual(
+            badge_request_url(
+                "https://img.shields.io/github/stars/user/app?label=%20",
+                "http://localhost:8000/",
+            ),
+            "http://localhost:8000/github/stars/user/app.json?label=%20",
+        )
+        self.assertIsNone(badge_request_url("https://example.com/badge.svg"))
+
+    def test_static_badge_value(self):
+        """Test that static badges resolve without a request."""
+        self.assertEqual(
+            static_badge_value(
+                "https://img.shields.io/static/v1?label=%20&message=GPL-3.0&color=orange"
+            ),
+            "GPL-3.0",
+        )
+        self.assertIsNone(
+            static_badge_value("https://img.shields.io/github/license/user/app")
+        )
+
+    def test_collect_badge_urls(self):
+        """Test that every badge row of projects.json is collected."""
+        with open("projects.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        urls = collect_badge_urls(data)
+
+        self.assertEqual(len(urls), 5)
+        for row in urls.values():
+            self.assertEqual(len(row), len(data["projects"]))
+
+
+class TestBadgeFetcher(BadgeServerTestCase):
+    """Test cases for the pooled, cached badge fetcher."""
+
+    def test_resolve_values(self):
+        """Test that values come from the endpoint and pipes are escaped."""
+        fetcher = self.make_fetcher()
+
+        values = fetcher.resolve(
+            [
+                "https://img.shields.io/github/stars/user/app?label=%20",
+                "https://img.shields.io/github/stars/user/broken",
+                "https://img.shields.io/static/v1?message=MIT",
+            ]
+        )
+
+        self.assertEqual(
+            values,
+            {
+                "https://img.shields.io/github/stars/user/app?label=%20": (
+                    "v\\|/github/stars/user/app.json"
+                ),
+                "https://img.shields.io/static/v1?message=MIT": "MIT",
+            },
+        )
+
+    def test_ttl_cache_skips_requests(self):
+        """Test that fresh cache entries are used without a request."""
+        urls = [f"https://img.shields.io/github/stars/user/app{i}" for i in range(5)]
+
+        self.make_fetcher().resolve(urls)
+        fetcher = self.make_fetcher()
+        values = fetcher.resolve(urls)
+
+        self.assertEqual(len(values), 5)
+        self.assertEqual(fetcher.requests, 0)
+        self.assertEqual(len(self.server.paths), 5)
+
+    def test_etag_revalidation(self):
+        """Test that expired entries are revalidated with If-None-Match."""
+        url = "https://img.shields.io/github/stars/user/app"
+
+        self.make_fetcher().resolve([url])
+        fetcher = self.make_fetcher(ttl=0)
+        values = fetcher.resolve([url])
+
+        self.assertEqual(fetcher.requests, 1)
+        self.assertEqual(values[url], "v\\|/github/stars/user/app.json")
+
+    def test_save_cache_leaves_no_temporary_files(self):
+        """Test that the cache file is replaced atomically and kept if unchanged."""
+        url = "https://img.shields.io/github/stars/user/app"
+        fetcher = self.make_fetcher()
+        fetcher.resolve([url])
+        fetcher.save_cache()
+        mtime = os.stat(self.cache_file).st_mtime_ns
+        os.utime(self.cache_file, ns=(mtime - 10**9, mtime - 10**9))
+
+        fetcher.save_cache()
+
+        self.assertEqual(os.listdir(self.tempdir.name), ["badges.json"])
+        self.assertEqual(os.stat(self.cache_file).st_mtime_ns, mtime - 10**9)
+        with open(self.cache_file, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+    def test_duplicate_urls_fetched_once(self):
+        """Test that projects sharing a badge share one request."""
+        url = "https://img.shields.io/github/stars/user/app"
+
+        self.make_fetcher(concurrency=2).resolve([url] * 10)
+
+        self.assertEqual(len(self.server.paths), 1)
+
+    def test_snapshot_replaces_badges(self):
+        """Test that snapshot badges render as text in the table."""
+        data = {
+            "projects": [
+                {"name": "App1", "repo": "User/App1"},
+                {"name": "App2", "repo": "user/broken", "license_custom": "MIT"},
+            ],
+            "features": [
+                {
+                    "name": "Github Stars",
+                    "link": "features.md#github-stars",
+                    "processor": "generate_badge_row",
+                    "badge_template": "![?](https://img.shields.io/github/stars/{repo})",
+                    "use_lowercase": True,
+                },
+                {
+                    "name": "License",
+                    "link": "features.md#license",
+                    "processor": "generate_license_row",
+                },
+            ],
+        }
+        catalog = Catalog.from_data(data)
+
+        snapshot_badges(catalog, endpoint=self.endpoint, cache_file=self.cache_file)
+        table = generate_comparison_table(catalog)
+
+        self.assertIn("| v\\|/github/stars/user/app1.json |", table)
+        # Unresolvable badges keep their image
+        self.assertIn("![?](https://img.shields.io/github/stars/user/broken)", table)
+        self.assertIn("| MIT |", table)
+        self.assertIn("| v\\|/github/license/User/App1.json |", table)
+
+
+if __name__ == "__main__":
+    unittest.main()
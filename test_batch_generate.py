@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for batch_generate.py
+"""
+
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+from io import StringIO
+from batch_generate import (
+    directory_catalog,
+    find_catalogs,
+    format_summary,
+    main,
+    render_catalog,
+    run_batch,
+)
+
+
+class BatchTestCase(unittest.TestCase):
+    """Lay out sister catalog directories in a temporary directory."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        with open("readme.md", "r", encoding="utf-8") as f:
+            self.expected = f.read()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_catalog(self, name, bad_key=False):
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory)
+        for file_name in ("readme.tpl", "projects.json", "features.md"):
+            shutil.copy(file_name, directory)
+        if bad_key:
+            json_file = os.path.join(directory, "projects.json")
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["projects"][0]["bad_key"] = "1"
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        return directory
+
+    def read_output(self, directory):
+        with open(os.path.join(directory, "readme.md"), "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class TestBatch(BatchTestCase):
+    """Test rendering several catalogs"""
+
+    def test_find_catalogs(self):
+        """Test that only directories with a projects.json are catalogs"""
+        first = self.make_catalog("foss_a")
+        second = self.make_catalog("foss_b")
+        os.makedirs(os.path.join(self.root, "foss_empty"))
+        self.make_catalog("other")
+
+        catalogs = find_catalogs(
+            [os.path.join(self.root, "foss_*"), os.path.join(self.root, "foss_a")]
+        )
+
+        self.assertEqual(
+            catalogs, [directory_catalog(first), directory_catalog(second)]
+        )
+
+    def test_pool_renders_every_catalog(self):
+        """Test that a process pool renders the same outputs"""
+        directories = [self.make_catalog(f"foss_{i}") for i in range(3)]
+
+        results = run_batch([directory_catalog(d) for d in directories], jobs=2)
+
+        self.assertEqual([result["status"] for result in results], ["ok"] * 3)
+        self.assertEqual([result["name"] for result in results], directories)
+        for directory in directories:
+            self.assertEqual(self.read_output(directory), self.expected)
+        self.assertTrue(all(result["changed"] for result in results))
+        self.assertIn("validate", results[0]["stages"])
+
+        again = run_batch([directory_catalog(d) for d in directories], jobs=1)
+        self.assertFalse(any(result["changed"] for result in again))
+
+    def test_failures_are_reported(self):
+        """Test that invalid and broken catalogs do not stop the others"""
+        invalid = self.make_catalog("invalid", bad_key=True)
+        broken = self.make_catalog("broken")
+        os.remove(os.path.join(broken, "readme.tpl"))
+        valid = self.make_catalog("valid")
+
+        results = run_batch([directory_catalog(d) for d in (invalid, broken, valid)])
+
+        self.assertEqual(
+            [result["status"] for result in results], ["invalid", "failed", "ok"]
+        )
+        self.assertIn("bad_key", results[0]["log"])
+        self.assertTrue(results[1]["error"].startswith("FileNotFoundError"))
+        self.assertFalse(os.path.exists(os.path.join(invalid, "readme.md")))
+
+        summary = format_summary(results, 1.5)
+        self.assertIn(f"{invalid}: projects.json validation failed", summary)
+        self.assertTrue(summary.endswith("3 catalog(s): 1 ok, 2 failed in 1.50s"))
+
+    def test_render_catalog_triple(self):
+        """Test a catalog given as explicit files"""
+        directory = self.make_catalog("files")
+        output_file = os.path.join(self.root, "out.md")
+
+        result = render_catalog(
+            (
+                os.path.join(directory, "readme.tpl"),
+                os.path.join(directory, "projects.json"),
+                output_file,
+            )
+        )
+
+        self.assertEqual((result["status"], result["name"]), ("ok", directory))
+        with open(output_file, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), self.expected)
+
+    def test_cli(self):
+        """Test the exit status and the JSON summary"""
+        valid = self.make_catalog("foss_valid")
+        self.make_catalog("foss_invalid", bad_key=True)
+        summary_file = os.path.join(self.root, "summary.json")
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        sys.stderr = captured_output
+        try:
+            passed = main([valid, "--jobs", "1"])
+            failed = main(
+                ["--glob", os.path.join(self.root, "foss_*"), "--summary", summary_file]
+            )
+            empty = main([])
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+        self.assertEqual((passed, failed, empty), (0, 1, 2))
+        with open(summary_file, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        self.assertEqual(
+            [catalog["status"] for catalog in summary["catalogs"]], ["invalid", "ok"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for benchmark_generate_readme.py
+"""
+
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from benchmark_generate_readme import (
+    compare,
+    main,
+    run_benchmarks,
+    synthetic_catalog,
+)
+from generate_readme import (
+    Catalog,
+    generate_comparison_table,
+    heading_anchor,
+    validate_projects_json,
+)
+
+
+class TestSyntheticCatalog(unittest.TestCase):
+    """Test the synthetic catalog generator"""
+
+    def test_seeded_and_sized(self):
+        """Test that the same seed gives the same catalog of the given size"""
+        data = synthetic_catalog(50, 20, seed=3)
+        self.assertEqual(len(data["projects"]), 50)
+        self.assertEqual(len(data["features"]), 20)
+        self.assertEqual(data, synthetic_catalog(50, 20, seed=3))
+        self.assertNotEqual(data, synthetic_catalog(50, 20, seed=4))
+
+    def test_realistic_values(self):
+        """Test that the catalog mixes every kind of value the real data has"""
+        data = synthetic_catalog(200, 40)
+        values = [
+            value
+            for project in data["projects"]
+            for key, value in project.items()
+            if key.startswith("feature_") and not key.endswith("_url")
+        ]
+        self.assertIn("x", values)
+        self.assertTrue(any(isinstance(value, int) for value in values))
+        self.assertTrue(any(str(value).startswith("wip-") for value in values))
+        self.assertTrue(
+            any(key.endswith("_url") for p in data["projects"] for key in p)
+        )
+        self.assertTrue(any("license_custom" in p for p in data["projects"]))
+
+    def test_catalog_is_valid(self):
+        """Test that synthetic catalogs pass validation and render like real data"""
+        data = synthetic_catalog(60, 30)
+        anchors = {heading_anchor(feature["name"]) for feature in data["features"]}
+        validate_projects_json(data, anchors=anchors)
+        self.assertEqual(
+            generate_comparison_table(Catalog.from_data(data)),
+            generate_comparison_table(data),
+        )
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Test running and comparing benchmarks"""
+
+    def _results(self, seconds, peak_bytes):
+        return {
+            "results": {"real/stage": {"seconds": seconds, "peak_bytes": peak_bytes}}
+        }
+
+    def test_run_benchmarks(self):
+        """Test that every stage reports time and peak memory"""
+        results = run_benchmarks(sizes=["real"], repeat=1)
+        self.assertEqual(
+            sorted(results["results"]),
+            sorted(
+                f"real/{stage}"
+                for stage in (
+                    "score_to_emoji",
+                    "generate_default_row",
+                    "generate_comparison_table",
+                    "validate_projects_json",
+                    "generate_readme",
+                )
+            ),
+        )
+        for result in results["results"].values():
+            self.assertGreater(result["seconds"], 0)
+            self.assertGreater(result["peak_bytes"], 0)
+
+    def test_compare_flags_regressions(self):
+        """Test that time and memory increases beyond the threshold are reported"""
+        baseline = self._results(0.1, 1000)
+        self.assertEqual(compare(self._results(0.12, 1100), baseline, 0.25), [])
+        regressions = compare(self._results(0.2, 2000), baseline, 0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("real/stage", regressions[0])
+        # Tiny stages are not flagged for timer noise
+        self.assertEqual(
+            compare(self._results(0.002, 1000), self._results(0.0001, 1000)), []
+        )
+
+    def test_main_baseline_round_trip(self):
+        """Test saving a baseline and failing against a much faster one"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "baseline.json")
+            argv = ["--size", "real", "--stage", "generate_readme", "--repeat", "1"]
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(main(argv + ["--save", path]), 0)
+
+            with open(path, encoding="utf-8") as f:
+                baseline = json.load(f)
+            result = baseline["results"]["real/generate_readme"]
+            result["seconds"] = result["seconds"] / 1000
+            result["peak_bytes"] = 1
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(baseline, f)
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main(argv + ["--baseline", path]), 1)
+            self.assertIn("regression", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
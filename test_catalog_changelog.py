@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_changelog.py
+"""
+
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+import catalog_changelog
+from catalog_changelog import (
+    GitObjectReader,
+    changelog,
+    diff_catalogs,
+    format_markdown,
+    list_revisions,
+    main,
+    parse_catalog,
+    read_revisions,
+)
+
+
+def _project(name, repo, **keys):
+    return {
+        "name": name,
+        "repo": repo,
+        "logo_url": f"{name}.png",
+        "logo_alt": name,
+        **keys,
+    }
+
+
+FEATURES = [
+    {"name": "Logo", "processor": "generate_logo_row"},
+    {"name": "Web App"},
+    {"name": "Search"},
+]
+
+
+class GitRepoTestCase(unittest.TestCase):
+    """Commit successive versions of projects.json to a temporary repository."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo = self.temp_dir.name
+        self.git("init", "-q")
+        self.versions = [
+            [_project("A", "o/a", web_app="5"), _project("B", "o/b", search="wip-3")],
+            [
+                _project("A", "o/a", web_app="8"),
+                _project("B", "o/b", search="7", search_url="https://b/search"),
+            ],
+            [_project("A2", "o/a", web_app="8"), _project("C", "o/c", web_app="x")],
+        ]
+        self.commits = []
+        for number, projects in enumerate(self.versions):
+            self.commit(projects, f"Version {number}")
+            # Commits that do not touch projects.json are skipped
+            with open(os.path.join(self.repo, "notes.txt"), "a") as f:
+                f.write(f"{number}\n")
+            self.git("add", "notes.txt")
+            self.git("commit", "-q", "-m", f"Notes {number}")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def git(self, *args):
+        return subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+            cwd=self.repo,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    def commit(self, projects, message):
+        with open(os.path.join(self.repo, "projects.json"), "w") as f:
+            json.dump({"projects": projects, "features": FEATURES}, f, indent=2)
+        self.git("add", "projects.json")
+        self.git("commit", "-q", "-m", message)
+        self.commits.append(self.git("rev-parse", "HEAD"))
+
+
+class TestGitObjectReader(GitRepoTestCase):
+    """Test reading blobs through git cat-file --batch"""
+
+    def test_reads_every_revision_through_one_process(self):
+        """Test that blobs of several revisions are read in one session"""
+        with GitObjectReader(self.repo) as reader:
+            contents = [reader.read(sha, "projects.json") for sha in self.commits]
+            missing = reader.read(self.commits[0], "nope.json")
+            directory = reader.read(self.commits[0], "")
+
+        for content, projects in zip(contents, self.versions):
+            self.assertEqual(json.loads(content)["projects"], projects)
+        self.assertIsNone(missing)
+        self.assertIsNone(directory)
+
+    def test_paths_with_spaces(self):
+        """Test that paths with spaces are read, or reported missing"""
+        os.makedirs(os.path.join(self.repo, "my data"))
+        with open(os.path.join(self.repo, "my data", "projects.json"), "w") as f:
+            f.write("{}")
+        self.git("add", "my data")
+        self.git("commit", "-q", "-m", "Spaces")
+
+        with GitObjectReader(self.repo) as reader:
+            present = reader.read("HEAD", "my data/projects.json")
+            missing = reader.read("HEAD", "my data/missing.json")
+            after = reader.read("HEAD", "projects.json")
+
+        self.assertEqual(present, b"{}")
+        self.assertIsNone(missing)
+        self.assertEqual(json.loads(after)["projects"], self.versions[-1])
+
+    def test_list_revisions(self):
+        """Test that only commits changing projects.json are listed"""
+        revisions = list_revisions(self.commits[0], "HEAD", repo_dir=self.repo)
+
+        self.assertEqual([sha for sha, _, _ in revisions], self.commits)
+        self.assertEqual(revisions[1][2], "Version 1")
+
+
+class TestDiff(unittest.TestCase):
+    """Test diffing parsed revisions"""
+
+    def test_changes(self):
+        """Test every kind of change"""
+        old = parse_catalog(
+            json.dumps(
+                {
+                    "projects": [
+                        _project("A", "o/a", web_app="5", search="wip-2"),
+                        _project("B", "o/b", web_app="8", web_app_url="u1"),
+                        _project("Gone", "o/gone"),
+                    ],
+                    "features": FEATURES,
+                }
+            ).encode("utf-8")
+        )
+        new = parse_catalog(
+            json.dumps(
+                {
+                    "projects": [
+                        _project("A", "o/a", web_app="8", search="6", search_url="s"),
+                        _project("Bee", "o/b", web_app="3", web_app_url="u2"),
+                        _project("New", "o/new"),
+                    ],
+                    "features": FEATURES,
+                }
+            ).encode("utf-8")
+        )
+
+        changes = [
+            (
+                change["type"],
+                change["project"],
+                change.get("feature"),
+                change.get("kind"),
+            )
+            for change in diff_catalogs(old, new)
+        ]
+
+        self.assertEqual(
+            changes,
+            [
+                ("score_changed", "A", "web_app", "improved"),
+                ("score_changed", "A", "search", "done"),
+                ("url_added", "A", "search", None),
+                ("project_renamed", "Bee", None, None),
+                ("score_changed", "Bee", "web_app", "regressed"),
+                ("url_changed", "Bee", "web_app", None),
+                ("project_added", "New", None, None),
+                ("project_removed", "Gone", None, None),
+            ],
+        )
+
+    def test_url_feature_is_a_score(self):
+        """Test that a feature whose key ends in _url is diffed as a score"""
+        features = [*FEATURES, {"name": "Homepage URL"}]
+        old, new = (
+            parse_catalog(
+                json.dumps(
+                    {
+                        "projects": [_project("A", "o/a", homepage_url=value)],
+                        "features": features,
+                    }
+                ).encode("utf-8")
+            )
+            for value in ("5", "8")
+        )
+
+        self.assertEqual(old["projects"]["o/a"]["values"], {"homepage_url": "5"})
+        self.assertEqual(
+            [change["type"] for change in diff_catalogs(old, new)], ["score_changed"]
+        )
+
+    def test_file_added(self):
+        """Test that a revision without projects.json diffs as empty"""
+        new = parse_catalog(
+            json.dumps({"projects": [_project("A", "o/a")], "features": []}).encode(
+                "utf-8"
+            )
+        )
+
+        changes = diff_catalogs(parse_catalog(None), new)
+
+        self.assertEqual([change["type"] for change in changes], ["project_added"])
+
+
+class TestChangelog(GitRepoTestCase):
+    """Test changelogs over revision ranges"""
+
+    def test_overall_diff(self):
+        """Test the diff between two revisions"""
+        entries = changelog(self.commits[0], "HEAD", repo_dir=self.repo)
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["from"], self.commits[0])
+        self.assertEqual(entries[0]["subject"], "Notes 2")
+        kinds = sorted((c["type"], c["project"]) for c in entries[0]["changes"])
+        self.assertEqual(
+            kinds,
+            [
+                ("project_added", "C"),
+                ("project_removed", "B"),
+                ("project_renamed", "A2"),
+                ("score_changed", "A2"),
+            ],
+        )
+
+    def test_per_commit(self):
+        """Test one entry per commit that changed projects.json"""
+        entries = changelog(
+            self.commits[0], "HEAD", repo_dir=self.repo, per_commit=True
+        )
+
+        self.assertEqual([entry["to"] for entry in entries], self.commits[1:])
+        markdown = format_markdown(entries)
+        self.assertIn(f"## {self.commits[1][:7]} Version 1 (", markdown)
+        self.assertIn("- **A** · web_app: `5` → `8` (improved)", markdown)
+        self.assertIn("- **B** · search: `wip-3` → `7` (done)", markdown)
+        self.assertIn("- **B** · search: link added <https://b/search>", markdown)
+        self.assertIn("- Renamed **A** to **A2**", markdown)
+
+    def test_per_commit_diffs_against_parent(self):
+        """Test that commits of merged branches report only their own changes"""
+        self.git("checkout", "-q", "-b", "side")
+        side = [_project("A2", "o/a", web_app="9"), _project("C", "o/c", web_app="x")]
+        self.commit(side, "Side")
+        self.git("checkout", "-q", "-")
+        main_projects = [
+            _project("A2", "o/a", web_app="8"),
+            _project("C", "o/c", web_app="3"),
+        ]
+        self.commit(main_projects, "Main")
+        self.git("merge", "-q", "--no-edit", "side")
+
+        entries = changelog(
+            self.commits[2], "HEAD", repo_dir=self.repo, per_commit=True
+        )
+
+        by_commit = {
+            entry["to"]: [(c["project"], c["old"], c["new"]) for c in entry["changes"]]
+            for entry in entries
+        }
+        self.assertEqual(by_commit[self.commits[3]], [("A2", "8", "9")])
+        self.assertEqual(by_commit[self.commits[4]], [("C", "x", "3")])
+        self.assertEqual(len(entries), 3)
+
+    def test_unparsable_revision(self):
+        """Test that invalid JSON names the revision and fails the CLI"""
+        with open(os.path.join(self.repo, "projects.json"), "w") as f:
+            f.write('{"projects": [')
+        self.git("commit", "-q", "-am", "Broken")
+        broken = self.git("rev-parse", "HEAD")
+
+        with self.assertRaisesRegex(ValueError, broken):
+            changelog(self.commits[0], "HEAD", repo_dir=self.repo, per_commit=True)
+
+        captured_output = StringIO()
+        sys.stderr = captured_output
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            status = main([self.commits[0]])
+        finally:
+            os.chdir(cwd)
+            sys.stderr = sys.__stderr__
+
+        self.assertEqual(status, 1)
+        self.assertIn(
+            f"Cannot parse projects.json at {broken}", captured_output.getvalue()
+        )
+
+    def test_parallel_parsing(self):
+        """Test that long ranges parsed in a process pool give the same result"""
+        revisions = self.commits * 6
+        serial = read_revisions(revisions, repo_dir=self.repo, jobs=1)
+
+        previous = catalog_changelog.PARALLEL_REVISIONS
+        catalog_changelog.PARALLEL_REVISIONS = 4
+        try:
+            parallel = read_revisions(revisions, repo_dir=self.repo, jobs=2)
+        finally:
+            catalog_changelog.PARALLEL_REVISIONS = previous
+
+        self.assertEqual(parallel, serial)
+
+    def test_cli(self):
+        """Test the JSON output and the exit status of bad revisions"""
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        sys.stderr = captured_output
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            passed = main([self.commits[1], self.commits[2], "--format", "json"])
+            output = captured_output.getvalue()
+            failed = main(["no-such-revision"])
+        finally:
+            os.chdir(cwd)
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+        self.assertEqual((passed, failed), (0, 1))
+        self.assertEqual(json.loads(output)[0]["to"], self.commits[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_query.py
+"""
+
+import unittest
+import base64
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+from benchmark_generate_readme import synthetic_catalog
+from catalog_query import (
+    CatalogIndex,
+    classify_value,
+    filter_index_payload,
+    iter_bits,
+    main,
+)
+from generate_readme import (
+    Catalog,
+    generate_comparison_table,
+    generate_readme,
+    load_json,
+)
+
+
+def _scan(data, key, accept):
+    """Brute-force reference: indexes of projects whose value is accepted."""
+    return [
+        index
+        for index, project in enumerate(data["projects"])
+        if accept(classify_value(project[key]) if key in project else ("missing", None))
+    ]
+
+
+class TestClassifyValue(unittest.TestCase):
+    """Test value classification"""
+
+    def test_states(self):
+        """Test that raw values map to the same states as score_to_emoji"""
+        self.assertEqual(classify_value("x"), ("x", None))
+        self.assertEqual(classify_value(" X "), ("x", None))
+        self.assertEqual(classify_value("wip-3"), ("wip", 3))
+        self.assertEqual(classify_value("8"), ("score", 8))
+        self.assertEqual(classify_value(10), ("score", 10))
+        self.assertEqual(classify_value("Custom"), ("other", None))
+
+    def test_iter_bits(self):
+        """Test iterating the set bits of a bitset"""
+        self.assertEqual(list(iter_bits(0b101001)), [0, 3, 5])
+        self.assertEqual(list(iter_bits(0)), [])
+
+
+class TestCatalogIndex(unittest.TestCase):
+    """Test indexed queries against brute-force scans"""
+
+    def setUp(self):
+        self.data = synthetic_catalog(300, 12, seed=7)
+        self.index = CatalogIndex(self.data)
+
+    def test_comparisons_match_scans(self):
+        """Test every operator on every feature against a scan"""
+        operators = {
+            "=": lambda a, b: a == b,
+            "!=": lambda a, b: a != b,
+            ">": lambda a, b: a > b,
+            ">=": lambda a, b: a >= b,
+            "<": lambda a, b: a < b,
+            "<=": lambda a, b: a <= b,
+        }
+        for key in self.index.features:
+            for symbol, compare in operators.items():
+                expected = _scan(
+                    self.data,
+                    key,
+                    lambda c: c[0] == "score" and compare(c[1], 7),
+                )
+                self.assertEqual(self.index.query([f"{key}{symbol}7"]), expected)
+
+    def test_states_match_scans(self):
+        """Test state conditions and their negations"""
+        key = "feature_5"
+        for state in ("x", "wip", "missing", "score"):
+            expected = _scan(self.data, key, lambda c: c[0] == state)
+            self.assertEqual(self.index.query([f"{key}={state}"]), expected)
+            negated = _scan(self.data, key, lambda c: c[0] != state)
+            self.assertEqual(self.index.query([f"{key}!={state}"]), negated)
+        self.assertEqual(
+            self.index.query([f"{key}=any"]),
+            _scan(self.data, key, lambda c: c[0] != "missing"),
+        )
+
+    def test_conjunction_and_top(self):
+        """Test combined conditions and top-N ordering"""
+        conditions = ["feature_4>=7", "feature_6!=x"]
+        expected = sorted(
+            set(_scan(self.data, "feature_4", lambda c: c[0] == "score" and c[1] >= 7))
+            & set(_scan(self.data, "feature_6", lambda c: c[0] != "x"))
+        )
+        self.assertEqual(self.index.query(conditions), expected)
+
+        top = self.index.query(conditions, top="feature_7", limit=5)
+        scores = {
+            index: classify_value(self.data["projects"][index].get("feature_7", "x"))
+            for index in expected
+        }
+        ranked = sorted(
+            (index for index in expected if scores[index][0] == "score"),
+            key=lambda index: (-scores[index][1], index),
+        )
+        self.assertEqual(top, ranked[:5])
+
+    def test_iter_ranked(self):
+        """Test that projects are ranked by score, ties in project order"""
+        feature = self.index.feature("feature_7")
+        scored = _scan(self.data, "feature_7", lambda c: c[0] == "score")
+        scores = {
+            index: classify_value(self.data["projects"][index]["feature_7"])[1]
+            for index in scored
+        }
+        ranked = sorted(scored, key=lambda index: (-scores[index], index))
+
+        self.assertEqual(list(feature.iter_ranked(self.index.all)), ranked)
+        odd = sum(1 << index for index in range(1, len(self.data["projects"]), 2))
+        self.assertEqual(
+            list(feature.iter_ranked(odd)), [index for index in ranked if index % 2]
+        )
+
+    def test_invalid_conditions(self):
+        """Test that bad conditions raise ValueError"""
+        for condition in ("nope>3", "feature_4>>3", "feature_4>x", "feature_4=high"):
+            with self.assertRaises(ValueError):
+                self.index.query([condition])
+
+    def test_feature_without_values(self):
+        """Test a feature that no project has a value for"""
+        data = {
+            "projects": [{"name": "A", "repo": "a/a"}],
+            "features": [{"name": "Web App"}],
+        }
+        index = CatalogIndex(data)
+        self.assertEqual(index.query(["web_app=missing"]), [0])
+        self.assertEqual(index.query(["web_app>=1"]), [])
+
+    def test_filtered_table(self):
+        """Test rendering the matching projects as a comparison table"""
+        data = load_json("projects.json")
+        index = CatalogIndex(Catalog.from_data(data))
+        results = index.query(["android_app>=7"])
+        subset = {
+            "projects": [data["projects"][i] for i in results],
+            "features": data["features"],
+        }
+        self.assertEqual(index.table(results), generate_comparison_table(subset))
+
+
+class TestFilterIndex(unittest.TestCase):
+    """Test the compact filter index written for the HTML page"""
+
+    def decode_bits(self, text, count):
+        bits = int.from_bytes(base64.b64decode(text), "little")
+        return [index for index in range(count) if bits >> index & 1]
+
+    def test_payload_matches_queries(self):
+        """Test that decoded vectors and bitsets agree with the index"""
+        data = synthetic_catalog(70, 10, seed=2)
+        index = CatalogIndex(data)
+        payload = filter_index_payload(index)
+
+        self.assertEqual(payload["count"], 70)
+        self.assertEqual(payload["projects"][3], "Project 3")
+        # Only the default score features are indexed, in table order
+        self.assertEqual(
+            [feature["key"] for feature in payload["features"]],
+            [f"feature_{number}" for number in range(4, 10)],
+        )
+        for feature in payload["features"]:
+            key = feature["key"]
+            for name, state in (("yes", "score"), ("wip", "wip"), ("no", "x")):
+                self.assertEqual(
+                    self.decode_bits(feature[name], 70),
+                    index.query([f"{key}={state}"]),
+                )
+            scores = base64.b64decode(feature["scores"])
+            self.assertEqual(len(scores), 70)
+            self.assertEqual(
+                [i for i, score in enumerate(scores) if score != 255 and score >= 7],
+                index.query([f"{key}>=7"]),
+            )
+
+    def test_generate_readme_writes_filter_index(self):
+        """Test writing the filter index next to the README"""
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "filter-index.json")
+            generate_readme(
+                "readme.tpl",
+                os.path.join(tempdir, "readme.md"),
+                "projects.json",
+                filter_index=path,
+            )
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+
+        data = load_json("projects.json")
+        self.assertEqual(
+            payload["projects"], [project["name"] for project in data["projects"]]
+        )
+        self.assertEqual(payload["features"][0]["name"], "Demo")
+
+
+class TestQueryCli(unittest.TestCase):
+    """Test the command line interface"""
+
+    def run_main(self, argv):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            status = main(argv)
+        finally:
+            sys.stdout = sys.__stdout__
+        return status, captured_output.getvalue()
+
+    def test_top_query(self):
+        """Test a top-N query on the real data"""
+        status, output = self.run_main(["--top", "search", "--limit", "2"])
+        self.assertEqual(status, 0)
+        self.assertTrue(output.startswith("Immich: search=9\n"))
+        self.assertIn("2 project(s)", output)
+
+    def test_invalid_query(self):
+        """Test that an invalid query exits with status 1"""
+        status, output = self.run_main(["unknown_feature>3"])
+        self.assertEqual(status, 1)
+        self.assertIn("Unknown feature key", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_ranking.py
+"""
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+import catalog_ranking
+from catalog_ranking import (
+    ScoreMatrix,
+    main,
+    order_by_rank,
+    rank_order,
+    ranking,
+)
+from generate_readme import (
+    Catalog,
+    compile_template,
+    generate_readme,
+    generate_table_header,
+    load_json,
+)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+
+DATA = {
+    "projects": [
+        {"name": "A", "repo": "o/a", "web_app": "5", "search": "x", "albums": "wip-4"},
+        {"name": "B", "repo": "o/b", "web_app": "8", "search": "6"},
+        {"name": "C", "repo": "o/c", "web_app": 8, "search": "4", "albums": "?"},
+    ],
+    "features": [
+        {"name": "Logo", "processor": "generate_logo_row"},
+        {"name": "Web App"},
+        {"name": "Search", "weight": 2},
+        {"name": "Albums", "link": "features.md#albums"},
+    ],
+}
+
+
+class TestScoreMatrix(unittest.TestCase):
+    """Test the totals and statistics of the score matrix"""
+
+    def test_totals(self):
+        """Test feature weights, the x value and the wip factor"""
+        matrix = ScoreMatrix(DATA)
+
+        self.assertEqual(matrix.keys, ["web_app", "search", "albums"])
+        self.assertEqual(matrix.totals(), [7.0, 20.0, 16.0])
+        self.assertEqual(
+            matrix.totals({"search": 0}, x_value=-1, wip_factor=1), [9.0, 8.0, 8.0]
+        )
+
+    def test_unknown_weight(self):
+        """Test that weights of unknown keys are rejected"""
+        with self.assertRaises(ValueError):
+            ScoreMatrix(DATA).totals({"nope": 2})
+
+    def test_statistics(self):
+        """Test the counts and means of every feature"""
+        statistics = ScoreMatrix(DATA).statistics(x_value=1)
+
+        self.assertEqual(
+            statistics[1],
+            {
+                "key": "search",
+                "name": "Search",
+                "done": 2,
+                "wip": 0,
+                "x": 1,
+                "missing": 0,
+                "mean": 11 / 3,
+            },
+        )
+        self.assertEqual(
+            (statistics[2]["wip"], statistics[2]["missing"], statistics[2]["mean"]),
+            (1, 2, 2.0),
+        )
+
+    def test_data_kinds_agree(self):
+        """Test that dicts and catalogs give the same matrix"""
+        data = load_json("projects.json")
+        from_dict = ScoreMatrix(data)
+        from_catalog = ScoreMatrix(Catalog.from_data(data))
+
+        self.assertEqual(from_catalog.totals(), from_dict.totals())
+        self.assertEqual(from_catalog.statistics(), from_dict.statistics())
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_matches_plain_python(self):
+        """Test that the NumPy and plain Python paths agree"""
+        data = Catalog.from_data(load_json("projects.json"))
+        options = {"weights": {"web_app": 3}, "x_value": -0.5, "wip_factor": 0.25}
+        vectorized = ScoreMatrix(data)
+
+        catalog_ranking.numpy = None
+        try:
+            plain = ScoreMatrix(data)
+            plain_results = (
+                plain.totals(**options),
+                plain.statistics(),
+                rank_order(data, **options),
+            )
+        finally:
+            catalog_ranking.numpy = numpy
+
+        self.assertEqual(
+            (
+                vectorized.totals(**options),
+                vectorized.statistics(),
+                rank_order(data, **options),
+            ),
+            plain_results,
+        )
+
+
+class TestRanking(unittest.TestCase):
+    """Test ranking and ordering projects"""
+
+    def test_ties_share_a_rank(self):
+        """Test that equal totals share a rank and keep their order"""
+        ranked = ranking(DATA, weights={"search": 0, "albums": 0})
+
+        self.assertEqual(
+            [(rank, project["name"]) for rank, project, _ in ranked],
+            [(1, "B"), (1, "C"), (3, "A")],
+        )
+        self.assertEqual(len(ranking(DATA, top=1)), 1)
+
+    def test_order_by_rank(self):
+        """Test that dicts and catalogs are reordered the same way"""
+        ordered = order_by_rank(DATA)
+        catalog = order_by_rank(Catalog.from_data(DATA))
+
+        self.assertEqual([p["name"] for p in ordered["projects"]], ["B", "C", "A"])
+        self.assertEqual(catalog.to_data()["projects"], ordered["projects"])
+        self.assertEqual(
+            generate_table_header(catalog.projects),
+            generate_table_header(ordered["projects"]),
+        )
+
+    def test_generate_readme_rank(self):
+        """Test that --rank orders the table columns"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = os.path.join(temp_dir, "readme.md")
+            generate_readme("readme.tpl", output_file, "projects.json", rank={})
+            with open(output_file, "r", encoding="utf-8") as f:
+                generated = f.read()
+
+        first = ranking(load_json("projects.json"), top=1)[0][1]
+        header = generated[generated.index("| Feature") :].splitlines()[0]
+        self.assertTrue(header.startswith(f"| Feature | [{first['name']}]("))
+
+    def test_placeholders(self):
+        """Test the {{PROJECT_RANKING}} and {{SCORE_STATISTICS}} placeholders"""
+        template = compile_template("{{PROJECT_RANKING:2}}\n{{SCORE_STATISTICS}}")
+        output = StringIO()
+
+        template.render(DATA, output)
+
+        self.assertEqual(
+            output.getvalue(),
+            "| Rank | Project | Score |\n"
+            "| ---: | :------ | ----: |\n"
+            "| 1 | [B](https://github.com/o/b) | 20 |\n"
+            "| 2 | [C](https://github.com/o/c) | 16 |\n"
+            "\n"
+            "| Feature | ✅ | 🚧 | ❌ | Missing | Mean |\n"
+            "| :------ | -: | -: | -: | ------: | ---: |\n"
+            "| Web App | 3 | 0 | 0 | 0 | 7 |\n"
+            "| Search | 2 | 0 | 1 | 0 | 3.33 |\n"
+            "| [Albums](features.md#albums) | 0 | 1 | 0 | 2 | 2 |\n",
+        )
+
+
+class TestCli(unittest.TestCase):
+    """Test the ranking report"""
+
+    def run_main(self, *args):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        sys.stderr = captured_output
+        try:
+            result = main(list(args))
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+        return result, captured_output.getvalue()
+
+    def test_json_report(self):
+        """Test the JSON report with a weight override"""
+        result, output = self.run_main("--format", "json", "--weight", "web_app=2")
+
+        report = json.loads(output)
+        self.assertEqual(result, 0)
+        self.assertEqual(report["ranking"][0]["rank"], 1)
+        self.assertEqual(len(report["features"]), len(ScoreMatrix(load_json()).keys))
+
+    def test_markdown_report(self):
+        """Test the markdown report lists the top projects and every feature"""
+        result, output = self.run_main("--top", "3")
+
+        self.assertEqual(result, 0)
+        self.assertIn("| 3 | [", output)
+        self.assertNotIn("| 4 | [", output)
+        self.assertIn("| Feature | ✅ | 🚧 | ❌ | Missing | Mean |", output)
+
+    def test_unknown_weight(self):
+        """Test that weights of unknown features exit with status 2"""
+        result, output = self.run_main("--weight", "nope=2")
+
+        self.assertEqual(result, 2)
+        self.assertIn("Unknown feature key(s): nope", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_similarity.py
+"""
+
+import unittest
+import json
+import math
+import sys
+from io import StringIO
+import catalog_ranking
+import catalog_similarity
+from catalog_ranking import ScoreMatrix
+from catalog_similarity import (
+    SimilarityIndex,
+    closest_alternatives,
+    cluster_projects,
+    main,
+    similarity_index,
+)
+from generate_readme import Catalog, compile_template, load_json
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+
+DATA = {
+    "projects": [
+        {"name": "A", "repo": "o/a", "web_app": "8", "search": "6"},
+        {"name": "B", "repo": "o/b", "web_app": "4", "search": "3"},
+        {"name": "C", "repo": "o/c", "web_app": "8", "albums": "5"},
+        {"name": "D", "repo": "o/d", "albums": "2"},
+    ],
+    "features": [
+        {"name": "Logo", "processor": "generate_logo_row"},
+        {"name": "Web App"},
+        {"name": "Search"},
+        {"name": "Albums"},
+    ],
+}
+
+
+def _as_lists(matrix):
+    return [[round(value, 9) for value in row] for row in matrix]
+
+
+class TestSimilarity(unittest.TestCase):
+    """Test the similarity metrics"""
+
+    def test_cosine_compares_shared_features(self):
+        """Test that only features both projects have are compared"""
+        matrix = _as_lists(SimilarityIndex(ScoreMatrix(DATA)).matrix())
+
+        self.assertEqual(matrix[0][1], 1.0)
+        # A and C only share web_app
+        self.assertEqual(matrix[0][2], 1.0)
+        # A and D share nothing
+        self.assertEqual(matrix[0][3], 0.0)
+        self.assertEqual(matrix[2][3], 1.0)
+
+    def test_weighted_distance(self):
+        """Test the weighted root mean square difference"""
+        index = SimilarityIndex(ScoreMatrix(DATA), "distance", weights={"search": 3})
+        matrix = _as_lists(index.matrix())
+
+        distance = math.sqrt((16 + 3 * 9) / 4)
+        self.assertEqual(matrix[0][1], round(1 / (1 + distance), 9))
+        self.assertEqual(matrix[0][2], 1.0)
+        self.assertEqual(matrix[1][3], 0.0)
+
+    def test_unknown_metric(self):
+        """Test that unknown metrics are rejected"""
+        with self.assertRaises(ValueError):
+            SimilarityIndex(ScoreMatrix(DATA), "euclid")
+
+    def test_full_matrix_limit(self):
+        """Test that the full matrix is refused for large catalogs"""
+        previous = catalog_similarity.FULL_MATRIX_LIMIT
+        catalog_similarity.FULL_MATRIX_LIMIT = 3
+        try:
+            with self.assertRaises(ValueError):
+                SimilarityIndex(ScoreMatrix(DATA)).matrix()
+        finally:
+            catalog_similarity.FULL_MATRIX_LIMIT = previous
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_matches_plain_python(self):
+        """Test that the NumPy and plain Python paths agree"""
+        data = load_json("projects.json")
+        results = []
+        for module in (numpy, None):
+            catalog_ranking.numpy = catalog_similarity.numpy = module
+            try:
+                for metric in ("cosine", "distance"):
+                    index = SimilarityIndex(ScoreMatrix(data), metric, x_value=-1)
+                    results.append((_as_lists(index.matrix()), index.nearest(4)))
+            finally:
+                catalog_ranking.numpy = catalog_similarity.numpy = numpy
+
+        for vectorized, plain in zip(results[:2], results[2:]):
+            self.assertEqual(vectorized[0], plain[0])
+            self.assertEqual(
+                [[i for i, _ in row] for row in vectorized[1]],
+                [[i for i, _ in row] for row in plain[1]],
+            )
+
+
+class TestNearest(unittest.TestCase):
+    """Test the closest alternatives"""
+
+    def test_ties_resolve_to_catalog_order(self):
+        """Test the order of alternatives and that k is capped"""
+        nearest = SimilarityIndex(ScoreMatrix(DATA)).nearest(10)
+
+        self.assertEqual([index for index, _ in nearest[0]], [1, 2, 3])
+        self.assertEqual([index for index, _ in nearest[3]], [2, 0, 1])
+
+    def test_blocks_match_full_matrix(self):
+        """Test that blocked top-k gives the same result as the full matrix"""
+        data = load_json("projects.json")
+        full = SimilarityIndex(ScoreMatrix(data))
+        full.matrix()
+
+        previous = catalog_similarity.BLOCK_CELLS
+        catalog_similarity.BLOCK_CELLS = 40
+        try:
+            blocked = SimilarityIndex(ScoreMatrix(data))
+            blocked_nearest = blocked.nearest(3)
+        finally:
+            catalog_similarity.BLOCK_CELLS = previous
+
+        self.assertIsNone(blocked._matrix)
+        self.assertEqual(blocked_nearest, full.nearest(3))
+
+    def test_index_cache(self):
+        """Test that indexes are shared by equal catalogs and options"""
+        first = similarity_index(DATA)
+
+        self.assertIs(similarity_index(Catalog.from_data(DATA)), first)
+        self.assertIsNot(similarity_index(DATA, "distance"), first)
+        self.assertIsNot(similarity_index(DATA, x_value=1), first)
+        changed = {**DATA, "projects": DATA["projects"][:3]}
+        self.assertIsNot(similarity_index(changed), first)
+
+    def test_index_cache_hit_skips_matrix(self):
+        """Test that a cached index is returned without building a ScoreMatrix"""
+        first = similarity_index(DATA, "distance")
+        previous = catalog_similarity.ScoreMatrix
+
+        def fail(data):
+            raise AssertionError("ScoreMatrix built on a cache hit")
+
+        catalog_similarity.ScoreMatrix = fail
+        try:
+            cached = similarity_index(Catalog.from_data(DATA), "distance")
+        finally:
+            catalog_similarity.ScoreMatrix = previous
+
+        self.assertIs(cached, first)
+
+    def test_clusters(self):
+        """Test single linkage clusters above a threshold"""
+        clusters = cluster_projects(DATA, threshold=0.99)
+
+        self.assertEqual(clusters, [[0, 1, 2, 3]])
+        clusters = cluster_projects(DATA, threshold=0.99, metric="distance")
+        self.assertEqual(clusters, [[0, 2], [1], [3]])
+
+    def test_placeholder(self):
+        """Test the {{CLOSEST_ALTERNATIVES}} placeholder"""
+        output = StringIO()
+
+        compile_template("{{CLOSEST_ALTERNATIVES:1}}").render(DATA, output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "| Project | Closest alternatives |")
+        self.assertEqual(
+            lines[2],
+            "| [A](https://github.com/o/a) | [B](https://github.com/o/b) (1.00) |",
+        )
+        self.assertEqual(len(lines), 6)
+
+
+class TestCli(unittest.TestCase):
+    """Test the similarity report"""
+
+    def run_main(self, *args):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        sys.stderr = captured_output
+        try:
+            result = main(list(args))
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+        return result, captured_output.getvalue()
+
+    def test_project_alternatives(self):
+        """Test the JSON alternatives of one project"""
+        result, output = self.run_main(
+            "--project", "Immich", "-k", "2", "--format", "json"
+        )
+
+        report = json.loads(output)
+        self.assertEqual(result, 0)
+        self.assertEqual(list(report), ["Immich"])
+        self.assertEqual(len(report["Immich"]), 2)
+        data = load_json("projects.json")
+        names = [project["name"] for project in data["projects"]]
+        expected = closest_alternatives(data, 2)[names.index("Immich")]
+        self.assertEqual(
+            [
+                (alternative["name"], alternative["similarity"])
+                for alternative in report["Immich"]
+            ],
+            [(names[index], similarity) for index, similarity in expected],
+        )
+
+    def test_clusters(self):
+        """Test the markdown cluster report"""
+        result, output = self.run_main("--clusters", "--threshold", "0.5")
+
+        self.assertEqual(result, 0)
+        self.assertTrue(output.startswith("1. ["))
+        self.assertIn("project(s) without a similar project", output)
+
+    def test_unknown_project(self):
+        """Test that unknown projects exit with status 2"""
+        result, output = self.run_main("--project", "Nope")
+
+        self.assertEqual(result, 2)
+        self.assertIn("Unknown project 'Nope'", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_snapshot.py
+"""
+
+import unittest
+import ast
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from io import StringIO
+import catalog_snapshot
+from catalog_snapshot import (
+    NO_SCORE,
+    CatalogSnapshot,
+    load_catalog,
+    score_matrix,
+    source_digest,
+    write_score_matrix,
+    write_snapshot,
+)
+from generate_readme import (
+    Catalog,
+    generate_comparison_table,
+    generate_readme,
+    iter_row_hashes,
+    load_json,
+)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+
+class SnapshotTestCase(unittest.TestCase):
+    """Copy projects.json and features.md into a temporary directory."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.json_file = os.path.join(self.temp_dir.name, "projects.json")
+        self.snapshot_file = os.path.join(self.temp_dir.name, ".catalog.snapshot")
+        shutil.copy("projects.json", self.json_file)
+        shutil.copy("features.md", self.temp_dir.name)
+        self.data = load_json("projects.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+
+class TestSnapshotFormat(SnapshotTestCase):
+    """Test writing and reading snapshots"""
+
+    def test_round_trip(self):
+        """Test that a snapshot rebuilds the same catalog"""
+        write_snapshot(self.data, self.snapshot_file, b"\0" * 32, b"\0" * 32)
+        with CatalogSnapshot(self.snapshot_file) as snapshot:
+            catalog = snapshot.to_catalog()
+
+        expected = Catalog.from_data(self.data)
+        self.assertEqual(catalog.to_data(), expected.to_data())
+        self.assertEqual(
+            list(iter_row_hashes(catalog)), list(iter_row_hashes(expected))
+        )
+        self.assertEqual(
+            generate_comparison_table(catalog), generate_comparison_table(self.data)
+        )
+
+    def test_columns_are_memoryviews(self):
+        """Test that column codes are read from the mapped file"""
+        data = {
+            "projects": [
+                {"name": "A", "repo": "a/a", "web_app": "8", "web_app_url": "u"},
+                {"name": "B", "repo": "b/b", "web_app": 7},
+                {"name": "C", "repo": "c/c"},
+            ],
+            "features": [{"name": "Web App"}],
+        }
+        write_snapshot(data, self.snapshot_file, b"\1" * 32)
+
+        with CatalogSnapshot(self.snapshot_file) as snapshot:
+            codes = snapshot.codes("web_app")
+            self.assertIsInstance(codes, memoryview)
+            self.assertEqual(codes.tolist(), [1, 2, 0])
+            codes.release()
+            self.assertEqual(snapshot.values("web_app"), [None, "8", 7])
+            self.assertEqual(snapshot.values("web_app_url", "-"), ["-", "u"])
+            self.assertEqual(snapshot.project_count, 3)
+            self.assertEqual(snapshot.source, b"\1" * 32)
+            self.assertEqual(snapshot.features, [{"name": "Web App"}])
+            self.assertEqual(
+                sorted(snapshot.keys), ["name", "repo", "web_app", "web_app_url"]
+            )
+
+    def test_wide_codes(self):
+        """Test columns with more than 255 distinct values"""
+        data = {
+            "projects": [{"name": f"P{i}", "repo": f"o/p{i}"} for i in range(300)],
+            "features": [],
+        }
+        write_snapshot(data, self.snapshot_file, b"\0" * 32)
+
+        with CatalogSnapshot(self.snapshot_file) as snapshot:
+            codes = snapshot.codes("name")
+            self.assertEqual(codes.format, "H")
+            self.assertEqual(codes[299], 300)
+            codes.release()
+            self.assertEqual(snapshot.to_catalog().projects[299]["name"], "P299")
+
+    def test_not_a_snapshot(self):
+        """Test that other files are rejected"""
+        with open(self.snapshot_file, "wb") as f:
+            f.write(b"not a snapshot" * 20)
+
+        with self.assertRaises(ValueError):
+            CatalogSnapshot(self.snapshot_file)
+
+
+class TestLoadCatalog(SnapshotTestCase):
+    """Test the snapshot cache of projects.json"""
+
+    def test_snapshot_is_reused_until_json_changes(self):
+        """Test that the snapshot is keyed by the JSON file digest"""
+        first, cached = load_catalog(self.json_file, self.snapshot_file)
+        self.assertFalse(cached)
+        second, cached = load_catalog(self.json_file, self.snapshot_file)
+        self.assertTrue(cached)
+        self.assertEqual(second.to_data(), first.to_data())
+
+        self.data["projects"][0]["search"] = "wip-1"
+        with open(self.json_file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        third, cached = load_catalog(self.json_file, self.snapshot_file)
+        self.assertFalse(cached)
+        self.assertEqual(third.columns["search"].value(0), "wip-1")
+        with CatalogSnapshot(self.snapshot_file) as snapshot:
+            self.assertEqual(snapshot.source, source_digest(self.json_file))
+
+    def test_anchor_changes_revalidate(self):
+        """Test that a changed features.md invalidates the snapshot"""
+        load_catalog(self.json_file, self.snapshot_file)
+        features_file = os.path.join(self.temp_dir.name, "features.md")
+        with open(features_file, "a", encoding="utf-8") as f:
+            f.write("\n## Another Heading\n")
+
+        _, cached = load_catalog(self.json_file, self.snapshot_file)
+
+        self.assertFalse(cached)
+
+    def test_validator_changes_revalidate(self):
+        """Test that a snapshot validated by other code is rebuilt"""
+        load_catalog(self.json_file, self.snapshot_file)
+        previous = catalog_snapshot.validator_digest
+        catalog_snapshot.validator_digest = lambda: b"\1" * 32
+        try:
+            _, cached = load_catalog(self.json_file, self.snapshot_file)
+        finally:
+            catalog_snapshot.validator_digest = previous
+
+        self.assertFalse(cached)
+
+    def test_truncated_snapshot_is_rebuilt(self):
+        """Test that a truncated snapshot falls back to the JSON"""
+        expected, _ = load_catalog(self.json_file, self.snapshot_file)
+        with open(self.snapshot_file, "rb") as f:
+            content = f.read()
+
+        for size in (0, 10, len(content) // 3, len(content) - 3):
+            with open(self.snapshot_file, "wb") as f:
+                f.write(content[:size])
+            catalog, cached = load_catalog(self.json_file, self.snapshot_file)
+            self.assertFalse(cached)
+            self.assertEqual(catalog.to_data(), expected.to_data())
+            with open(self.snapshot_file, "rb") as f:
+                self.assertEqual(f.read(), content)
+
+    def test_invalid_data_is_not_snapshotted(self):
+        """Test that validation errors raise and leave no snapshot"""
+        self.data["projects"][0]["bad_key"] = "1"
+        with open(self.json_file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            with self.assertRaises(ValueError):
+                load_catalog(self.json_file, self.snapshot_file)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        self.assertFalse(os.path.exists(self.snapshot_file))
+
+    def test_generate_readme_from_snapshot(self):
+        """Test that the README rendered from a snapshot is unchanged"""
+        output_file = os.path.join(self.temp_dir.name, "readme.md")
+        for _ in range(2):
+            generate_readme(
+                "readme.tpl",
+                output_file,
+                self.json_file,
+                snapshot_file=self.snapshot_file,
+            )
+            with open(output_file, "r", encoding="utf-8") as f:
+                generated = f.read()
+            with open("readme.md", "r", encoding="utf-8") as f:
+                self.assertEqual(generated, f.read())
+
+
+class TestScoreMatrix(SnapshotTestCase):
+    """Test the .npy score matrix export"""
+
+    def setUp(self):
+        super().setUp()
+        self.npy_file = os.path.join(self.temp_dir.name, "scores.npy")
+
+    def _read_npy(self):
+        with open(self.npy_file, "rb") as f:
+            content = f.read()
+        (size,) = struct.unpack_from("<H", content, 8)
+        header = ast.literal_eval(content[10 : 10 + size].decode("latin-1"))
+        return content[:8], (10 + size), header, content[10 + size :]
+
+    def test_score_matrix(self):
+        """Test that only plain scores are kept"""
+        data = {
+            "projects": [
+                {"name": "A", "repo": "a/a", "web_app": "8", "search": "x"},
+                {"name": "B", "repo": "b/b", "web_app": "wip-3", "search": 5},
+            ],
+            "features": [
+                {"name": "Logo", "processor": "generate_logo_row"},
+                {"name": "Web App"},
+                {"name": "Search"},
+            ],
+        }
+
+        keys, rows = score_matrix(data)
+
+        self.assertEqual(keys, ["web_app", "search"])
+        self.assertEqual(rows, [[8, NO_SCORE], [NO_SCORE, 5]])
+
+    def test_npy_layout(self):
+        """Test the .npy header, alignment and data"""
+        write_score_matrix(self.data, self.npy_file)
+        keys, rows = score_matrix(self.data)
+
+        magic, data_start, header, content = self._read_npy()
+        self.assertEqual(magic, b"\x93NUMPY\x01\x00")
+        self.assertEqual(data_start % 64, 0)
+        self.assertEqual(
+            header,
+            {"descr": "|i1", "fortran_order": False, "shape": (17, len(keys))},
+        )
+        self.assertEqual(
+            list(struct.unpack(f"<{len(content)}b", content)), sum(rows, [])
+        )
+        with open(self.npy_file + ".json", "r", encoding="utf-8") as f:
+            labels = json.load(f)
+        self.assertEqual(labels["features"], keys)
+        self.assertEqual(labels["projects"][0], self.data["projects"][0]["name"])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_loads_matrix(self):
+        """Test that numpy reads the exported matrix"""
+        write_score_matrix(self.data, self.npy_file)
+
+        matrix = numpy.load(self.npy_file)
+
+        self.assertEqual(matrix.dtype, numpy.int8)
+        self.assertEqual(matrix.tolist(), score_matrix(self.data)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
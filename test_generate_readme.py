@@ -7,19 +7,62 @@ import unittest
 import json
 import tempfile
 import os
+import pickle
 import sys
+import threading
+import time
 from io import StringIO
+import generate_readme as generator_module
 from generate_readme import (
     score_to_emoji,
     load_json,
+    feature_key,
+    Catalog,
+    ScoreColumn,
+    iter_json_array,
+    spool_json,
     generate_table_header,
     generate_logo_row,
     generate_badge_row,
     generate_license_row,
     generate_default_row,
     generate_comparison_table,
+    iter_comparison_table,
+    write_comparison_table,
+    write_readme,
+    write_readme_incremental,
+    markdown_cell_to_html,
+    iter_html_table,
+    write_html_file,
     validate_projects_json,
+    iter_validation_errors,
+    heading_anchor,
+    load_feature_anchors,
     generate_readme,
+    add_stage_hook,
+    remove_stage_hook,
+    stage,
+    StageProfiler,
+    PROCESSORS,
+    register_processor,
+    compile_features,
+    feature_label,
+    iter_project_values,
+    ReadmeWatcher,
+    AtomicWriter,
+    check_readme,
+    PLACEHOLDERS,
+    register_placeholder,
+    compile_template,
+    write_templates,
+    iter_transposed_table,
+    project_table_bytes,
+    plan_shards,
+    shard_file,
+    SHARD_MARKER,
+    write_sharded_readme,
+    compact_table,
+    main,
 )
 
 
@@ -474,6 +517,1491 @@ class TestGenerateComparisonTable(unittest.TestCase):
         self.assertIn("✅8️⃣", result)
 
 
+class TestStreamingTable(unittest.TestCase):
+    """Test cases for the streaming table and template writers."""
+
+    def setUp(self):
+        self.data = {
+            "projects": [
+                {
+                    "name": "App1",
+                    "repo": "user/app1",
+                    "logo_url": "logo1.png",
+                    "logo_alt": "App1 Logo",
+                    "web_app": "8",
+                    "web_app_url": "https://example.com",
+                },
+                {
+                    "name": "App2",
+                    "repo": "user/app2",
+                    "logo_url": "logo2.png",
+                    "logo_alt": "App2 Logo",
+                    "license_custom": "MIT",
+                },
+            ],
+            "features": [
+                {"name": "Logo", "link": None, "processor": "generate_logo_row"},
+                {
+                    "name": "License",
+                    "link": "features.md#license",
+                    "processor": "generate_license_row",
+                },
+                {"name": "Web App", "link": "features.md#web-app"},
+            ],
+        }
+
+    def test_rows_are_yielded_one_line_at_a_time(self):
+        """Test that each yielded chunk is exactly one table row."""
+        rows = list(iter_comparison_table(self.data))
+
+        # Header + separator + one row per feature
+        self.assertEqual(len(rows), 2 + len(self.data["features"]))
+        for row in rows:
+            self.assertTrue(row.startswith("| "))
+            self.assertTrue(row.endswith("|\n"))
+            self.assertEqual(row.count("\n"), 1)
+
+    def test_writer_matches_string_output(self):
+        """Test that the streamed table is identical to the string table."""
+        buffer = StringIO()
+        write_comparison_table(self.data, buffer)
+
+        self.assertEqual(buffer.getvalue(), generate_comparison_table(self.data))
+
+    def test_write_readme_matches_replace(self):
+        """Test that streaming the template matches str.replace output."""
+        template = "Top\n{{COMPARISON_TABLE}}\nMiddle\n{{COMPARISON_TABLE}}\nEnd"
+        buffer = StringIO()
+        write_readme(template, self.data, buffer)
+
+        expected = template.replace(
+            "{{COMPARISON_TABLE}}", generate_comparison_table(self.data)
+        )
+        self.assertEqual(buffer.getvalue(), expected)
+
+    def test_write_readme_without_placeholder(self):
+        """Test that a template without placeholder is written unchanged."""
+        buffer = StringIO()
+        write_readme("No table here\n", self.data, buffer)
+
+        self.assertEqual(buffer.getvalue(), "No table here\n")
+
+
+class TestCatalog(unittest.TestCase):
+    """Test cases for the columnar Catalog model."""
+
+    def setUp(self):
+        self.data = {
+            "projects": [
+                {
+                    "name": "App1",
+                    "repo": "user/app1",
+                    "logo_url": "logo1.png",
+                    "logo_alt": "App1 Logo",
+                    "web_app": "8",
+                    "web_app_url": "https://example.com/app1",
+                    "android_app": "x",
+                },
+                {
+                    "name": "App2",
+                    "repo": "user/app2",
+                    "logo_url": "logo2.png",
+                    "logo_alt": "App2 Logo",
+                    "web_app": "8",
+                },
+                {
+                    "name": "App3",
+                    "repo": "user/app3",
+                    "logo_url": "logo3.png",
+                    "logo_alt": "App3 Logo",
+                    "android_app": "wip-3",
+                    "android_app_url": "https://example.com/issue",
+                },
+            ],
+            "features": [
+                {"name": "Web App", "link": "features.md#web-app"},
+                {"name": "Android App", "link": "features.md#android-app"},
+                {"name": "iOS App", "link": "features.md#ios-app"},
+            ],
+        }
+
+    def test_feature_key(self):
+        """Test that feature names are converted to project keys."""
+        self.assertEqual(feature_key("Web App"), "web_app")
+        self.assertEqual(
+            feature_key("Object/Face Recognition"), "object_face_recognition"
+        )
+
+    def test_values_are_interned(self):
+        """Test that repeated values share one code per column."""
+        catalog = Catalog.from_data(self.data)
+        column = catalog.columns["web_app"]
+
+        self.assertEqual(list(column.codes), [1, 1, 0])
+        self.assertEqual(column.values, ["❌", "8"])
+        self.assertEqual(column.value(2), "❌")
+        self.assertFalse(column.has(2))
+
+    def test_urls_are_sparse(self):
+        """Test that *_url keys only store projects that set them."""
+        catalog = Catalog.from_data(self.data)
+
+        self.assertEqual(catalog.urls["web_app_url"], {0: "https://example.com/app1"})
+        self.assertEqual(
+            catalog.urls["android_app_url"], {2: "https://example.com/issue"}
+        )
+        self.assertNotIn("web_app_url", catalog.columns)
+
+    def test_url_feature_is_a_column(self):
+        """Test that a feature whose key ends in _url renders its scores."""
+        self.data["features"].append({"name": "Homepage URL"})
+        self.data["projects"][1]["homepage_url"] = "8"
+        catalog = Catalog.from_data(self.data)
+
+        self.assertIn("homepage_url", catalog.columns)
+        self.assertNotIn("homepage_url", catalog.urls)
+        table = generate_comparison_table(catalog)
+        self.assertIn("| Homepage URL | ❌ | ✅8️⃣ | ❌ |", table)
+        self.assertEqual(table, generate_comparison_table(self.data))
+
+    def test_standard_keys_kept_per_project(self):
+        """Test that standard keys stay on the project dicts."""
+        catalog = Catalog.from_data(self.data)
+
+        self.assertEqual(catalog.projects[0]["repo"], "user/app1")
+        self.assertNotIn("web_app", catalog.projects[0])
+        self.assertEqual(catalog.feature_keys, ["web_app", "android_app", "ios_app"])
+
+    def test_column_widens_past_255_values(self):
+        """Test that columns switch to a wider typecode when needed."""
+        column = ScoreColumn()
+        for index in range(300):
+            column.set(index, str(index))
+
+        self.assertEqual(column.codes.typecode, "H")
+        self.assertEqual(column.value(299), "299")
+
+    def test_to_data_round_trip(self):
+        """Test that the catalog can be converted back to plain data."""
+        catalog = Catalog.from_data(self.data)
+
+        self.assertEqual(catalog.to_data(), self.data)
+
+    def test_table_matches_dict_rendering(self):
+        """Test that rendering from a catalog matches rendering from dicts."""
+        catalog = Catalog.from_data(self.data)
+
+        self.assertEqual(
+            generate_comparison_table(catalog), generate_comparison_table(self.data)
+        )
+
+    def test_real_projects_render_identically(self):
+        """Test the columnar path against the real projects.json."""
+        data = load_json("projects.json")
+        catalog = load_json("projects.json", columnar=True)
+
+        self.assertIsInstance(catalog, Catalog)
+        self.assertEqual(
+            generate_comparison_table(catalog), generate_comparison_table(data)
+        )
+
+    def test_validation_reads_catalog(self):
+        """Test that validation reports unmapped keys from a catalog."""
+        self.data["projects"][1]["bad_key"] = "value"
+        catalog = Catalog.from_data(self.data)
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+
+        try:
+            with self.assertRaises(ValueError):
+                validate_projects_json(catalog)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        output = captured_output.getvalue()
+        self.assertIn("'bad_key' in: App2", output)
+
+
+class TestIncrementalReadme(unittest.TestCase):
+    """Test cases for incremental regeneration."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tempdir.name, "readme.md")
+        self.template = "Intro\n{{COMPARISON_TABLE}}\nOutro\n"
+        self.data = load_json("projects.json")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def render(self, data=None, template=None):
+        catalog = Catalog.from_data(data or self.data)
+        return write_readme_incremental(
+            template or self.template, catalog, self.output_file
+        )
+
+    def assert_matches_full_render(self, data=None, template=None):
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        expected = (template or self.template).replace(
+            "{{COMPARISON_TABLE}}", generate_comparison_table(data or self.data)
+        )
+        self.assertEqual(content, expected)
+
+    def test_first_run_renders_everything(self):
+        """Test that a run without cache renders every row."""
+        rendered = self.render()
+
+        self.assertEqual(rendered, 1 + len(self.data["features"]))
+        self.assert_matches_full_render()
+
+    def test_unchanged_run_renders_nothing(self):
+        """Test that a second run with unchanged inputs renders no rows."""
+        self.render()
+
+        self.assertEqual(self.render(), 0)
+        self.assert_matches_full_render()
+
+    def test_one_cell_edit_renders_one_row(self):
+        """Test that changing one score only re-renders its row."""
+        self.render()
+        self.data["projects"][3]["search"] = "wip-1"
+
+        self.assertEqual(self.render(), 1)
+        self.assert_matches_full_render()
+
+    def test_header_change_renders_header_and_badge_rows(self):
+        """Test that changing a repo re-renders rows reading standard keys."""
+        self.render()
+        self.data["projects"][0]["repo"] = "someone/else"
+
+        # Header, logo, four badge rows and the license row
+        self.assertEqual(self.render(), 7)
+        self.assert_matches_full_render()
+
+    def test_template_change_renders_everything(self):
+        """Test that a template change forces a full render."""
+        self.render()
+        template = "Changed\n{{COMPARISON_TABLE}}"
+
+        self.assertEqual(self.render(template=template), 1 + len(self.data["features"]))
+        self.assert_matches_full_render(template=template)
+
+    def test_renderer_digest_is_stable_in_process(self):
+        """Test that rendering in between does not invalidate the cache."""
+        self.render()
+        generate_comparison_table(Catalog.from_data(self.data))
+        compact_table(list(iter_comparison_table(self.data)))
+
+        self.assertEqual(self.render(), 0)
+        self.assertEqual(self.render(), 0)
+
+    def test_renderer_change_renders_everything(self):
+        """Test that changing a cell renderer invalidates the cached rows."""
+        self.render()
+        score_to_emoji = generator_module.score_to_emoji
+        generator_module.score_to_emoji = lambda score: f"<{score}>"
+        try:
+            self.assertEqual(self.render(), 1 + len(self.data["features"]))
+            with open(self.output_file, "r", encoding="utf-8") as f:
+                self.assertIn("<8>", f.read())
+        finally:
+            generator_module.score_to_emoji = score_to_emoji
+
+        self.assertEqual(self.render(), 1 + len(self.data["features"]))
+        self.assert_matches_full_render()
+
+    def test_hand_edited_output_renders_everything(self):
+        """Test that an edited output file is not trusted."""
+        self.render()
+        with open(self.output_file, "a", encoding="utf-8") as f:
+            f.write("edited")
+
+        self.assertEqual(self.render(), 1 + len(self.data["features"]))
+        self.assert_matches_full_render()
+
+
+class TestStreamingLoader(unittest.TestCase):
+    """Test cases for the incremental JSON loader and SpooledCatalog."""
+
+    def write_json(self, text):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".json", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(text)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_array_matches_json_load(self):
+        """Test that streamed projects equal json.load, even with tiny chunks."""
+        expected = load_json("projects.json")
+
+        for chunk_size in (7, 64, 1 << 16):
+            other = {}
+            projects = list(
+                iter_json_array("projects.json", "projects", other, chunk_size)
+            )
+            self.assertEqual(projects, expected["projects"])
+            self.assertEqual(other["features"], expected["features"])
+
+    def test_values_split_across_chunks(self):
+        """Test numbers and literals that straddle a chunk boundary."""
+        path = self.write_json(
+            '{"count": 1234567, "projects": [1, 23456, true, "a\\"b"],'
+            ' "flag": false}'
+        )
+        other = {}
+
+        values = list(iter_json_array(path, "projects", other, chunk_size=3))
+
+        self.assertEqual(values, [1, 23456, True, 'a"b'])
+        self.assertEqual(other, {"count": 1234567, "flag": False})
+
+    def test_empty_and_invalid_documents(self):
+        """Test empty arrays and malformed documents."""
+        self.assertEqual(list(iter_json_array(self.write_json("{}"))), [])
+        self.assertEqual(list(iter_json_array(self.write_json('{"projects": []}'))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.write_json('{"projects": [{"a": 1}')))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.write_json("[]")))
+
+    def test_spooled_catalog_renders_identically(self):
+        """Test that the spooled table equals the in-memory table."""
+        data = load_json("projects.json")
+
+        with spool_json("projects.json", chunk_size=97) as catalog:
+            self.assertEqual(len(catalog), len(data["projects"]))
+            self.assertEqual(
+                generate_comparison_table(catalog), generate_comparison_table(data)
+            )
+
+    def test_spooled_catalog_validation(self):
+        """Test that validation reads the spooled columns."""
+        data = {
+            "projects": [
+                {"name": "App1", "repo": "user/app1", "bad_key": "1"},
+                {"name": "App2", "repo": "user/app2", "web_app": "2"},
+                {"name": "App3", "repo": "user/app3", "bad_key": "3"},
+            ],
+            "features": [{"name": "Web App"}],
+        }
+        path = self.write_json(json.dumps(data))
+
+        with spool_json(path) as catalog:
+            errors = list(iter_validation_errors(catalog))
+
+        self.assertEqual(errors, list(iter_validation_errors(data)))
+        self.assertIn("'bad_key' in: App1, App3", errors[-1])
+
+    def test_temporary_spool_is_removed(self):
+        """Test that closing the catalog removes its temporary directory."""
+        with spool_json("projects.json") as catalog:
+            directory = catalog.directory
+            self.assertTrue(os.path.isdir(directory))
+
+        self.assertFalse(os.path.exists(directory))
+
+    def test_generate_readme_streaming(self):
+        """Test that streaming generation matches the committed readme."""
+        output_file = tempfile.mktemp(suffix=".md")
+
+        try:
+            generate_readme("readme.tpl", output_file, "projects.json", streaming=True)
+
+            with open(output_file, "r", encoding="utf-8") as f:
+                generated = f.read()
+            with open("readme.md", "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), generated)
+        finally:
+            if os.path.exists(output_file):
+                os.unlink(output_file)
+
+
+class TestHtmlTable(unittest.TestCase):
+    """Test cases for the native HTML renderer."""
+
+    def test_markdown_image_and_link(self):
+        """Test that markdown images and links become HTML elements."""
+        self.assertEqual(
+            markdown_cell_to_html("[✅8️⃣](https://example.com/a?b=1&c=2)"),
+            '<a href="https://example.com/a?b=1&amp;c=2">✅8️⃣</a>',
+        )
+        self.assertEqual(
+            markdown_cell_to_html("![?](https://img.shields.io/x)"),
+            '<img src="https://img.shields.io/x" alt="?" loading="lazy" '
+            'width="150" height="20" style="object-fit: scale-down; '
+            'object-position: left"/>',
+        )
+
+    def test_linked_image_and_escaping(self):
+        """Test nested image links and escaping of plain text."""
+        self.assertEqual(
+            markdown_cell_to_html("[![a](i.png)](https://x) <b>"),
+            '<a href="https://x"><img src="i.png" alt="a" loading="lazy" '
+            'width="150" height="20" style="object-fit: scale-down; '
+            'object-position: left"/></a> &lt;b&gt;',
+        )
+
+    def test_feature_links_point_to_html_pages(self):
+        """Test that features.md links target the rendered page."""
+        self.assertEqual(
+            markdown_cell_to_html("[Web App](features.md#web-app)"),
+            '<a href="features.html#web-app">Web App</a>',
+        )
+
+    def test_table_structure(self):
+        """Test that the table comes wrapped with the toggle button."""
+        data = load_json("projects.json")
+
+        rows = list(iter_html_table(data))
+        table = "".join(rows)
+
+        self.assertTrue(table.startswith("<script>\nwindow.toggleWidth = "))
+        self.assertIn(
+            '</script>\n<button name="toggle-table-width" onclick="toggleWidth()">',
+            table,
+        )
+        self.assertIn('<div class="table-wrapper">', table)
+        self.assertEqual(table.count("<tr>"), 1 + len(data["features"]))
+        self.assertEqual(
+            table.count('loading="lazy" width="50" height="50"'),
+            len(data["projects"]),
+        )
+        # Every image has both dimensions
+        self.assertEqual(table.count("<img "), table.count('" height="'))
+        self.assertEqual(table.count("<img "), table.count(' width="'))
+        self.assertNotIn("height: auto", table)
+        self.assertNotIn("](", table)
+
+    def test_catalog_matches_dict(self):
+        """Test that the HTML table is the same from a Catalog."""
+        data = load_json("projects.json")
+
+        self.assertEqual(
+            "".join(iter_html_table(Catalog.from_data(data))),
+            "".join(iter_html_table(data)),
+        )
+
+    def test_gzip_companion(self):
+        """Test that the .gz companion holds the same HTML."""
+        import gzip
+
+        data = load_json("projects.json")
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "table.html")
+            write_html_file(data, output_file)
+
+            with open(output_file, "rb") as f:
+                plain = f.read()
+            with gzip.open(output_file + ".gz", "rb") as f:
+                self.assertEqual(f.read(), plain)
+
+        self.assertEqual(plain.decode("utf-8"), "".join(iter_html_table(data)))
+
+
+def _compile_shout_row(feature, key):
+    """Row processor registered by the tests only, see CompiledFeature."""
+    return lambda data, projects: (
+        feature["name"],
+        (f"{value.upper()}!" for value in iter_project_values(data, "motto", "")),
+    )
+
+
+class TestParallelRendering(unittest.TestCase):
+    """Test cases for process-pool row rendering."""
+
+    def test_parallel_matches_serial(self):
+        """Test that parallel output is identical for dicts and catalogs."""
+        data = load_json("projects.json")
+        expected = generate_comparison_table(data)
+
+        for source in (data, Catalog.from_data(data)):
+            rows = list(iter_comparison_table(source, jobs=2))
+            self.assertEqual("".join(rows), expected)
+            self.assertEqual(len(rows), 2 + len(data["features"]))
+
+    def test_parallel_uses_callers_schema(self):
+        """Test that worker processes render the schema they are given."""
+        data = load_json("projects.json")
+        schema = compile_features(data)[2:5]
+        expected = "".join(iter_comparison_table(data, schema=schema))
+
+        rows = list(iter_comparison_table(data, jobs=2, schema=schema))
+
+        self.assertEqual("".join(rows), expected)
+        self.assertEqual(len(rows), 2 + 3)
+
+    def test_compiled_feature_pickles_its_factory(self):
+        """Test that unpickled features keep processors the process lacks."""
+        data = {
+            "projects": [{"name": "App1", "repo": "u/app1", "motto": "fast"}],
+            "features": [{"name": "Motto", "processor": "generate_shout_row"}],
+        }
+        register_processor("generate_shout_row")(_compile_shout_row)
+        try:
+            schema = compile_features(data)
+        finally:
+            del PROCESSORS["generate_shout_row"]
+
+        copied = pickle.loads(pickle.dumps(schema))
+
+        self.assertEqual(copied[0].processor, "generate_shout_row")
+        self.assertIn(
+            "| Motto | FAST! |", "".join(iter_comparison_table(data, schema=copied))
+        )
+
+    def test_wide_table_split_by_columns(self):
+        """Test a table with fewer features than tasks, split by projects."""
+        data = {
+            "projects": [
+                {
+                    "name": f"App{i}",
+                    "repo": f"user/app{i}",
+                    "web_app": str(i % 11),
+                    **({"web_app_url": f"https://x/{i}"} if i % 7 == 0 else {}),
+                }
+                for i in range(50)
+            ],
+            "features": [
+                {"name": "Web App", "link": "features.md#web-app"},
+                {
+                    "name": "Stars",
+                    "link": "features.md#stars",
+                    "processor": "generate_badge_row",
+                    "badge_template": "![?](https://img/{repo})",
+                },
+            ],
+        }
+        expected = generate_comparison_table(data)
+
+        for source in (data, Catalog.from_data(data)):
+            self.assertEqual("".join(iter_comparison_table(source, jobs=3)), expected)
+
+    def test_catalog_select(self):
+        """Test that selecting projects keeps their values and urls."""
+        data = load_json("projects.json")
+        catalog = Catalog.from_data(data)
+        indexes = [5, 0, 3]
+
+        selected = catalog.select(indexes)
+
+        subset = {
+            "projects": [data["projects"][i] for i in indexes],
+            "features": data["features"],
+        }
+        self.assertEqual(
+            generate_comparison_table(selected), generate_comparison_table(subset)
+        )
+
+
+class TestProcessorRegistry(unittest.TestCase):
+    """Test cases for registered processors and compiled features."""
+
+    def setUp(self):
+        calls = self.calls = []
+
+        @register_processor("generate_upper_row")
+        def compile_upper_row(feature, key):
+            calls.append(feature["name"])
+            label = feature_label(feature["name"], feature.get("link"))
+            source = feature["source"]
+            return lambda data, projects: (
+                label,
+                (
+                    str(value).upper()
+                    for value in iter_project_values(data, source, "?")
+                ),
+            )
+
+        self.data = {
+            "projects": [
+                {"name": "App1", "repo": "u/app1", "motto": "fast"},
+                {"name": "App2", "repo": "u/app2"},
+            ],
+            "features": [
+                {"name": "Motto", "processor": "generate_upper_row", "source": "motto"},
+                {"name": "Web App", "processor": "no_such_processor"},
+            ],
+        }
+
+    def tearDown(self):
+        del PROCESSORS["generate_upper_row"]
+
+    def test_custom_processor(self):
+        """Test that a registered processor renders its rows."""
+        table = generate_comparison_table(self.data)
+
+        self.assertIn("| Motto | FAST | ? |", table)
+        # Unknown processors fall back to the default row
+        self.assertIn("| Web App | ❌ | ❌ |", table)
+
+    def test_project_values_for_every_data_type(self):
+        """Test that raw values read the same from dicts and catalogs."""
+        data = load_json("projects.json")
+        expected = [project.get("search_url") for project in data["projects"]]
+        scores = [project.get("search", "-") for project in data["projects"]]
+
+        with spool_json("projects.json") as spooled:
+            for source in (data, Catalog.from_data(data), spooled):
+                self.assertEqual(
+                    list(iter_project_values(source, "search_url")), expected
+                )
+                self.assertEqual(
+                    list(iter_project_values(source, "search", "-")), scores
+                )
+                self.assertEqual(
+                    list(iter_project_values(source, "repo")),
+                    [project["repo"] for project in data["projects"]],
+                )
+
+    def test_schema_compiled_once(self):
+        """Test that a compiled schema renders several outputs without setup."""
+        schema = compile_features(self.data)
+        self.assertEqual(self.calls, ["Motto"])
+        self.assertEqual(
+            [compiled.processor for compiled in schema],
+            [
+                "generate_upper_row",
+                "default",
+            ],
+        )
+
+        markdown = "".join(iter_comparison_table(self.data, schema=schema))
+        html_rows = "".join(iter_html_table(self.data, schema=schema))
+        self.assertEqual(markdown, generate_comparison_table(self.data))
+        self.assertIn("<td>FAST</td>", html_rows)
+        # generate_comparison_table reuses the cached compiled feature
+        self.assertEqual(self.calls, ["Motto"])
+
+    def test_compiled_features_are_shared_by_catalogs(self):
+        """Test that equal feature specs compile once per process."""
+        other = json.loads(json.dumps(self.data))
+        other["projects"][0]["motto"] = "slow"
+        first = compile_features(self.data)
+        second = compile_features(other)
+
+        self.assertIs(second[0], first[0])
+        self.assertEqual(self.calls, ["Motto"])
+        self.assertIn("| Motto | SLOW | ? |", generate_comparison_table(other))
+
+        other["features"][0]["link"] = "features.md#motto"
+        self.assertIsNot(compile_features(other)[0], first[0])
+        self.assertEqual(self.calls, ["Motto", "Motto"])
+
+        # Registering another factory under the same name compiles again
+        @register_processor("generate_upper_row")
+        def compile_lower_row(feature, key):
+            return lambda data, projects: ("Motto", ("low" for _ in projects))
+
+        self.assertIn("| Motto | low | low |", generate_comparison_table(self.data))
+
+    def test_incremental_hashes_custom_rows(self):
+        """Test that custom rows re-render when any project value changes."""
+        template = "{{COMPARISON_TABLE}}"
+        for columnar in (False, True):
+            data = json.loads(json.dumps(self.data))
+            with tempfile.TemporaryDirectory() as tempdir:
+                output_file = os.path.join(tempdir, "readme.md")
+
+                def render():
+                    source = Catalog.from_data(data) if columnar else data
+                    return write_readme_incremental(template, source, output_file)
+
+                render()
+                self.assertEqual(render(), 0)
+                data["projects"][1]["motto"] = "slow"
+                self.assertEqual(render(), 1)
+                with open(output_file, "r", encoding="utf-8") as f:
+                    self.assertIn("| Motto | FAST | SLOW |", f.read())
+
+
+class TestReadmeWatcher(unittest.TestCase):
+    """Test cases for watch mode."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name in ("projects.json", "readme.tpl", "features.md"):
+            with open(name, "r", encoding="utf-8") as f:
+                content = f.read()
+            self.paths[name] = os.path.join(self.tempdir.name, name)
+            self.write(name, content)
+        self.output_file = os.path.join(self.tempdir.name, "readme.md")
+        self.watcher = ReadmeWatcher(
+            self.paths["readme.tpl"],
+            self.output_file,
+            self.paths["projects.json"],
+            interval=0.01,
+            debounce=0.01,
+        )
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, name, content):
+        """Write a watched file and move its mtime forward."""
+        path = self.paths[name]
+        previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        mtime = max(os.stat(path).st_mtime_ns, previous + 1_000_000)
+        os.utime(path, ns=(mtime, mtime))
+
+    def read_output(self):
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_update_renders_only_changed_inputs(self):
+        """Test that edits re-render only the affected rows."""
+        data = load_json("projects.json")
+        self.assertEqual(
+            self.watcher.update(self.watcher.poll()), 1 + len(data["features"])
+        )
+        with open("readme.md", "r", encoding="utf-8") as f:
+            self.assertEqual(self.read_output(), f.read())
+        self.assertEqual(self.watcher.poll(), set())
+
+        # One score changed: one row
+        data["projects"][0]["search"] = "wip-2"
+        self.write("projects.json", json.dumps(data))
+        changed = self.watcher.poll()
+        self.assertEqual(changed, {self.paths["projects.json"]})
+        self.assertEqual(self.watcher.update(changed), 1)
+        self.assertIn("🚧2️⃣", self.read_output())
+
+        # Template changed: no rows
+        self.write("readme.tpl", "New intro\n{{COMPARISON_TABLE}}")
+        self.assertEqual(self.watcher.update(self.watcher.poll()), 0)
+        self.assertTrue(self.read_output().startswith("New intro\n| Feature |"))
+
+    def test_invalid_data_keeps_previous_output(self):
+        """Test that broken or invalid JSON leaves the last good output."""
+        self.watcher.update(self.watcher.poll())
+        before = self.read_output()
+
+        self.write("projects.json", '{"projects": [')
+        with self.assertRaises(ValueError):
+            self.watcher.update(self.watcher.poll())
+        self.assertEqual(self.read_output(), before)
+
+        self.write("projects.json", json.dumps({"projects": [{"name": "A"}]}))
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            with self.assertRaises(ValueError):
+                self.watcher.update(self.watcher.poll())
+        finally:
+            sys.stdout = sys.__stdout__
+        self.assertIn("missing fields", captured_output.getvalue())
+
+        # The last valid data is still rendered on template changes
+        self.write("readme.tpl", "{{COMPARISON_TABLE}}")
+        self.watcher.update(self.watcher.poll())
+        self.assertIn("Chevereto", self.read_output())
+
+    def test_run_debounces_bursts(self):
+        """Test that the polling loop renders once per burst of saves."""
+        stop = threading.Event()
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        thread = threading.Thread(target=self.watcher.run, args=(stop,))
+        thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not os.path.exists(self.output_file) and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            for intro in ("One", "Two", "Three"):
+                self.write("readme.tpl", f"{intro}\n{{{{COMPARISON_TABLE}}}}")
+            while (
+                not self.read_output().startswith("Three")
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+        finally:
+            stop.set()
+            thread.join()
+            sys.stdout = sys.__stdout__
+
+        self.assertTrue(self.read_output().startswith("Three\n"))
+        self.assertLessEqual(captured_output.getvalue().count("Regenerated"), 3)
+
+
+class TestStageHooks(unittest.TestCase):
+    """Test cases for stage hooks and the profiler."""
+
+    def test_hooks_wrap_stages(self):
+        """Test that before/after hooks run around every stage in order."""
+        calls = []
+        hook = add_stage_hook(
+            before=lambda name, args: calls.append(("before", name)),
+            after=lambda name, args: calls.append(("after", name)),
+        )
+        try:
+            with tempfile.TemporaryDirectory() as tempdir:
+                generate_readme(
+                    "readme.tpl", os.path.join(tempdir, "readme.md"), "projects.json"
+                )
+        finally:
+            remove_stage_hook(hook)
+
+        names = [name for event, name in calls if event == "before"]
+        self.assertEqual(names[:3], ["load_json", "validate", "write_readme"])
+        self.assertEqual(names.count("render_row"), len(load_json()["features"]))
+        # write_readme encloses the row stages
+        self.assertEqual(calls[-1], ("after", "write_readme"))
+        self.assertEqual(names.index("render_header"), 3)
+
+        # Removed hooks are no longer called
+        calls.clear()
+        generate_comparison_table(load_json())
+        self.assertEqual(calls, [])
+
+    def test_after_hook_runs_on_error(self):
+        """Test that the after hook runs when a stage raises."""
+        calls = []
+        hook = add_stage_hook(after=lambda name, args: calls.append((name, args)))
+        try:
+            with self.assertRaises(KeyError):
+                with stage("broken", detail=1):
+                    raise KeyError("boom")
+        finally:
+            remove_stage_hook(hook)
+        self.assertEqual(calls, [("broken", {"detail": 1})])
+
+    def test_profiler_stats(self):
+        """Test per-stage and per-processor stats with nested memory peaks."""
+        data = load_json()
+        with StageProfiler() as profiler:
+            with stage("outer"):
+                with stage("inner"):
+                    block = bytearray(1 << 20)
+                del block
+            generate_comparison_table(data)
+
+        stats = profiler.stats
+        self.assertEqual(stats["render_row:generate_badge_row"]["calls"], 4)
+        self.assertEqual(stats["render_row:default"]["calls"], 26)
+        self.assertGreaterEqual(stats["inner"]["peak_bytes"], 1 << 20)
+        self.assertGreaterEqual(stats["outer"]["peak_bytes"], 1 << 20)
+        self.assertIn("render_row:default", profiler.summary())
+
+    def test_profile_cli_writes_chrome_trace(self):
+        """Test that --profile writes a Chrome trace-event file."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            trace_file = os.path.join(tempdir, "trace.json")
+            output_file = os.path.join(tempdir, "readme.md")
+
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                status = main(["--output", output_file, "--profile", trace_file])
+            finally:
+                sys.stdout = sys.__stdout__
+
+            with open(trace_file, "r", encoding="utf-8") as f:
+                trace = json.load(f)
+
+        self.assertEqual(status, 0)
+        events = trace["traceEvents"]
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+        self.assertIn("validate", {event["name"] for event in events})
+        rows = [event for event in events if event["cat"].startswith("render_row")]
+        self.assertEqual(rows[0]["name"], "Logo")
+        self.assertEqual(rows[0]["args"]["processor"], "generate_logo_row")
+        self.assertIn("load_json", captured_output.getvalue())
+
+
+class TestAtomicWrites(unittest.TestCase):
+    """Test cases for atomic, skip-unchanged writes."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "out.md")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("old\n")
+        os.chmod(self.path, 0o640)
+        os.utime(self.path, ns=(1_000_000_000, 1_000_000_000))
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_unchanged_content_is_not_written(self):
+        """Test that identical content leaves the file and its mtime alone."""
+        before = os.stat(self.path)
+        writer = AtomicWriter(self.path)
+        with writer as f:
+            f.write("old\n")
+
+        self.assertFalse(writer.changed)
+        after = os.stat(self.path)
+        self.assertEqual(after.st_ino, before.st_ino)
+        self.assertEqual(after.st_mtime_ns, before.st_mtime_ns)
+        self.assertEqual(os.listdir(self.tempdir.name), ["out.md"])
+
+    def test_changed_content_replaces_file(self):
+        """Test that new content is renamed into place with the old mode."""
+        writer = AtomicWriter(self.path)
+        with writer as f:
+            f.write("new\n")
+
+        self.assertTrue(writer.changed)
+        self.assertEqual(self.read(), "new\n")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.tempdir.name), ["out.md"])
+
+    def test_error_keeps_existing_file(self):
+        """Test that a failed write leaves the old file and no temp file."""
+        with self.assertRaises(RuntimeError):
+            with AtomicWriter(self.path) as f:
+                f.write("partial")
+                raise RuntimeError("render failed")
+
+        self.assertEqual(self.read(), "old\n")
+        self.assertEqual(os.listdir(self.tempdir.name), ["out.md"])
+
+    def test_generate_readme_skips_unchanged_output(self):
+        """Test that regenerating an up-to-date README keeps its mtime."""
+        output_file = os.path.join(self.tempdir.name, "readme.md")
+        generate_readme("readme.tpl", output_file, "projects.json")
+        os.utime(output_file, ns=(1_000_000_000, 1_000_000_000))
+
+        generate_readme("readme.tpl", output_file, "projects.json")
+        self.assertEqual(os.stat(output_file).st_mtime_ns, 1_000_000_000)
+
+
+class TestCheckMode(unittest.TestCase):
+    """Test cases for --check."""
+
+    def setUp(self):
+        with open("readme.tpl", "r", encoding="utf-8") as f:
+            self.template = f.read()
+        self.data = load_json("projects.json")
+
+    def test_up_to_date(self):
+        """Test that the committed readme.md passes the check."""
+        self.assertEqual(check_readme(self.template, self.data, "readme.md"), [])
+
+    def test_differing_rows_only(self):
+        """Test that only the changed rows are reported."""
+        self.data["projects"][0]["search"] = "wip-1"
+
+        differences = check_readme(
+            self.template, Catalog.from_data(self.data), "readme.md"
+        )
+
+        changed = [line for line in differences if line[:1] in "+-"]
+        self.assertEqual(len(changed), 4)  # two file headers, one row each way
+        self.assertTrue(changed[2].startswith("-| [Search]"))
+        self.assertTrue(
+            changed[3].startswith("+| [Search](features.md#search) | 🚧1️⃣")
+        )
+
+    def test_check_cli(self):
+        """Test the --check exit status and that nothing is written."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                missing = main(["--check", "--output", output_file])
+                self.assertFalse(os.path.exists(output_file))
+                main(["--output", output_file])
+                fresh = main(["--check", "--output", output_file])
+            finally:
+                sys.stdout = sys.__stdout__
+
+        self.assertEqual(missing, 1)
+        self.assertEqual(fresh, 0)
+        self.assertIn("is out of date", captured_output.getvalue())
+        self.assertIn("is up to date", captured_output.getvalue())
+
+    def test_check_uses_write_options(self):
+        """Test that --check renders with the options of the write."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            results = []
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                for options in (
+                    ["--compact"],
+                    ["--rank"],
+                    ["--transpose", "--shard-size", "5"],
+                ):
+                    main(["--output", output_file, *options])
+                    results.append(
+                        (
+                            main(["--check", "--output", output_file, *options]),
+                            main(["--check", "--output", output_file]),
+                        )
+                    )
+            finally:
+                sys.stdout = sys.__stdout__
+
+        self.assertEqual(results, [(0, 1)] * 3)
+
+    def test_generated_date_matches_any_day(self):
+        """Test that {{GENERATED_DATE}} does not make the check fail later."""
+        template = "Updated {{GENERATED_DATE:%d %B %Y}}\n{{COMPARISON_TABLE}}"
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            previous = os.environ.get("SOURCE_DATE_EPOCH")
+            os.environ["SOURCE_DATE_EPOCH"] = "0"
+            try:
+                with open(output_file, "w", encoding="utf-8") as f:
+                    write_readme(template, self.data, f)
+            finally:
+                if previous is None:
+                    del os.environ["SOURCE_DATE_EPOCH"]
+                else:
+                    os.environ["SOURCE_DATE_EPOCH"] = previous
+
+            up_to_date = check_readme(template, self.data, output_file)
+            self.data["projects"][0]["search"] = "wip-1"
+            differences = check_readme(template, self.data, output_file)
+
+        self.assertEqual(up_to_date, [])
+        changed = [line for line in differences if line[:1] in "+-"]
+        self.assertEqual(len(changed), 4)
+        self.assertNotIn("Updated", "".join(changed))
+
+
+class TestTemplateEngine(unittest.TestCase):
+    """Test cases for compiled templates and their placeholders."""
+
+    def setUp(self):
+        self.data = {
+            "projects": [
+                {
+                    "name": "App1",
+                    "repo": "user/app1",
+                    "logo_url": "a.png",
+                    "logo_alt": "A",
+                    "web_app": "8",
+                    "search": "x",
+                },
+                {
+                    "name": "App2",
+                    "repo": "user/app2",
+                    "logo_url": "b.png",
+                    "logo_alt": "B",
+                    "web_app": "wip-3",
+                },
+            ],
+            "features": [
+                {"name": "Web App", "link": "features.md#web-app", "group": "Apps"},
+                {"name": "Search", "link": "features.md#search"},
+            ],
+        }
+
+    def render(self, template, data=None):
+        output = StringIO()
+        compile_template(template).render(data or self.data, output)
+        return output.getvalue()
+
+    def test_segments(self):
+        """Test that templates are split into literals and placeholders."""
+        compiled = compile_template("A {{PROJECT_COUNT}} {{FEATURE_TABLE:x, y}} B")
+
+        self.assertEqual(
+            compiled.segments,
+            ["A ", ("PROJECT_COUNT", None), " ", ("FEATURE_TABLE", "x, y"), " B"],
+        )
+
+    def test_unknown_and_liquid_tags_stay_literal(self):
+        """Test that only registered placeholders are replaced."""
+        template = "{{ site.title }} {{UNKNOWN}} {% raw %}{{PROJECT_COUNT}}"
+
+        self.assertEqual(
+            self.render(template), "{{ site.title }} {{UNKNOWN}} {% raw %}2"
+        )
+
+    def test_compiled_once_per_content(self):
+        """Test that compiled templates are cached by content."""
+        first = compile_template("x {{COMPARISON_TABLE}} y")
+
+        self.assertIs(compile_template("x {{COMPARISON_TABLE}} y"), first)
+        self.assertIsNot(compile_template("x {{COMPARISON_TABLE}} z"), first)
+        self.assertIsNot(compile_template("x {{COMPARISON_TABLE}} y", "@@"), first)
+
+    def test_matches_str_replace(self):
+        """Test that the table placeholder renders like str.replace."""
+        template = "Top\n{{COMPARISON_TABLE}}\nMiddle\n{{COMPARISON_TABLE}}"
+        table = generate_comparison_table(self.data)
+
+        self.assertEqual(
+            self.render(template), template.replace("{{COMPARISON_TABLE}}", table)
+        )
+
+    def test_custom_table_placeholder(self):
+        """Test that write_readme accepts another table token."""
+        output = StringIO()
+        write_readme("<!-- table -->", self.data, output, "<!-- table -->")
+
+        self.assertEqual(output.getvalue(), generate_comparison_table(self.data))
+
+    def test_counts_and_coverage(self):
+        """Test the count and coverage placeholders."""
+        content = self.render(
+            "{{PROJECT_COUNT}} projects, {{FEATURE_COUNT}} features\n"
+            "{{FEATURE_COVERAGE}}"
+        )
+
+        self.assertTrue(content.startswith("2 projects, 2 features\n"))
+        self.assertIn("| [Web App](features.md#web-app) | 2 | 100% |", content)
+        self.assertIn("| [Search](features.md#search) | 0 | 0% |", content)
+
+    def test_feature_table_by_name_and_group(self):
+        """Test that FEATURE_TABLE renders only the listed features."""
+        for argument in ("Web App", "Apps"):
+            content = self.render(f"{{{{FEATURE_TABLE:{argument}}}}}")
+            self.assertIn("[Web App]", content)
+            self.assertNotIn("[Search]", content)
+
+        content = self.render("{{FEATURE_TABLE: Search , Web App}}")
+        self.assertLess(content.index("[Web App]"), content.index("[Search]"))
+
+    def test_generated_date_is_reproducible(self):
+        """Test that GENERATED_DATE honours SOURCE_DATE_EPOCH."""
+        previous = os.environ.get("SOURCE_DATE_EPOCH")
+        os.environ["SOURCE_DATE_EPOCH"] = "86400"
+        try:
+            content = self.render("{{GENERATED_DATE}} {{GENERATED_DATE:%d.%m.%Y}}")
+        finally:
+            if previous is None:
+                del os.environ["SOURCE_DATE_EPOCH"]
+            else:
+                os.environ["SOURCE_DATE_EPOCH"] = previous
+
+        self.assertEqual(content, "1970-01-02 02.01.1970")
+
+    def test_repeated_placeholder_rendered_once(self):
+        """Test that a placeholder used twice is only rendered once."""
+        calls = []
+
+        @register_placeholder("TEST_CALLS")
+        def render(data, argument, context):
+            calls.append(argument)
+            return ("called",)
+
+        try:
+            content = self.render("{{TEST_CALLS}}-{{TEST_CALLS}}-{{TEST_CALLS:a}}")
+        finally:
+            del PLACEHOLDERS["TEST_CALLS"]
+
+        self.assertEqual(content, "called-called-called")
+        self.assertEqual(calls, [None, "a"])
+
+    def test_bad_placeholder_argument(self):
+        """Test that bad placeholder arguments are reported with their line."""
+        for text, message in (
+            ("Intro\n\n{{PROJECT_RANKING:abc}}", "{{PROJECT_RANKING:abc}} on line 3"),
+            ("{{COMPARISON_TABLE}}\n{{CLOSEST_ALTERNATIVES:0}}", "on line 2"),
+        ):
+            with self.assertRaises(ValueError) as context:
+                compile_template(text)
+            self.assertIn(message, str(context.exception))
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            template_file = os.path.join(tempdir, "readme.tpl")
+            output_file = os.path.join(tempdir, "readme.md")
+            with open(template_file, "w", encoding="utf-8") as f:
+                f.write("{{CLOSEST_ALTERNATIVES:x}}")
+            captured_output = StringIO()
+            sys.stderr = captured_output
+            try:
+                result = main(["--template", template_file, "--output", output_file])
+            finally:
+                sys.stderr = sys.__stderr__
+            written = os.path.exists(output_file)
+
+        self.assertEqual(result, 1)
+        self.assertFalse(written)
+        self.assertIn(
+            "Invalid placeholder {{CLOSEST_ALTERNATIVES:x}}", captured_output.getvalue()
+        )
+
+    def test_incremental_falls_back_with_other_placeholders(self):
+        """Test that incremental mode re-renders templates with extra placeholders."""
+        template = "{{PROJECT_COUNT}}\n{{COMPARISON_TABLE}}"
+        catalog = Catalog.from_data(self.data)
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            write_readme_incremental(template, catalog, output_file)
+            rendered = write_readme_incremental(template, catalog, output_file)
+            with open(output_file, "r", encoding="utf-8") as f:
+                content = f.read()
+
+        self.assertEqual(rendered, 3)
+        self.assertTrue(content.startswith("2\n| Feature "))
+
+    def test_write_templates(self):
+        """Test that several templates are rendered from one load."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            pairs = []
+            for name, text in (("a", "{{PROJECT_COUNT}}"), ("b", "{{FEATURE_COUNT}}")):
+                template_file = os.path.join(tempdir, f"{name}.tpl")
+                with open(template_file, "w", encoding="utf-8") as f:
+                    f.write(text)
+                pairs.append((template_file, os.path.join(tempdir, f"{name}.md")))
+
+            changed = write_templates(Catalog.from_data(self.data), pairs)
+            unchanged = write_templates(self.data, pairs)
+            contents = []
+            for _, output_file in pairs:
+                with open(output_file, "r", encoding="utf-8") as f:
+                    contents.append(f.read())
+
+        self.assertEqual(changed, [output for _, output in pairs])
+        self.assertEqual(unchanged, [])
+        self.assertEqual(contents, ["2", "2"])
+
+
+class TestShardedOutput(unittest.TestCase):
+    """Test cases for transposed and sharded tables."""
+
+    def setUp(self):
+        self.data = load_json("projects.json")
+        with open("readme.tpl", "r", encoding="utf-8") as f:
+            self.template = f.read()
+
+    def test_transposed_table(self):
+        """Test that projects become rows and features columns."""
+        lines = list(iter_transposed_table(self.data))
+        projects, features = self.data["projects"], self.data["features"]
+
+        self.assertEqual(len(lines), 2 + len(projects))
+        self.assertTrue(lines[0].startswith("| Project | Logo | [Github Stars]"))
+        self.assertEqual(lines[1].count(":---:"), len(features))
+        self.assertTrue(lines[2].startswith("| [Chevereto](https://github.com/"))
+        self.assertEqual(lines[2].count(" | "), len(features))
+
+    def test_measured_sizes_match_rendered_tables(self):
+        """Test that fixed + project sizes give the exact table size."""
+        for data in (self.data, Catalog.from_data(self.data)):
+            for transpose in (False, True):
+                fixed, sizes = project_table_bytes(data, transpose)
+                for start, stop in ((0, 17), (3, 9), (16, 17)):
+                    subset = {
+                        **self.data,
+                        "projects": self.data["projects"][start:stop],
+                    }
+                    table = "".join(
+                        iter_transposed_table(subset)
+                        if transpose
+                        else iter_comparison_table(subset)
+                    )
+                    self.assertEqual(
+                        fixed + sum(sizes[start:stop]), len(table.encode("utf-8"))
+                    )
+
+    def test_plan_shards(self):
+        """Test that shards respect the project count and the byte budget."""
+        sizes = [10, 10, 10, 50, 10]
+
+        self.assertEqual(plan_shards(sizes), [(0, 5)])
+        self.assertEqual(plan_shards(sizes, shard_size=2), [(0, 2), (2, 4), (4, 5)])
+        self.assertEqual(
+            plan_shards(sizes, fixed=5, max_bytes=30), [(0, 2), (2, 3), (3, 4), (4, 5)]
+        )
+        self.assertEqual(plan_shards([], fixed=5, max_bytes=1), [(0, 0)])
+
+    def test_fits_in_budget(self):
+        """Test that a table within budget is written whole."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            files = write_sharded_readme(
+                self.template, self.data, output_file, max_bytes=10**6
+            )
+            with open(output_file, "r", encoding="utf-8") as f:
+                content = f.read()
+        with open("readme.md", "r", encoding="utf-8") as f:
+            self.assertEqual(content, f.read())
+        self.assertEqual(files, [])
+
+    def test_shards_and_index(self):
+        """Test that shards hold every project once and are linked from the index."""
+        catalog = Catalog.from_data(self.data)
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            files = write_sharded_readme(
+                "{{COMPARISON_TABLE}}", catalog, output_file, shard_size=5
+            )
+            pages = []
+            for path in files:
+                with open(path, "r", encoding="utf-8") as f:
+                    pages.append(f.read())
+            with open(output_file, "r", encoding="utf-8") as f:
+                index = f.read()
+
+            # Fewer shards on the next run remove the stale pages
+            write_sharded_readme("{{COMPARISON_TABLE}}", catalog, output_file, 10)
+            remaining = sorted(os.listdir(tempdir))
+
+        self.assertEqual(files, [shard_file(output_file, n) for n in range(1, 5)])
+        self.assertEqual(remaining, ["readme-1.md", "readme-2.md", "readme.md"])
+        self.assertIn("| [Page 4](readme-4.md) | [", index)
+        self.assertTrue(
+            pages[0].startswith(SHARD_MARKER + "[Index](readme.md) · Page 1 of 4\n")
+        )
+        header = [page.split("\n")[3] for page in pages]
+        self.assertEqual(
+            sum(line.count("](https://github.com/") for line in header),
+            len(self.data["projects"]),
+        )
+
+    def test_unsharded_run_removes_pages(self):
+        """Test that a plain run removes the pages of an earlier sharded run."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            files = write_sharded_readme(
+                self.template, self.data, output_file, shard_size=5
+            )
+            # A hand-written page with a shard-like name is kept
+            hand_written = shard_file(output_file, len(files) + 1)
+            with open(hand_written, "w", encoding="utf-8") as f:
+                f.write("My notes\n")
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                generate_readme("readme.tpl", output_file, "projects.json")
+            finally:
+                sys.stdout = sys.__stdout__
+            remaining = sorted(os.listdir(tempdir))
+
+        self.assertGreater(len(files), 1)
+        self.assertEqual(remaining, [os.path.basename(hand_written), "readme.md"])
+
+    def test_parallel_shards_match_serial(self):
+        """Test that shards rendered in a process pool are identical."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            contents = []
+            for jobs in (None, 2):
+                os.mkdir(os.path.join(tempdir, str(jobs)))
+                output_file = os.path.join(tempdir, str(jobs), "readme.md")
+                files = write_sharded_readme(
+                    self.template,
+                    self.data,
+                    output_file,
+                    max_bytes=8000,
+                    transpose=True,
+                    jobs=jobs,
+                )
+                page = []
+                for path in files:
+                    with open(path, "r", encoding="utf-8") as f:
+                        page.append(f.read())
+                contents.append(page)
+
+        self.assertGreater(len(contents[0]), 1)
+        self.assertEqual(contents[0], contents[1])
+
+    def test_layout_cli_conflicts(self):
+        """Test that sharding is refused with --streaming and --incremental."""
+        captured_output = StringIO()
+        sys.stderr = captured_output
+        try:
+            streaming = main(["--streaming", "--shard-size", "5"])
+            incremental = main(["--incremental", "--transpose"])
+        finally:
+            sys.stderr = sys.__stderr__
+
+        self.assertEqual((streaming, incremental), (2, 2))
+        self.assertIn("cannot be combined", captured_output.getvalue())
+
+
+class TestCompactTable(unittest.TestCase):
+    """Test cases for compact_table and --compact."""
+
+    def test_minimal_separators(self):
+        """Test that separator rows keep their alignment with one dash per cell."""
+        rows, saved = compact_table(
+            ["| Feature | A |\n", "| :------- | ----- |\n", "| :---: | ---: |\n"]
+        )
+
+        self.assertEqual(rows, ["| Feature | A |\n", "|:-|-|\n", "|:-:|-:|\n"])
+        self.assertEqual(saved, 22)
+
+    def test_repeated_urls_become_references(self):
+        """Test that only URLs worth interning get a reference definition."""
+        long_url = "https://example.com/" + "a" * 40
+        rows, saved = compact_table(
+            [
+                f"| [x]({long_url}) | ![?]({long_url}) | [y](/e) |\n",
+                f"| [z]({long_url}) | [y](/e) | [w](https://once.example) |\n",
+            ]
+        )
+
+        self.assertEqual(
+            rows,
+            [
+                "| [x][r0] | ![?][r0] | [y](/e) |\n",
+                "| [z][r0] | [y](/e) | [w](https://once.example) |\n",
+                "\n",
+                f"[r0]: {long_url}\n",
+            ],
+        )
+        self.assertEqual(
+            saved, 3 * (len(long_url) - 2) - len(f"[r0]: {long_url}\n") - 1
+        )
+
+    def test_titles_and_nested_links_stay_inline(self):
+        """Test that links compact_table cannot rewrite safely are kept."""
+        row = (
+            '| [a](https://e.io/x "t") | [![b](https://e.io/i.png)](https://e.io/y) |\n'
+        )
+        rows, _ = compact_table([row] * 5)
+
+        self.assertIn('[a](https://e.io/x "t")', rows[0])
+        self.assertTrue(rows[0].endswith("](https://e.io/y) |\n"))
+        self.assertIn("[![b][r0]]", rows[0])
+
+    def test_references_resolve_to_the_table(self):
+        """Test that substituting the definitions back gives the original links."""
+        rows = list(iter_comparison_table(load_json("projects.json")))
+        compacted, saved = compact_table(rows)
+
+        blank = compacted.index("\n")
+        definitions = dict(
+            line.rstrip("\n")[1:].split("]: ", 1) for line in compacted[blank + 1 :]
+        )
+        restored = "".join(compacted[:blank])
+        for label, url in definitions.items():
+            restored = restored.replace(f"][{label}]", f"]({url})")
+
+        self.assertGreater(saved, 0)
+        self.assertEqual(restored.split("\n")[2:], "".join(rows).split("\n")[2:])
+
+    def test_compact_cli(self):
+        """Test that --compact reports the bytes saved."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_file = os.path.join(tempdir, "readme.md")
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            sys.stderr = captured_output
+            try:
+                written = main(["--compact", "--output", output_file])
+                conflict = main(["--compact", "--incremental"])
+            finally:
+                sys.stdout = sys.__stdout__
+                sys.stderr = sys.__stderr__
+            size = os.path.getsize(output_file)
+
+        self.assertEqual((written, conflict), (0, 2))
+        self.assertLess(size, os.path.getsize("readme.md"))
+        self.assertIn("Compact table: ", captured_output.getvalue())
+        self.assertIn(" bytes saved", captured_output.getvalue())
+
+
 class TestReadmeConsistency(unittest.TestCase):
     """Test that the current readme.md matches the generated output."""
 
@@ -794,6 +2322,152 @@ class TestValidateProjectsJson(unittest.TestCase):
             )
 
 
+class TestIndexedValidation(unittest.TestCase):
+    """Test cases for the single-pass validator and --validate-only."""
+
+    def make_project(self, name, repo, **keys):
+        project = {
+            "name": name,
+            "repo": repo,
+            "logo_url": f"{name}.png",
+            "logo_alt": f"{name} Logo",
+        }
+        project.update(keys)
+        return project
+
+    def test_duplicate_name_and_repo_detected(self):
+        """Test that duplicate names and repos are reported."""
+        data = {
+            "projects": [
+                self.make_project("App1", "user/app1"),
+                self.make_project("App1", "user/app2"),
+                self.make_project("App3", "user/app1"),
+            ],
+            "features": [],
+        }
+
+        errors = list(iter_validation_errors(data))
+
+        self.assertEqual(len(errors), 2)
+        self.assertIn("same name 'App1'", errors[0])
+        self.assertIn("same repo 'user/app1' as project 'App1'", errors[1])
+
+    def test_orphan_url_key_detected(self):
+        """Test that *_url keys without a base feature are reported."""
+        data = {
+            "projects": [
+                self.make_project("App1", "user/app1", ghost_url="https://x"),
+            ],
+            "features": [{"name": "Web App"}],
+        }
+
+        errors = list(iter_validation_errors(data))
+
+        self.assertIn("1 url key(s) with no base feature", errors[0])
+        self.assertIn("'ghost_url' in: App1", errors[1])
+        self.assertFalse(any("not mapped" in error for error in errors))
+
+    def test_missing_anchor_detected(self):
+        """Test that feature links to missing headings are reported."""
+        data = {
+            "projects": [],
+            "features": [
+                {"name": "Web App", "link": "features.md#web-app"},
+                {"name": "Videos", "link": "features.md#videos"},
+                {"name": "Logo", "link": None},
+            ],
+        }
+
+        errors = list(iter_validation_errors(data, anchors={"web-app"}))
+
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Feature 'Videos'", errors[0])
+
+    def test_errors_are_streamed(self):
+        """Test that the first error is available before the walk finishes."""
+        data = {
+            "projects": [{"name": "Broken"}]
+            + [self.make_project(f"App{i}", f"user/app{i}") for i in range(100)],
+            "features": [],
+        }
+
+        errors = iter_validation_errors(data)
+
+        self.assertIn("'Broken' is missing fields", next(errors))
+
+    def test_max_errors_stops_early(self):
+        """Test that validation stops after max_errors errors."""
+        data = {
+            "projects": [{"name": f"App{i}"} for i in range(10)],
+            "features": [],
+        }
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+
+        try:
+            with self.assertRaises(ValueError) as context:
+                validate_projects_json(data, max_errors=3)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        self.assertIn("3 error(s)", str(context.exception))
+        self.assertIn("Stopped after 3 error(s)", captured_output.getvalue())
+
+    def test_catalog_matches_dict_errors(self):
+        """Test that a Catalog yields the same errors as the raw dict."""
+        data = {
+            "projects": [
+                self.make_project("App1", "user/app1", bad_key="1", web_app="2"),
+                self.make_project("App2", "user/app2", bad_key="1", nope_url="u"),
+            ],
+            "features": [{"name": "Web App"}],
+        }
+
+        self.assertEqual(
+            list(iter_validation_errors(Catalog.from_data(data))),
+            list(iter_validation_errors(data)),
+        )
+
+    def test_heading_anchor(self):
+        """Test GitHub-style heading anchors."""
+        self.assertEqual(heading_anchor(" Web App\n"), "web-app")
+        self.assertEqual(heading_anchor("Geolocation/Map"), "geolocationmap")
+        self.assertEqual(
+            heading_anchor("Object/Face Recognition"), "objectface-recognition"
+        )
+
+    def test_real_feature_links_have_anchors(self):
+        """Test that every feature link in projects.json resolves."""
+        anchors = load_feature_anchors("features.md")
+
+        errors = list(iter_validation_errors(load_json("projects.json"), anchors))
+
+        self.assertEqual(errors, [])
+
+    def test_validate_only_cli(self):
+        """Test the --validate-only exit status."""
+        data = {"projects": [{"name": "App1"}], "features": []}
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            json_file = os.path.join(tempdir, "projects.json")
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+            captured_output = StringIO()
+            sys.stdout = captured_output
+
+            try:
+                failed = main(["--validate-only", "--json", json_file])
+                passed = main(["--validate-only", "--json", "projects.json"])
+            finally:
+                sys.stdout = sys.__stdout__
+
+        self.assertEqual(failed, 1)
+        self.assertEqual(passed, 0)
+        self.assertIn("missing fields", captured_output.getvalue())
+
+
 class TestGenerateReadme(unittest.TestCase):
     """Test cases for the generate_readme function."""
 
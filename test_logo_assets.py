@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Tests for logo_assets.py
+"""
+
+import unittest
+import http.client
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from io import StringIO
+import logo_assets
+from logo_assets import LogoCache, directory_fetch, image_extension, localize_logos
+from generate_readme import generate_readme, iter_html_logo_cells, main
+
+SVG_LOGO = b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg"></svg>'
+
+
+def _png(width, height):
+    """Return the bytes of a solid red RGBA PNG."""
+
+    def chunk(kind, payload):
+        body = kind + payload
+        return (
+            struct.pack(">I", len(payload)) + body + struct.pack(">I", zlib.crc32(body))
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\xff\x00\x00\xff" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class LogoTestCase(unittest.TestCase):
+    """Mirror a few logos into a temporary directory."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "source")
+        self.directory = os.path.join(self.temp_dir.name, "logos")
+        os.makedirs(self.source)
+        files = {
+            "big.png": _png(400, 200),
+            "small.png": _png(20, 20),
+            "copy.png": _png(20, 20),
+            "vector.svg": SVG_LOGO,
+        }
+        for name, content in files.items():
+            with open(os.path.join(self.source, name), "wb") as f:
+                f.write(content)
+        self.fetched = []
+        fetch = directory_fetch(self.source)
+
+        def counting_fetch(url):
+            self.fetched.append(url)
+            return fetch(url)
+
+        self.fetch = counting_fetch
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _data(self, *names):
+        return {
+            "projects": [
+                {
+                    "name": os.path.splitext(name)[0],
+                    "logo_url": f"https://example.com/logos/{name}?raw=true",
+                    "logo_alt": f"{name} logo",
+                }
+                for name in names
+            ],
+            "features": [],
+        }
+
+    def _render(self, *names, sprite=False):
+        """Render a readme and an HTML table in sibling directories."""
+        data = self._data(*names)
+        for project in data["projects"]:
+            project["repo"] = f"o/{project['name']}"
+        data["features"] = [{"name": "Logo", "processor": "generate_logo_row"}]
+        json_file = os.path.join(self.temp_dir.name, "projects.json")
+        template_file = os.path.join(self.temp_dir.name, "readme.tpl")
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        with open(template_file, "w", encoding="utf-8") as f:
+            f.write("{{COMPARISON_TABLE}}")
+
+        output_file = os.path.join(self.temp_dir.name, "readme.md")
+        html_file = os.path.join(self.temp_dir.name, "site", "table.html")
+        os.makedirs(os.path.dirname(html_file))
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            generate_readme(
+                template_file,
+                output_file,
+                json_file,
+                html_file=html_file,
+                logo_assets={
+                    "directory": self.directory,
+                    "fetch": self.fetch,
+                    "sprite": sprite,
+                },
+            )
+        finally:
+            sys.stdout = sys.__stdout__
+        with open(output_file, encoding="utf-8") as f:
+            readme = f.read()
+        with open(html_file, encoding="utf-8") as f:
+            return readme, f.read()
+
+
+class TestImageExtension(unittest.TestCase):
+    """Test image type detection"""
+
+    def test_signatures(self):
+        """Test that common formats are recognised from their bytes"""
+        self.assertEqual(image_extension(_png(1, 1)), ".png")
+        self.assertEqual(image_extension(b"\xff\xd8\xff\xe0rest"), ".jpg")
+        self.assertEqual(image_extension(b"GIF89a"), ".gif")
+        self.assertEqual(image_extension(b"RIFF\x00\x00\x00\x00WEBPVP8 "), ".webp")
+        self.assertEqual(image_extension(SVG_LOGO), ".svg")
+        self.assertEqual(image_extension(b"  <svg></svg>"), ".svg")
+        self.assertEqual(image_extension(b"<html>"), ".bin")
+
+
+class TestLogoCache(LogoTestCase):
+    """Test the content-addressed logo cache"""
+
+    def test_directory_fetch_ignores_query(self):
+        """Test that a local mirror is looked up by the URL file name"""
+        fetch = directory_fetch(self.source)
+        self.assertEqual(fetch("https://example.com/a/vector.svg?raw=true"), SVG_LOGO)
+
+    def test_identical_logos_are_stored_once(self):
+        """Test that files are named after their content"""
+        cache = LogoCache(self.directory, fetch=self.fetch)
+        os.makedirs(self.directory)
+        small = cache.get("https://example.com/small.png")
+        copy = cache.get("https://example.com/copy.png")
+        svg = cache.get("https://example.com/vector.svg")
+
+        self.assertEqual(small, copy)
+        self.assertTrue(svg.endswith(".svg"))
+        self.assertEqual(len(small), 16 + len(".png"))
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted({small, svg}))
+
+    def test_index_prevents_refetch(self):
+        """Test that index.json remembers fetched URLs across runs"""
+        data = self._data("small.png", "vector.svg", "small.png")
+        localize_logos(data, directory=self.directory, fetch=self.fetch)
+        self.assertEqual(len(self.fetched), 2)
+
+        localize_logos(
+            self._data("small.png", "vector.svg"),
+            directory=self.directory,
+            fetch=self.fetch,
+        )
+        self.assertEqual(len(self.fetched), 2)
+        with open(os.path.join(self.directory, "index.json"), encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_localize_rewrites_logo_urls(self):
+        """Test that projects point at the cached files"""
+        data = self._data("small.png", "missing.png")
+        localize_logos(
+            data, directory=self.directory, fetch=self.fetch, base_url="img/"
+        )
+
+        local, missing = data["projects"]
+        self.assertRegex(local["logo_url"], r"^img/[0-9a-f]{16}\.png$")
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.directory, local["logo_url"].rsplit("/", 1)[1])
+            )
+        )
+        # Logos that cannot be fetched keep their remote URL
+        self.assertTrue(missing["logo_url"].startswith("https://"))
+        self.assertNotIn("logo_sprite", local)
+
+    def test_truncated_response_keeps_remote_url(self):
+        """Test that HTTP protocol errors count as failed fetches"""
+
+        def fetch(url):
+            if "broken" in url:
+                raise http.client.IncompleteRead(b"\x89PNG")
+            return self.fetch(url)
+
+        data = self._data("small.png", "broken.png")
+        localize_logos(data, directory=self.directory, fetch=fetch)
+
+        local, broken = data["projects"]
+        self.assertFalse(local["logo_url"].startswith("https://"))
+        self.assertTrue(broken["logo_url"].startswith("https://"))
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(["index.json", local["logo_url"].rsplit("/", 1)[1]]),
+        )
+
+    def test_paths_are_relative_to_each_output(self):
+        """Test that the readme and the HTML table each find the logos"""
+        readme, table = self._render("vector.svg")
+
+        self.assertRegex(readme, r'<img src="logos/[0-9a-f]{16}\.svg"')
+        self.assertRegex(table, r'<img src="\.\./logos/[0-9a-f]{16}\.svg"')
+        self.assertNotIn("<link", table)
+
+    @unittest.skipIf(logo_assets.Image is not None, "Pillow is installed")
+    def test_sprite_cli_without_pillow(self):
+        """Test that --logo-sprite exits with status 2 without Pillow"""
+        captured_output = StringIO()
+        sys.stderr = captured_output
+        try:
+            result = main(["--local-logos", "--logo-sprite", "--logo-dir", "unused"])
+        finally:
+            sys.stderr = sys.__stderr__
+
+        self.assertEqual(result, 2)
+        self.assertIn("--logo-sprite needs Pillow", captured_output.getvalue())
+        self.assertFalse(os.path.exists("unused"))
+
+    @unittest.skipIf(logo_assets.Image is not None, "Pillow is installed")
+    def test_without_pillow_logos_keep_their_size(self):
+        """Test that logos are cached unchanged when Pillow is missing"""
+        cache = LogoCache(self.directory, fetch=self.fetch)
+        os.makedirs(self.directory)
+        name = cache.get("https://example.com/big.png")
+        with open(os.path.join(self.directory, name), "rb") as f:
+            self.assertEqual(f.read(), _png(400, 200))
+        with self.assertRaises(RuntimeError):
+            logo_assets.build_sprite(cache, [name])
+
+
+@unittest.skipIf(logo_assets.Image is None, "Pillow is not installed")
+class TestLogoResizing(LogoTestCase):
+    """Test downscaling and sprites (needs Pillow)"""
+
+    def test_large_logos_are_downscaled(self):
+        """Test that logos wider than the cache size are shrunk"""
+        cache = LogoCache(self.directory, fetch=self.fetch, size=100)
+        os.makedirs(self.directory)
+        big = cache.get("https://example.com/big.png")
+        small = cache.get("https://example.com/small.png")
+
+        with logo_assets.Image.open(os.path.join(self.directory, big)) as image:
+            self.assertEqual(image.size, (100, 50))
+        with logo_assets.Image.open(os.path.join(self.directory, small)) as image:
+            self.assertEqual(image.size, (20, 20))
+
+    def test_sprite_sheet(self):
+        """Test that raster logos are packed into one sprite with CSS classes"""
+        data = self._data("big.png", "small.png", "vector.svg")
+        localize_logos(data, directory=self.directory, fetch=self.fetch, sprite=True)
+
+        big, small, vector = data["projects"]
+        self.assertIn("logo_sprite", big)
+        self.assertIn("logo_sprite", small)
+        self.assertNotIn("logo_sprite", vector)
+
+        with logo_assets.Image.open(
+            os.path.join(self.directory, "sprite.png")
+        ) as image:
+            self.assertEqual(image.size, (2 * 100, 100))
+        with open(os.path.join(self.directory, "sprite.css"), encoding="utf-8") as f:
+            css = f.read()
+        self.assertIn(
+            f".{small['logo_sprite']} {{ background-position: -50px 0; }}", css
+        )
+
+        cells = list(iter_html_logo_cells(data["projects"]))
+        self.assertIn(f'class="logo-sprite {big["logo_sprite"]}"', cells[0])
+        self.assertIn('aria-label="big.png logo"', cells[0])
+        self.assertIn("<img", cells[2])
+
+    def test_html_links_sprite_stylesheet(self):
+        """Test that the HTML table links the sprite CSS next to the sprite"""
+        _, table = self._render("big.png", sprite=True)
+
+        self.assertTrue(
+            table.startswith('<link rel="stylesheet" href="../logos/sprite.css">\n')
+        )
+        self.assertIn('class="logo-sprite logo-', table)
+
+
+if __name__ == "__main__":
+    unittest.main()
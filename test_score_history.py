@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for score_history.py
+"""
+
+import unittest
+import json
+import os
+import sys
+from io import StringIO
+from score_history import ScoreHistory, format_points, main
+from test_catalog_changelog import GitRepoTestCase, _project
+
+
+class HistoryTestCase(GitRepoTestCase):
+    """Keep the history files next to the temporary repository."""
+
+    def setUp(self):
+        super().setUp()
+        self.history_file = os.path.join(self.repo, ".score_history.bin")
+
+    def times(self):
+        return [int(self.git("log", "-1", "--format=%ct", sha)) for sha in self.commits]
+
+    def update(self):
+        return ScoreHistory(self.history_file).update(repo_dir=self.repo)
+
+
+class TestScoreHistory(HistoryTestCase):
+    """Test building and querying the history"""
+
+    def test_points_record_changes_only(self):
+        """Test one point per value change, ending when a project leaves"""
+        self.assertEqual(self.update(), 3)
+        history = ScoreHistory(self.history_file)
+        t0, t1, t2 = self.times()
+
+        self.assertEqual(history.points("web_app", "o/a"), [(t0, "5"), (t1, "8")])
+        self.assertEqual(
+            history.points("search", "o/b"), [(t0, "wip-3"), (t1, "7"), (t2, None)]
+        )
+        self.assertEqual(history.points("web_app", "o/c"), [(t2, "x")])
+        self.assertEqual(history.points("web_app", "o/nope"), [])
+        self.assertEqual(history.name("o/a"), "A2")
+
+    def test_feature_and_project_queries(self):
+        """Test querying every project of a feature and every feature of a project"""
+        self.update()
+        history = ScoreHistory(self.history_file)
+
+        self.assertEqual(sorted(history.feature("web_app")), ["o/a", "o/c"])
+        self.assertEqual(sorted(history.project("o/b")), ["search"])
+        self.assertEqual(history.feature("unknown"), {})
+
+    def test_incremental_update_appends(self):
+        """Test that only new commits are read and existing bytes are kept"""
+        self.update()
+        with open(self.history_file, "rb") as f:
+            before = f.read()
+
+        self.assertEqual(self.update(), 0)
+        self.commit(
+            [_project("A2", "o/a", web_app="9"), _project("C", "o/c", web_app="x")],
+            "Version 3",
+        )
+        self.assertEqual(self.update(), 1)
+
+        with open(self.history_file, "rb") as f:
+            after = f.read()
+        self.assertTrue(after.startswith(before))
+        history = ScoreHistory(self.history_file)
+        self.assertEqual(
+            [value for _, value in history.points("web_app", "o/a")], ["5", "8", "9"]
+        )
+        self.assertEqual(len(history.index["series"]["web_app"]["o/a"]["blocks"]), 2)
+
+    def test_incremental_matches_full_build(self):
+        """Test that updating commit by commit gives the same series"""
+        self.update()
+        full = ScoreHistory(self.history_file)
+
+        step_file = os.path.join(self.repo, "steps.bin")
+        for sha in self.commits:
+            self.git("checkout", "-q", sha)
+            ScoreHistory(step_file).update(repo_dir=self.repo)
+        steps = ScoreHistory(step_file)
+
+        for feature in ("web_app", "search"):
+            self.assertEqual(steps.feature(feature), full.feature(feature))
+
+    def test_unsaved_tail_is_dropped(self):
+        """Test that bytes written after the last index are overwritten"""
+        self.update()
+        size = os.path.getsize(self.history_file)
+        with open(self.history_file, "ab") as f:
+            f.write(b"interrupted")
+        self.commit([_project("A2", "o/a", web_app="9")], "Version 3")
+
+        self.update()
+
+        history = ScoreHistory(self.history_file)
+        self.assertEqual(history.points("web_app", "o/a")[-1][1], "9")
+        blocks = history.index["series"]["web_app"]["o/a"]["blocks"]
+        self.assertEqual(blocks[-1][0], size)
+
+    def test_rewritten_history_rebuilds(self):
+        """Test that a head that is no longer an ancestor starts over"""
+        self.update()
+        self.git("reset", "-q", "--hard", self.commits[0])
+        self.commit([_project("A", "o/a", web_app="6")], "Rewritten")
+
+        self.assertEqual(self.update(), 2)
+
+        history = ScoreHistory(self.history_file)
+        self.assertEqual(
+            [value for _, value in history.points("web_app", "o/a")], ["5", "6"]
+        )
+
+
+class TestCli(HistoryTestCase):
+    """Test the command line interface"""
+
+    def run_main(self, *args):
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            result = main(list(args))
+        finally:
+            os.chdir(cwd)
+            sys.stdout = sys.__stdout__
+        return result, captured_output.getvalue()
+
+    def test_update_and_show(self):
+        """Test the update and show commands"""
+        result, output = self.run_main("update")
+        self.assertEqual(result, 0)
+        self.assertIn("Read 3 new commit(s)", output)
+
+        _, output = self.run_main("show", "web_app", "--project", "o/a")
+        self.assertRegex(output, r"^A2: \d{4}-\d\d-\d\d 5 → \d{4}-\d\d-\d\d 8\n$")
+
+        _, output = self.run_main("show", "search", "--format", "json")
+        self.assertEqual([value for _, value in json.loads(output)["o/b"]][-1], None)
+
+    def test_format_points(self):
+        """Test the text form of a series"""
+        self.assertEqual(
+            format_points([(0, "5"), (86400, None)]), "1970-01-01 5 → 1970-01-02 —"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()